@@ -0,0 +1,10 @@
+# Paquete del juego Escapa / Cazador sin pygame, importable desde el servidor, el
+# entrenamiento, el analizador de mapas y las pruebas:
+#   core      configuración, terrenos, mapas, pathfinding, entidades, puntuaciones,
+#             eventos y la simulación
+#   hpa       pathfinding jerárquico (HPA*) para mapas muy grandes
+#   server    servidor multijugador (asyncio + TCP)
+#   env       entorno de entrenamiento vectorizado (necesita numpy)
+#   analysis  analizador de mapas en paralelo
+#   bench     mediciones del pathfinding jerárquico y del leaderboard
+# El juego con ventana (pygame) es el script "proyecto 2 intro.py".
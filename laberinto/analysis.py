@@ -0,0 +1,217 @@
+# Analizador de mapas (estadísticas de calidad en paralelo)
+
+import random
+import json
+import time
+import collections
+import os
+from typing import Dict
+
+from .core import (ENEMY_SPAWN_TYPES, TERRAIN_WALK_PLAYER, TERRAIN_WALK_ENEMY,
+                   bfs_distance_field, build_level, find_random_cell_of_type, neighbors)
+
+# ----------------------------
+# Analizador de mapas (estadísticas de calidad en paralelo)
+# ----------------------------
+# Mapas por tarea enviada a cada proceso
+ANALYZE_CHUNK = 64
+# Celdas de aparición de enemigos muestreadas por mapa para medir sus rutas hasta el jugador
+ANALYZE_ENEMY_SAMPLES = 8
+# Fracción de celdas aisladas del inicio a partir de la cual un mapa cuenta como "cortado"
+ANALYZE_CUTOFF_WARN = 0.10
+
+def component_sizes(grid, for_enemy):
+    # Tamaños (de mayor a menor) de las zonas conexas con las reglas del jugador o del enemigo
+    rows, cols = len(grid), len(grid[0])
+    walkable = TERRAIN_WALK_ENEMY if for_enemy else TERRAIN_WALK_PLAYER
+    seen = bytearray(rows*cols)
+    sizes = []
+    for r0 in range(rows):
+        for c0 in range(cols):
+            first = r0*cols + c0
+            if seen[first] or not walkable[grid[r0][c0]]:
+                continue
+            seen[first] = 1
+            stack = [first]
+            size = 0
+            while stack:
+                idx = stack.pop()
+                size += 1
+                r, c = divmod(idx, cols)
+                for n, nr, nc, ok in ((idx-cols, r-1, c, r > 0), (idx+cols, r+1, c, r < rows-1),
+                                      (idx-1, r, c-1, c > 0), (idx+1, r, c+1, c < cols-1)):
+                    if ok and not seen[n] and walkable[grid[nr][nc]]:
+                        seen[n] = 1
+                        stack.append(n)
+            sizes.append(size)
+    sizes.sort(reverse=True)
+    return sizes
+
+def count_dead_ends(grid, for_enemy):
+    # Celdas transitables con un único vecino transitable (callejones sin salida)
+    walkable = TERRAIN_WALK_ENEMY if for_enemy else TERRAIN_WALK_PLAYER
+    rows, cols = len(grid), len(grid[0])
+    total = 0
+    for r in range(rows):
+        for c in range(cols):
+            if walkable[grid[r][c]]:
+                open_n = sum(1 for nr, nc in neighbors(r, c, rows, cols) if walkable[grid[nr][nc]])
+                if open_n == 1:
+                    total += 1
+    return total
+
+def summarize_distances(values):
+    # Media, mediana, percentil 90 y máximo de una lista de distancias
+    if not values:
+        return None
+    values = sorted(values)
+    n = len(values)
+    return {"mean": round(sum(values)/n, 2), "p50": values[n//2], "p90": values[min(n-1, n*9//10)], "max": values[-1]}
+
+def analyze_maze(task):
+    # Estadísticas de un mapa: task es {"seed": n} (se genera) o {"grid": [[...]]} (se carga)
+    # Un mapa cargado sin inicio y salida válidos se informa como tarea fallida
+    seed = task.get("seed")
+    rng = random.Random(seed)
+    try:
+        final_seed, grid, _, start, exit_cell, stats = build_level(seed, rng, grid=task.get("grid"))
+    except ValueError as e:
+        grid = task["grid"]
+        return {"seed": seed, "rows": len(grid), "cols": len(grid[0]), "error": str(e)}
+    rows, cols = len(grid), len(grid[0])
+    result = {"seed": seed, "final_seed": final_seed, "rows": rows, "cols": cols}
+    result.update(stats)
+    for name, for_enemy in (("player", False), ("enemy", True)):
+        sizes = component_sizes(grid, for_enemy)
+        cells = sum(sizes)
+        result[name] = {
+            "cells": cells,
+            "components": len(sizes),
+            "largest": sizes[0] if sizes else 0,
+            "largest_frac": round(sizes[0]/cells, 4) if cells else 0.0,
+            "dead_ends": count_dead_ends(grid, for_enemy),
+        }
+    # Rutas del jugador: distancias desde el inicio a todo lo alcanzable
+    field = bfs_distance_field(grid, start, for_enemy=False)
+    reach = [d for d in field if d >= 0]
+    player = result["player"]
+    player["reachable_from_start"] = len(reach)
+    # Celdas pisables por el jugador a las que no puede llegar (lianas que aíslan zonas)
+    player["cut_off_frac"] = round(1 - len(reach)/player["cells"], 4) if player["cells"] else 0.0
+    player["paths"] = summarize_distances(reach)
+    result["exit_distance"] = field[exit_cell[0]*cols + exit_cell[1]]
+    # Rutas de los enemigos: desde celdas de aparición al azar hasta el inicio del jugador
+    efield = bfs_distance_field(grid, start, for_enemy=True)
+    spawns = [find_random_cell_of_type(grid, allowed_types=ENEMY_SPAWN_TYPES, rng=rng)
+              for _ in range(ANALYZE_ENEMY_SAMPLES)]
+    enemy_paths = [efield[r*cols + c] for r, c in spawns if efield[r*cols + c] >= 0]
+    result["enemy"]["reach_frac"] = round(len(enemy_paths)/len(spawns), 4)
+    result["enemy"]["paths"] = summarize_distances(enemy_paths)
+    return result
+
+def analyze_chunk(tasks):
+    # Trabajo de un proceso: analiza un bloque de mapas
+    return [analyze_maze(task) for task in tasks]
+
+class MazeStatsSummary:
+    # Resumen acumulado en memoria constante (sumas, mínimos, máximos e histogramas)
+    FIELDS = ("start_retries", "regenerations", "exit_distance",
+              "player.components", "player.largest_frac", "player.cut_off_frac", "player.dead_ends",
+              "enemy.components", "enemy.largest_frac", "enemy.dead_ends", "enemy.reach_frac",
+              "player.paths.mean", "enemy.paths.mean")
+
+    def __init__(self):
+        self.count = 0
+        self.sums = collections.Counter()
+        self.counts = collections.Counter()
+        self.mins: Dict[str, float] = {}
+        self.maxs: Dict[str, float] = {}
+        self.hist = {"start_retries": collections.Counter(), "regenerations": collections.Counter(),
+                     "exit_distance": collections.Counter()}
+        self.cut_off_mazes = 0
+        self.failed = 0
+
+    def add(self, result):
+        # Las tareas fallidas solo se cuentan (no tienen estadísticas)
+        if "error" in result:
+            self.failed += 1
+            return
+        self.count += 1
+        for key in self.FIELDS:
+            value = result
+            for part in key.split("."):
+                value = value.get(part) if isinstance(value, dict) else None
+            if value is None:
+                continue
+            self.sums[key] += value
+            self.counts[key] += 1
+            self.mins[key] = min(self.mins.get(key, value), value)
+            self.maxs[key] = max(self.maxs.get(key, value), value)
+        for key, hist in self.hist.items():
+            hist[result[key]] += 1
+        if result["player"]["cut_off_frac"] >= ANALYZE_CUTOFF_WARN:
+            self.cut_off_mazes += 1
+
+    def as_dict(self):
+        return {
+            "mazes": self.count,
+            "failed": self.failed,
+            "cut_off_mazes": self.cut_off_mazes,
+            "metrics": {key: {"mean": round(self.sums[key]/self.counts[key], 4),
+                              "min": self.mins[key], "max": self.maxs[key]}
+                        for key in self.FIELDS if self.counts[key]},
+            "histograms": {key: dict(sorted(hist.items())) for key, hist in self.hist.items()},
+        }
+
+def iter_analyze_tasks(count=None, seed_start=0, load_path=None):
+    # Tareas de análisis: semillas consecutivas o líneas JSONL de un archivo ({"seed"} o {"grid"})
+    if load_path is None:
+        for seed in range(seed_start, seed_start + count):
+            yield {"seed": seed}
+        return
+    with open(load_path) as f:
+        for i, line in enumerate(f):
+            if count is not None and i >= count:
+                break
+            if line.strip():
+                yield json.loads(line)
+
+def analyze_mazes(count=None, out_path="maze_stats.jsonl", workers=None, seed_start=0, load_path=None):
+    # Reparte los mapas en bloques entre un pool de procesos y escribe cada resultado en
+    # out_path (JSONL) según llega. Solo hay unos pocos bloques en vuelo a la vez, así que la
+    # memoria no crece con el número de mapas. El resumen se guarda en out_path + ".summary.json".
+    import itertools
+    import multiprocessing
+    workers = workers or os.cpu_count() or 1
+    tasks = iter_analyze_tasks(count, seed_start, load_path)
+    chunks = iter(lambda: list(itertools.islice(tasks, ANALYZE_CHUNK)), [])
+    summary = MazeStatsSummary()
+    t0 = time.perf_counter()
+    with open(out_path, "w") as out, multiprocessing.Pool(workers) as pool:
+        pending = collections.deque()
+
+        def drain_one():
+            for result in pending.popleft().get():
+                out.write(json.dumps(result) + "\n")
+                summary.add(result)
+
+        for chunk in chunks:
+            pending.append(pool.apply_async(analyze_chunk, (chunk,)))
+            # Ventana acotada de bloques pendientes (memoria constante)
+            if len(pending) >= workers*4:
+                drain_one()
+        while pending:
+            drain_one()
+    elapsed = time.perf_counter() - t0
+    result = summary.as_dict()
+    with open(out_path + ".summary.json", "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Mapas analizados: {summary.count:,} en {elapsed:.1f} s ({summary.count/max(elapsed, 1e-9):,.0f} mapas/s, {workers} procesos)")
+    if summary.failed:
+        print(f"Mapas sin inicio y salida válidos (fallidos): {summary.failed:,}")
+    print(f"Mapas con más de {ANALYZE_CUTOFF_WARN:.0%} del terreno del jugador aislado del inicio: {summary.cut_off_mazes:,}")
+    for key, m in result["metrics"].items():
+        print(f"  {key}: media {m['mean']}, min {m['min']}, max {m['max']}")
+    print(f"Resultados: {out_path} (resumen en {out_path}.summary.json)")
+    return result
+
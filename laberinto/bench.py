@@ -0,0 +1,142 @@
+# Mediciones de rendimiento del núcleo (pathfinding jerárquico y leaderboard)
+
+import random
+import time
+import os
+
+from .core import MODES, Leaderboard, bfs_distance_field, generate_maze_with_features
+from .hpa import HierarchicalPathfinder
+
+# ----------------------------
+# Medición del pathfinding jerárquico
+# ----------------------------
+def bench_hpa(size=2000, queries=10, open_walls=0.1):
+    # Compara HPA* con el BFS plano (con parada temprana) en consultas de largo alcance
+    # sobre un mapa size x size. Con los pesos de terreno por defecto los túneles y lianas
+    # parten el laberinto en trozos pequeños, así que se usa el laberinto excavado con todos
+    # los pasillos como Camino y una fracción de muros abiertos (mapa conexo con ciclos).
+    rng = random.Random(0)
+    t0 = time.perf_counter()
+    grid = generate_maze_with_features(1, size, size)
+    for r in range(size):
+        row = grid[r]
+        for c in range(size):
+            if row[c] != 1:
+                row[c] = 0
+            elif 0 < r < size-1 and 0 < c < size-1 and rng.random() < open_walls:
+                row[c] = 0
+    print(f"Mapa {size}x{size} generado en {time.perf_counter()-t0:.1f} s")
+    t0 = time.perf_counter()
+    hpa = HierarchicalPathfinder(grid, for_enemy=True)
+    print(f"Entradas (regla de enemigo): {hpa.node_count():,} nodos en {time.perf_counter()-t0:.1f} s")
+    t0 = time.perf_counter()
+    guided = HierarchicalPathfinder(grid, for_enemy=True)
+    guided.build_landmarks()
+    print(f"Entradas + distancias internas + {len(guided.landmark_dist)} landmarks (regla de enemigo): {time.perf_counter()-t0:.1f} s")
+    # Pares de largo alcance (al menos size celdas de distancia Manhattan)
+    pairs = []
+    while len(pairs) < queries:
+        a = (rng.randrange(size), rng.randrange(size))
+        b = (rng.randrange(size), rng.randrange(size))
+        if grid[a[0]][a[1]] == 0 and grid[b[0]][b[1]] == 0 and abs(a[0]-b[0]) + abs(a[1]-b[1]) >= size:
+            pairs.append((a, b))
+    flat_t = cold_t = warm_t = alt_t = 0.0
+    worst = 1.0
+    for a, b in pairs:
+        t = time.perf_counter()
+        d = bfs_distance_field(grid, a, for_enemy=True, stop_at=b)[b[0]*size + b[1]]
+        flat_t += time.perf_counter() - t
+        t = time.perf_counter()
+        hpa.find_path(a, b)
+        cold_t += time.perf_counter() - t
+        t = time.perf_counter()
+        hpa.find_path(a, b)
+        warm_t += time.perf_counter() - t
+        t = time.perf_counter()
+        path = guided.find_path(a, b)
+        alt_t += time.perf_counter() - t
+        worst = max(worst, (len(path)-1) / d)
+    print(f"Consultas: {queries} (distancia Manhattan media {sum(abs(a[0]-b[0]) + abs(a[1]-b[1]) for a, b in pairs)//queries})")
+    print(f"  BFS plano: {flat_t/queries*1000:.0f} ms")
+    print(f"  HPA* en frío (calcula las distancias internas de los clusters que visita): {cold_t/queries*1000:.0f} ms ({flat_t/cold_t:.1f}x)")
+    print(f"  HPA* con esos clusters ya calculados: {warm_t/queries*1000:.0f} ms ({flat_t/warm_t:.1f}x)")
+    print(f"  HPA* con landmarks: {alt_t/queries*1000:.0f} ms ({flat_t/alt_t:.1f}x)")
+    print(f"  Longitud HPA* / óptima (peor caso): {worst:.3f}")
+    # Actualización incremental: abrir y cerrar celdas al azar (las dos instancias comparten
+    # el grid, así que las dos reciben cada cambio)
+    edits = 200
+    changes = []
+    for _ in range(edits):
+        r, c = rng.randrange(1, size-1), rng.randrange(1, size-1)
+        changes.append((r, c, 1 - grid[r][c] if grid[r][c] in (0, 1) else grid[r][c]))
+    t = time.perf_counter()
+    for r, c, tid in changes:
+        hpa.set_terrain(r, c, tid)
+    print(f"  Cambio de terreno (actualización incremental): {(time.perf_counter()-t)/edits*1e6:.0f} us")
+    t = time.perf_counter()
+    for r, c, tid in changes:
+        guided.set_terrain(r, c, tid)
+    # Tras los cambios los landmarks se corrigen antes de la primera consulta (no se reconstruyen)
+    guided._repair_landmarks()
+    print(f"  Corrección de landmarks tras {edits} cambios: {(time.perf_counter()-t)*1000:.0f} ms")
+    flat_t = alt_t = 0.0
+    for a, b in pairs:
+        if grid[a[0]][a[1]] != 0 or grid[b[0]][b[1]] != 0:
+            continue
+        t = time.perf_counter()
+        bfs_distance_field(grid, a, for_enemy=True, stop_at=b)
+        flat_t += time.perf_counter() - t
+        t = time.perf_counter()
+        guided.find_path(a, b)
+        alt_t += time.perf_counter() - t
+    print(f"  HPA* con landmarks corregidos: {flat_t/max(alt_t, 1e-9):.1f}x el BFS plano")
+
+# ----------------------------
+# Medición del leaderboard
+# ----------------------------
+def bench_leaderboard(num_runs=1_000_000, queries=2000):
+    # Llena un leaderboard temporal con num_runs partidas y mide las consultas habituales
+    import tempfile
+    rng = random.Random(0)
+    players = [f"jugador{i}" for i in range(max(1, num_runs // 50))]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        board = Leaderboard(path, legacy_file=None)
+        t0 = time.perf_counter()
+        rows = ((rng.choice(players), rng.choice(MODES), rng.randrange(5000), "Normal", rng.randrange(2**31), 60.0, 0.0)
+                for _ in range(num_runs))
+        board.db.executemany(
+            "INSERT INTO runs (player, mode, score, difficulty, seed, duration, created) VALUES (?,?,?,?,?,?,?)", rows)
+        board.db.commit()
+        print(f"Partidas cargadas: {num_runs:,} en {time.perf_counter()-t0:.1f} s")
+        board.close()
+
+        def timed(label, fn, n):
+            t = time.perf_counter()
+            for _ in range(n):
+                fn()
+            print(f"  {label}: {(time.perf_counter()-t)/n*1e6:.1f} us")
+
+        t0 = time.perf_counter()
+        board = Leaderboard(path, legacy_file=None)
+        print(f"Apertura (top del HUD incluido): {(time.perf_counter()-t0)*1000:.1f} ms")
+        t0 = time.perf_counter()
+        board.count("escapa")
+        print(f"Carga del índice de puestos (una vez por modo): {(time.perf_counter()-t0)*1000:.1f} ms")
+        timed("puesto de una puntuación", lambda: board.rank("escapa", rng.randrange(5000)), queries)
+        timed("top 10", lambda: board.top("escapa", 10), queries)
+        # Página profunda: tras 100.000 filas o, si el modo tiene menos, tras todas menos la última página
+        depth = max(0, min(100_000, board.count("escapa") - 10))
+        after, skipped = None, 0
+        while skipped < depth:
+            page = board.top("escapa", min(1000, depth - skipped), after=after)
+            if not page:
+                break
+            after = (page[-1]["score"], page[-1]["id"])
+            skipped += len(page)
+        timed(f"página de 10 tras {skipped:,} filas", lambda: board.top("escapa", 10, after=after), queries)
+        timed("mejor marca personal", lambda: board.personal_best(rng.choice(players), "escapa"), queries)
+        timed("historial del jugador (20)", lambda: board.history(rng.choice(players), limit=20), queries)
+        timed("guardar partida (commit incluido)", lambda: board.record(rng.choice(players), "escapa", rng.randrange(5000)), 200)
+        board.close()
+
@@ -0,0 +1,2013 @@
+# Núcleo del juego: configuración, terrenos, mapas, pathfinding, entidades,
+# puntuaciones, eventos y la simulación (sin pygame)
+
+# Importa módulo random para operaciones aleatorias
+import random
+# Importa json para guardar/leer puntuaciones en formato JSON
+import json
+# Importa time para mediciones temporales simples
+import time
+# Importa collections por si se usan estructuras como deque, Counter, etc.
+import collections
+# Importa os para operaciones con sistema de archivos (rutas, existencias)
+import os
+# Importa bisect para búsquedas binarias en tablas de pesos acumulados
+import bisect
+# Importa heapq para colas de prioridad (A* del oráculo de distancias)
+import heapq
+# Importa array para tablas numéricas compactas (uint16) del oráculo de distancias
+from array import array
+# Importaciones de tipos para anotaciones estáticas (List, Tuple, Optional, Dict)
+from typing import List, Tuple, Optional, Dict
+
+# ----------------------------
+# Configuración general
+# ----------------------------
+# Ancho de la ventana en píxeles
+WINDOW_WIDTH = 960
+# Alto de la ventana en píxeles
+WINDOW_HEIGHT = 720
+# Número de filas de la cuadrícula lógica
+GRID_ROWS = 20
+# Número de columnas de la cuadrícula lógica
+GRID_COLS = 25
+# Tamaño en píxeles de cada celda visible de la cuadrícula
+CELL_SIZE = 28  # cuadrícula visible
+# Cuadros por segundo objetivo (velocidad de actualización del menú)
+FPS = 20
+# Frecuencia fija de la lógica del juego (ticks por segundo); el balance depende de este valor
+LOGIC_HZ = 20
+# Duración de un tick de lógica en segundos
+LOGIC_DT = 1.0 / LOGIC_HZ
+# Cuadros por segundo del dibujado durante la partida (independiente de la lógica)
+RENDER_FPS = 60
+# Tiempo real máximo que se acumula por cuadro (evita la "espiral" tras una pausa larga)
+MAX_FRAME_TIME = 0.25
+# Máximo de pulsaciones de dirección guardadas entre ticks de lógica
+INPUT_BUFFER_SIZE = 4
+
+# colores (tuplas RGB)
+WHITE = (255,255,255)
+BLACK = (0,0,0)
+GRAY = (160,160,160)
+DARKGRAY = (70,70,70)
+GREEN = (50,200,50)
+RED = (200,50,50)
+BLUE = (50,50,200)
+YELLOW = (230,230,30)
+BROWN = (150,100,50)
+PURPLE = (160,60,200)
+
+# Tamaño en píxeles de cada celda en la miniatura del menú
+PREVIEW_SCALE = 6
+# A partir de cuántas celdas se muestra un minimapa dentro de la partida
+MINIMAP_MIN_CELLS = 2000
+# Ancho máximo en píxeles del minimapa del HUD
+MINIMAP_WIDTH = 160
+
+# Máximo de trampas activas a la vez por jugador
+MAX_TRAPS = 3
+
+# Nombre de archivo donde se guardan las puntuaciones
+SCORES_FILE = "scores.json"
+
+# ----------------------------
+# Terrenos (cada uno como clase)
+# ----------------------------
+# Clase base que representa un tipo de terreno en la cuadrícula
+class Terrain:
+    # Identificador numérico del terreno (por defecto 0)
+    id: int = 0
+    # Nombre legible del terreno
+    name: str = "Terrain"
+    # Indica si el jugador puede caminar sobre este terreno
+    walkable_for_player = True
+    # Indica si los enemigos pueden caminar sobre este terreno
+    walkable_for_enemy = True
+    # Color por defecto para representar el terreno en pantalla
+    color = GRAY
+    # Indica si el terreno tapa la línea de visión de los enemigos
+    blocks_sight = False
+
+    # Representación en string de la clase/instancia (útil para depuración)
+    def __repr__(self):
+        return f"{self.name}"
+
+# Subclase que representa un camino transitable por ambos
+class Camino(Terrain):
+    # Identificador específico de Camino
+    id = 0
+    # Nombre legible
+    name = "Camino"
+    # Jugador puede caminar
+    walkable_for_player = True
+    # Enemigos pueden caminar
+    walkable_for_enemy = True
+    # Color visual del camino
+    color = (200,200,200)
+
+# Subclase que representa un muro no transitable
+class Muro(Terrain):
+    # Identificador de Muro
+    id = 1
+    # Nombre legible
+    name = "Muro"
+    # Jugador NO puede caminar
+    walkable_for_player = False
+    # Enemigo NO puede caminar
+    walkable_for_enemy = False
+    # Color visual del muro
+    color = (60,60,60)
+    # Los muros tapan la visión
+    blocks_sight = True
+
+# Subclase que representa lianas (obstáculo para jugador, transitable por enemigo)
+class Lianas(Terrain):
+    # Identificador de Lianas
+    id = 2
+    # Nombre legible
+    name = "Lianas"
+    # Jugador NO puede caminar (ej. requiere herramienta)
+    walkable_for_player = False
+    # Enemigos SÍ pueden moverse por las lianas
+    walkable_for_enemy = True
+    # Color representativo
+    color = (34,139,34)
+
+# Subclase que representa túnel (transitable por jugador, bloquea enemigos)
+class Tunel(Terrain):
+    # Identificador de Tunel
+    id = 3
+    # Nombre legible
+    name = "Tunel"
+    # Jugador puede pasar por túnel
+    walkable_for_player = True
+    # Enemigos NO pueden pasar
+    walkable_for_enemy = False
+    # Color representativo del túnel
+    color = (135,206,235)
+# Diccionario que asocia IDs numéricos de terreno con sus clases correspondientes.
+TERRAINS = {
+    0: Camino,   # Terreno transitable para jugador y enemigos
+    1: Muro,     # Terreno bloqueante para ambos
+    2: Lianas,   # Bloquea al jugador, permite enemigos
+    3: Tunel,    # Permite jugador, bloquea enemigos
+}
+
+# ----------------------------
+# Configuración externa (perfiles de dificultad y terrenos)
+# ----------------------------
+# Archivo opcional con perfiles de dificultad y tipos de terreno
+CONFIG_FILE = "config.json"
+
+# Configuración por defecto (equivale al comportamiento original del juego).
+# Si config.json no existe o es inválido se usa esta estructura.
+DEFAULT_CONFIG = {
+    "default_difficulty": "Normal",
+    "difficulties": {
+        "Facil":   {"num_enemies": 3, "enemy_speed": 0.75},
+        "Normal":  {"num_enemies": 4, "enemy_speed": 1.0},
+        "Dificil": {"num_enemies": 6, "enemy_speed": 1.5},
+    },
+    # spawn_weight: peso relativo con que una celda excavada se convierte en ese terreno
+    # blocks_sight: si el terreno tapa la línea de visión de los enemigos
+    "terrains": [
+        {"id": 0, "name": "Camino", "walkable_for_player": True,  "walkable_for_enemy": True,  "color": [200,200,200], "spawn_weight": 0.88, "blocks_sight": False},
+        {"id": 1, "name": "Muro",   "walkable_for_player": False, "walkable_for_enemy": False, "color": [60,60,60],    "spawn_weight": 0.0,  "blocks_sight": True},
+        {"id": 2, "name": "Lianas", "walkable_for_player": False, "walkable_for_enemy": True,  "color": [34,139,34],   "spawn_weight": 0.07, "blocks_sight": False},
+        {"id": 3, "name": "Tunel",  "walkable_for_player": True,  "walkable_for_enemy": False, "color": [135,206,235], "spawn_weight": 0.05, "blocks_sight": False},
+    ],
+    # Tipos de trampa: efecto "kill" (mata y se consume) o "slow" (ralentiza durante slow_time).
+    # radius: celdas (distancia Manhattan) que cubre; duration: segundos hasta expirar.
+    "default_trap_type": "Basica",
+    "trap_types": {
+        "Basica": {"effect": "kill", "radius": 0, "duration": 30.0, "respawn_delay": 10.0, "score": 50, "color": [160,60,200]},
+        "Red":    {"effect": "slow", "radius": 1, "duration": 15.0, "slow_factor": 3.0, "slow_time": 4.0, "color": [230,140,30]},
+    },
+}
+
+# Clases base conocidas por id (los terrenos nuevos heredan directamente de Terrain)
+BUILTIN_TERRAINS = dict(TERRAINS)
+# Ids que el generador de mapas escribe directamente (0 = camino, 1 = muro)
+REQUIRED_TERRAIN_IDS = (0, 1)
+
+# Tablas de búsqueda rápida indexadas por id de terreno (se rellenan en apply_config).
+# Pathfinding y dibujado leen estas listas en lugar de consultar las clases.
+TERRAIN_WALK_PLAYER: List[bool] = []
+TERRAIN_WALK_ENEMY: List[bool] = []
+TERRAIN_COLORS: List[Tuple[int,int,int]] = []
+TERRAIN_BLOCKS_SIGHT: List[bool] = []
+# Tipos donde pueden aparecer jugador y enemigos (celdas transitables para cada uno)
+PLAYER_SPAWN_TYPES: List[int] = []
+ENEMY_SPAWN_TYPES: List[int] = []
+# Pesos acumulados y ids para convertir celdas excavadas en terrenos
+SPAWN_CUM_WEIGHTS: List[float] = []
+SPAWN_TERRAIN_IDS: List[int] = []
+
+# Perfiles de dificultad compilados: nombre -> dict con num_enemies y enemy_speed
+DIFFICULTIES: Dict[str, Dict] = {}
+# Tipos de trampa compilados: nombre -> TrapType
+TRAP_TYPES: Dict[str, "TrapType"] = {}
+
+class TrapType:
+    # Parámetros de un tipo de trampa definidos en la configuración
+    def __init__(self, name, effect="kill", radius=0, duration=None, respawn_delay=10.0,
+                 score=0, slow_factor=2.0, slow_time=3.0, consumed=None, color=PURPLE, index=0):
+        self.name = name
+        # Posición en la configuración (identifica el tipo en los eventos de telemetría)
+        self.index = index
+        # "kill" mata al enemigo; "slow" multiplica su cooldown de movimiento
+        self.effect = effect
+        # Celdas cubiertas alrededor de la trampa (distancia Manhattan)
+        self.radius = int(radius)
+        # Segundos hasta expirar (None = no expira)
+        self.duration = None if duration is None else float(duration)
+        # Segundos hasta que reaparece un enemigo muerto por esta trampa
+        self.respawn_delay = float(respawn_delay)
+        # Puntos para el jugador cada vez que la trampa afecta a un enemigo
+        self.score = score
+        # Multiplicador del cooldown de movimiento y segundos que dura la ralentización
+        self.slow_factor = float(slow_factor)
+        self.slow_time = float(slow_time)
+        # Si la trampa desaparece al activarse (por defecto solo las que matan)
+        self.consumed = (effect == "kill") if consumed is None else bool(consumed)
+        self.color = tuple(int(v) for v in color)
+        if len(self.color) != 3:
+            raise ValueError(f"color {color!r} no es RGB")
+
+# Caché de la configuración compilada (se parsea una sola vez por proceso)
+_config_cache: Optional[Dict] = None
+
+def load_config(path=CONFIG_FILE):
+    # Parte de la configuración por defecto
+    config = json.loads(json.dumps(DEFAULT_CONFIG))
+    # Si existe el archivo, sus claves reemplazan a las por defecto
+    if os.path.exists(path):
+        try:
+            with open(path,"r") as f:
+                user_config = json.load(f)
+            config.update(user_config)
+        except Exception as e:
+            print("config.json inválido, se usa configuración por defecto:", e)
+    return config
+
+def valid_terrain_defs(terrain_defs):
+    # Entradas de terreno utilizables: objeto con "id" entero en [0, 255] (los mapas guardan
+    # un byte por celda), color RGB y peso numérico. Las demás se avisan y se omiten; si no
+    # queda ninguna se usan los terrenos por defecto.
+    valid = []
+    for t in terrain_defs if isinstance(terrain_defs, list) else ():
+        try:
+            tid = t["id"]
+            if not isinstance(tid, int) or isinstance(tid, bool) or not 0 <= tid < 256:
+                raise ValueError(f"id {tid!r} no es un entero entre 0 y 255")
+            if "color" in t and len(tuple(int(v) for v in t["color"])) != 3:
+                raise ValueError(f"color {t['color']!r} no es RGB")
+            float(t.get("spawn_weight", 0.0))
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"config.json: terreno {t!r} inválido, se omite:", e)
+            continue
+        valid.append(t)
+    if not valid:
+        print("config.json: sin terrenos válidos, se usan los terrenos por defecto")
+        return DEFAULT_CONFIG["terrains"]
+    # El generador de mapas usa 0 como camino y 1 como muro: si faltan se toman por defecto
+    ids = {t["id"] for t in valid}
+    for t in DEFAULT_CONFIG["terrains"]:
+        if t["id"] in REQUIRED_TERRAIN_IDS and t["id"] not in ids:
+            print(f"config.json: falta el terreno {t['id']} ({t['name']}), se usa el de por defecto")
+            valid.append(t)
+    return valid
+
+def compile_terrains(terrain_defs):
+    # Construye las clases de terreno y las tablas de búsqueda a partir de la configuración
+    terrain_defs = valid_terrain_defs(terrain_defs)
+    terrains = {}
+    max_id = max(t["id"] for t in terrain_defs)
+    # Ids no definidos se comportan como Camino (mismo fallback que TERRAINS.get(t, Camino))
+    walk_player = [Camino.walkable_for_player] * (max_id+1)
+    walk_enemy = [Camino.walkable_for_enemy] * (max_id+1)
+    colors = [Camino.color] * (max_id+1)
+    spawn_ids, cum_weights = [], []
+    total = 0.0
+    for t in terrain_defs:
+        tid = t["id"]
+        # Terrenos conocidos heredan de su clase original; los nuevos de Terrain
+        base = BUILTIN_TERRAINS.get(tid, Terrain)
+        cls = type(t.get("name", base.name), (base,), {
+            "id": tid,
+            "name": t.get("name", base.name),
+            "walkable_for_player": bool(t.get("walkable_for_player", base.walkable_for_player)),
+            "walkable_for_enemy": bool(t.get("walkable_for_enemy", base.walkable_for_enemy)),
+            "color": tuple(int(v) for v in t.get("color", base.color)),
+            "blocks_sight": bool(t.get("blocks_sight", base.blocks_sight)),
+        })
+        terrains[tid] = cls
+        walk_player[tid] = cls.walkable_for_player
+        walk_enemy[tid] = cls.walkable_for_enemy
+        colors[tid] = cls.color
+        # Solo los terrenos con peso positivo participan en la generación
+        weight = float(t.get("spawn_weight", 0.0))
+        if weight > 0:
+            total += weight
+            spawn_ids.append(tid)
+            cum_weights.append(total)
+    # Normaliza los pesos acumulados a [0,1] para compararlos con random.random()
+    if total > 0:
+        cum_weights = [w/total for w in cum_weights]
+    else:
+        # Sin pesos definidos todas las celdas excavadas quedan como camino
+        spawn_ids, cum_weights = [0], [1.0]
+    return terrains, walk_player, walk_enemy, colors, spawn_ids, cum_weights
+
+def compile_difficulties(profiles):
+    # Perfiles de dificultad con num_enemies entero y enemy_speed numérico. Los inválidos se
+    # avisan y se omiten; si no queda ninguno se usan los perfiles por defecto.
+    valid = {}
+    for name, profile in profiles.items() if isinstance(profiles, dict) else ():
+        try:
+            valid[name] = {"num_enemies": int(profile.get("num_enemies", 4)),
+                           "enemy_speed": float(profile.get("enemy_speed", 1.0))}
+        except (AttributeError, TypeError, ValueError) as e:
+            print(f"config.json: dificultad {name!r} inválida, se omite:", e)
+    if not valid:
+        return dict(DEFAULT_CONFIG["difficulties"])
+    return valid
+
+def compile_trap_types(trap_defs):
+    # Crea los TrapType de la configuración. Una entrada inválida (campo desconocido, efecto
+    # no soportado, valor no numérico) se avisa por consola y se omite; si no queda ninguna
+    # se usan los tipos por defecto. El índice es la posición entre los tipos válidos.
+    types = {}
+    if not isinstance(trap_defs, dict):
+        print("config.json: trap_types debe ser un objeto {nombre: campos}, se usan los tipos por defecto")
+        trap_defs = {}
+    for name, fields in trap_defs.items():
+        try:
+            effect = fields.get("effect", "kill")
+            if effect not in ("kill", "slow"):
+                raise ValueError(f"efecto desconocido {effect!r}")
+            types[name] = TrapType(name, index=len(types), **fields)
+        except (TypeError, ValueError, AttributeError) as e:
+            print(f"config.json: tipo de trampa {name!r} inválido, se omite:", e)
+    if not types and trap_defs is not DEFAULT_CONFIG["trap_types"]:
+        return compile_trap_types(DEFAULT_CONFIG["trap_types"])
+    return types
+
+def apply_config(config):
+    # Compila la configuración y actualiza en sitio las tablas globales
+    terrains, walk_player, walk_enemy, colors, spawn_ids, cum_weights = compile_terrains(config["terrains"])
+    TERRAINS.clear()
+    TERRAINS.update(terrains)
+    TERRAIN_WALK_PLAYER[:] = walk_player
+    TERRAIN_WALK_ENEMY[:] = walk_enemy
+    TERRAIN_COLORS[:] = colors
+    TERRAIN_BLOCKS_SIGHT[:] = [TERRAINS.get(tid, Camino).blocks_sight for tid in range(len(colors))]
+    PLAYER_SPAWN_TYPES[:] = [tid for tid in terrains if walk_player[tid]]
+    ENEMY_SPAWN_TYPES[:] = [tid for tid in terrains if walk_enemy[tid]]
+    SPAWN_TERRAIN_IDS[:] = spawn_ids
+    SPAWN_CUM_WEIGHTS[:] = cum_weights
+    DIFFICULTIES.clear()
+    DIFFICULTIES.update(compile_difficulties(config["difficulties"]))
+    # load_config reemplaza claves enteras: un config.json que redefine "difficulties" hereda
+    # el "Normal" por defecto aunque ya no exista. Se usa entonces el primer perfil definido.
+    if config.get("default_difficulty") not in DIFFICULTIES:
+        config["default_difficulty"] = next(iter(DIFFICULTIES))
+    TRAP_TYPES.clear()
+    TRAP_TYPES.update(compile_trap_types(config["trap_types"]))
+    # El tipo por defecto debe existir (p. ej. si config.json redefine los tipos sin él)
+    if config.get("default_trap_type") not in TRAP_TYPES:
+        config["default_trap_type"] = next(iter(TRAP_TYPES))
+
+def get_config(path=CONFIG_FILE):
+    # Devuelve la configuración compilada; solo lee el archivo la primera vez
+    global _config_cache
+    if _config_cache is None:
+        _config_cache = load_config(path)
+        try:
+            apply_config(_config_cache)
+        except Exception as e:
+            # Último recurso ante una estructura inesperada: el módulo debe poder importarse
+            print("config.json inválido, se usa configuración por defecto:", e)
+            _config_cache = json.loads(json.dumps(DEFAULT_CONFIG))
+            apply_config(_config_cache)
+    return _config_cache
+
+# Compila la configuración al iniciar (una sola vez)
+get_config()
+
+# ----------------------------
+# Utilidades de mapa y generación
+# ----------------------------
+
+# Función que verifica si una celda (r,c) está dentro de los límites válidos del grid
+# (por defecto el de la ventana; los mapas cargados o grandes pasan su tamaño)
+def in_bounds(r,c, rows=GRID_ROWS, cols=GRID_COLS):
+    # Retorna True si fila y columna están dentro del rango permitido
+    return 0 <= r < rows and 0 <= c < cols
+
+# Generador que retorna vecinos ortogonales válidos (arriba, abajo, izquierda, derecha)
+def neighbors(r,c, rows=GRID_ROWS, cols=GRID_COLS):
+    # Recorre desplazamientos verticales y horizontales
+    for dr,dc in [(-1,0),(1,0),(0,-1),(0,1)]:
+        # Calcula nueva posición vecina
+        nr, nc = r+dr, c+dc
+        # Si el vecino está dentro del grid, se produce mediante yield
+        if in_bounds(nr,nc, rows, cols):
+            yield nr, nc
+
+# Función principal que genera un laberinto y añade terrenos especiales
+def generate_maze_with_features(seed=None, rows=None, cols=None) -> List[List[int]]:
+    # Con seed se usa un generador propio: la misma semilla produce el mismo mapa
+    # (se guarda junto a cada partida en el leaderboard). Sin seed usa el módulo random.
+    rng = random if seed is None else random.Random(seed)
+    # Tamaño del mapa (por defecto el de la ventana; mapas grandes para pruebas y benchmarks)
+    rows = GRID_ROWS if rows is None else rows
+    cols = GRID_COLS if cols is None else cols
+    # Crea una matriz llena de muros (1 = muro)
+    grid = [[1 for _ in range(cols)] for __ in range(rows)]
+
+    # Direcciones en saltos de 2 celdas (propio del maze generation), mezcladas para
+    # obtener laberintos distintos cada vez
+    def shuffled_dirs():
+        dirs = [(-2,0),(2,0),(0,-2),(0,2)]
+        rng.shuffle(dirs)
+        return dirs
+
+    # Determina celda inicial para el DFS, idealmente en posiciones impares del grid
+    sr = 1 if rows>2 else 0
+    sc = 1 if cols>2 else 0
+    # Marca celda inicial como camino
+    grid[sr][sc] = 0
+    # Excava el laberinto con un DFS iterativo (pila explícita: sin límite de recursión en
+    # mapas grandes). Cada marco es [fila, columna, direcciones, siguiente dirección]; las
+    # direcciones se mezclan al apilar, igual que la versión recursiva, así que una misma
+    # semilla sigue produciendo el mismo mapa.
+    stack = [[sr, sc, shuffled_dirs(), 0]]
+    while stack:
+        frame = stack[-1]
+        r, c, dirs, i = frame
+        # Ya probó las cuatro direcciones: retrocede
+        if i == 4:
+            stack.pop()
+            continue
+        frame[3] = i + 1
+        dr, dc = dirs[i]
+        # Nueva posición candidata
+        nr, nc = r+dr, c+dc
+        # Si está dentro del grid y la celda destino aún es muro → se puede excavar
+        if 0 <= nr < rows and 0 <= nc < cols and grid[nr][nc]==1:
+            # Abre la celda final al convertirla en camino
+            grid[nr][nc] = 0
+            # Abre también la celda intermedia para conectar túnel
+            grid[r+dr//2][c+dc//2] = 0
+            # Continúa el DFS desde la nueva celda
+            stack.append([nr, nc, shuffled_dirs(), 0])
+
+    # Tras el DFS, la matriz contiene un laberinto perfecto (0 caminos, 1 muros).
+    # Ahora se reemplazan algunos caminos por otros terrenos según los pesos de config.json.
+    cum_weights = SPAWN_CUM_WEIGHTS
+    spawn_ids = SPAWN_TERRAIN_IDS
+    last = len(spawn_ids) - 1
+    for r in range(rows):
+        for c in range(cols):
+            # Solo modificamos si la celda es camino
+            if grid[r][c] == 0:
+                # Se toma un valor aleatorio y se busca el terreno cuyo peso acumulado lo cubre
+                p = rng.random()
+                grid[r][c] = spawn_ids[min(bisect.bisect_right(cum_weights, p), last)]
+            else:
+                # Los muros permanecen como muros
+                grid[r][c] = 1
+
+    # No se seleccionan aquí salida ni inicio; solo se retorna el grid generado
+    return grid
+
+# Encuentra aleatoriamente una celda que pertenezca a un conjunto de tipos permitidos
+def find_random_cell_of_type(grid, allowed_types=[0], rng=random):
+    # Intentos aleatorios para encontrar una celda válida (rng permite resultados repetibles)
+    # dentro del tamaño del propio grid (los mapas cargados pueden no ser de GRID_ROWS x GRID_COLS)
+    rows, cols = len(grid), len(grid[0])
+    tries = 0
+    while tries < 1000:
+        # Selecciona una fila aleatoria
+        r = rng.randrange(rows)
+        # Selecciona una columna aleatoria
+        c = rng.randrange(cols)
+        # Verifica si la celda tiene un tipo permitido
+        if grid[r][c] in allowed_types:
+            return r,c
+        # Incrementa contador
+        tries += 1
+
+    # Si falló en modo aleatorio, recorre secuencialmente toda la matriz
+    for r in range(rows):
+        for c in range(cols):
+            # Retorna la primera celda compatible que encuentre
+            if grid[r][c] in allowed_types:
+                return r,c
+
+    # Si no se encuentra ninguna, se retorna un fallback (0,0)
+    return 0,0
+
+# ----------------------------
+# Pathfinding: BFS en terreno permitido
+# ----------------------------
+def bfs_shortest_path(grid, start, goal, for_enemy=True):
+    # Se crea una cola doble (deque) para implementar BFS
+    q = collections.deque()
+    # Se inicializa la cola con la posición inicial
+    q.append(start)
+
+    # Diccionario que almacena de dónde venimos para reconstruir el camino
+    prev = {start: None}
+
+    # Tabla de transitabilidad según si el BFS es para enemigo o para jugador
+    walkable = TERRAIN_WALK_ENEMY if for_enemy else TERRAIN_WALK_PLAYER
+
+    # Mientras haya nodos por explorar
+    while q:
+        cur = q.popleft()   # Se obtiene la posición actual desde el frente de la cola
+        # Si ya alcanzamos la meta, debemos reconstruir el camino
+        if cur == goal:
+            path = []   # Lista para guardar el camino
+            # Comenzamos desde la meta y seguimos los padres hacia atrás
+            node = cur
+            while node:
+                path.append(node)
+                node = prev[node]
+            path.reverse()  # Como se reconstruye al revés, se invierte
+            return path
+
+        # Extraemos fila y columna actual
+        r,c = cur
+
+        # Recorremos vecinos válidos 
+        for nr,nc in neighbors(r,c):
+            # Solo procesamos vecinos no visitados previamente
+            if (nr,nc) not in prev:
+                # Consultamos en la tabla si ese terreno es transitable
+                if walkable[grid[nr][nc]]:
+                    prev[(nr,nc)] = cur
+                    q.append((nr,nc))
+    # Si se agotó BFS (Busaqueda por amplitud) sin encontrar ruta, no hay camino posible
+    return None
+
+# ----------------------------
+# Pathfinding cooperativo de enemigos (campo de distancias + reservas)
+# ----------------------------
+# Coste extra por cada ruta de otro enemigo que ya pasa por una celda
+CONGESTION_WEIGHT = 1.5
+# Pasos de ruta que cada enemigo marca como ocupados al planificar (horizonte tipo WHCA*)
+PLAN_HORIZON = 8
+# Celdas a partir de las cuales la simulación persigue con HPA* (laberinto.hpa) en vez de
+# con campos de distancias sobre todo el mapa
+HPA_MIN_CELLS = 250_000
+
+def bfs_distance_field(grid, source, for_enemy=True, stop_at=None):
+    # BFS único desde source hacia todo el mapa; devuelve una lista plana (r*cols+c)
+    # con la distancia de cada celda a source, o -1 si no puede alcanzarla.
+    # Con stop_at=(r,c) se detiene en cuanto esa celda recibe su distancia.
+    rows, cols = len(grid), len(grid[0])
+    walkable = TERRAIN_WALK_ENEMY if for_enemy else TERRAIN_WALK_PLAYER
+    dist = [-1] * (rows*cols)
+    sr, sc = source
+    # Si nadie con estas reglas puede pisar source, ninguna celda lo alcanza
+    if not walkable[grid[sr][sc]]:
+        return dist
+    start = sr*cols + sc
+    stop = -1 if stop_at is None else stop_at[0]*cols + stop_at[1]
+    dist[start] = 0
+    q = collections.deque([start])
+    while q:
+        idx = q.popleft()
+        if idx == stop:
+            break
+        r, c = divmod(idx, cols)
+        nd = dist[idx] + 1
+        # Vecinos ortogonales (mismo orden que neighbors) sin crear tuplas
+        if r > 0 and dist[idx-cols] < 0 and walkable[grid[r-1][c]]:
+            dist[idx-cols] = nd
+            q.append(idx-cols)
+        if r < rows-1 and dist[idx+cols] < 0 and walkable[grid[r+1][c]]:
+            dist[idx+cols] = nd
+            q.append(idx+cols)
+        if c > 0 and dist[idx-1] < 0 and walkable[grid[r][c-1]]:
+            dist[idx-1] = nd
+            q.append(idx-1)
+        if c < cols-1 and dist[idx+1] < 0 and walkable[grid[r][c+1]]:
+            dist[idx+1] = nd
+            q.append(idx+1)
+    return dist
+
+def plan_enemy_moves(grid, positions, movers, goal, dist=None, goals=None):
+    # Planifica en una sola pasada el siguiente paso de varios enemigos hacia goal.
+    # positions: celdas de todos los enemigos vivos; movers: índices que se mueven este tick.
+    # dist: campo opcional indexable por celda plana (lista o DistanceOracle.field).
+    # goals: opcional {índice: campo} para enemigos con objetivo propio (patrulla,
+    # última posición vista); comparten reservas y congestión con el resto.
+    # Retorna {índice: nueva celda}. Usa un solo campo de distancias (en vez de un BFS
+    # por enemigo), una tabla de reservas para que dos enemigos no terminen en la misma
+    # celda y un coste de congestión para repartirlos por rutas alternativas.
+    rows, cols = len(grid), len(grid[0])
+    goals = goals or {}
+    if dist is None and any(i not in goals for i in movers):
+        dist = bfs_distance_field(grid, goal, for_enemy=True)
+    goal_idx = goal[0]*cols + goal[1]
+    # Tabla de reservas: cuántos enemigos ocupan cada celda al final del tick
+    reserved = collections.Counter(r*cols + c for r, c in positions)
+    # Cuántas rutas ya planificadas pasan por cada celda
+    usage = collections.Counter()
+    moves = {}
+    # Primero planifican los más cercanos (son los que marcan las rutas principales);
+    # los que no tienen ruta (-1) van al final
+    def plan_order(i):
+        d = goals.get(i, dist)[positions[i][0]*cols + positions[i][1]]
+        return d if d >= 0 else rows*cols
+    order = sorted(movers, key=plan_order)
+
+    def route(node, field):
+        # Ruta prevista desde node (sin incluirlo): hasta PLAN_HORIZON pasos bajando por el
+        # campo y eligiendo en cada paso la celda por la que pasan menos rutas
+        for _ in range(PLAN_HORIZON):
+            if field[node] <= 0:
+                return
+            nr0, nc0 = divmod(node, cols)
+            nxt = None
+            for nr, nc in neighbors(nr0, nc0, rows, cols):
+                n = nr*cols + nc
+                if field[n] == field[node] - 1 and (nxt is None or usage[n] < usage[nxt]):
+                    nxt = n
+            yield nxt
+            node = nxt
+
+    for i in order:
+        # Campo de distancias hacia el objetivo de este enemigo
+        field = goals.get(i, dist)
+        r, c = positions[i]
+        cur = r*cols + c
+        dcur = field[cur]
+        # Sin ruta hacia el objetivo: se queda quieto
+        if dcur <= 0:
+            moves[i] = (r, c)
+            continue
+        # Elige entre los vecinos libres que acercan al objetivo el de ruta menos congestionada
+        # (las rutas ya planificadas marcan celdas más adelante, así que se mira la ruta entera)
+        best, best_cost = cur, None
+        for nr, nc in neighbors(r, c, rows, cols):
+            n = nr*cols + nc
+            if field[n] != dcur - 1:
+                continue
+            # La celda del jugador nunca se reserva (varios pueden atraparlo a la vez)
+            if reserved[n] and n != goal_idx:
+                continue
+            cost = field[n] + CONGESTION_WEIGHT*(usage[n] + sum(usage[m] for m in route(n, field)))
+            if best_cost is None or cost < best_cost:
+                best, best_cost = n, cost
+        # Actualiza reservas con la celda elegida (o se queda esperando)
+        reserved[cur] -= 1
+        reserved[best] += 1
+        moves[i] = divmod(best, cols)
+        # Marca la ruta prevista desde la celda elegida para penalizarla a los siguientes
+        for m in list(route(best, field)):
+            usage[m] += 1
+    return moves
+
+# ----------------------------
+# Oráculo de distancias por camino transitable
+# ----------------------------
+# Máximo de celdas transitables para guardar distancias exactas entre todos los pares
+ORACLE_EXACT_MAX_CELLS = 1500
+# Número de landmarks (puntos de referencia ALT) para mapas grandes
+ORACLE_LANDMARKS = 8
+# Valor uint16 que representa "inalcanzable"
+ORACLE_INF = 0xFFFF
+# Distancia mínima (en pasos de enemigo) entre un enemigo que aparece y el jugador
+SPAWN_MIN_DISTANCE = 6
+# Distancia mínima (en pasos de jugador) entre el inicio y la salida
+MIN_EXIT_DISTANCE = 10
+
+class _OracleField:
+    # Vista de las distancias hacia una celda fija, indexable por celda plana (r*cols+c).
+    # Devuelve -1 si no hay camino, igual que bfs_distance_field.
+    __slots__ = ("oracle", "target")
+
+    def __init__(self, oracle, target):
+        self.oracle = oracle
+        self.target = target
+
+    def __getitem__(self, idx):
+        d = self.oracle.distance_idx(idx, self.target)
+        return -1 if d is None else d
+
+class DistanceOracle:
+    # Responde "¿a cuántos pasos transitables está A de B?" para un mapa concreto.
+    # Mapas pequeños: tabla exacta de todos los pares en uint16 (las filas se rellenan con
+    # un BFS la primera vez que se consultan y después son búsquedas O(1)).
+    # Mapas grandes: cotas inferiores por landmarks (ALT) y A* como respaldo.
+    def __init__(self, grid, for_enemy=True, exact_max_cells=ORACLE_EXACT_MAX_CELLS, num_landmarks=ORACLE_LANDMARKS):
+        self.grid = grid
+        self.for_enemy = for_enemy
+        self.rows, self.cols = len(grid), len(grid[0])
+        walkable = TERRAIN_WALK_ENEMY if for_enemy else TERRAIN_WALK_PLAYER
+        # Celdas transitables (índices planos) y su índice compacto en las tablas
+        self.cells = array('i', (r*self.cols + c for r in range(self.rows) for c in range(self.cols) if walkable[grid[r][c]]))
+        self.index = array('i', [-1]) * (self.rows*self.cols)
+        for i, idx in enumerate(self.cells):
+            self.index[idx] = i
+        self.n = len(self.cells)
+        self.exact = self.n <= exact_max_cells
+        if self.exact:
+            # Tabla n*n de distancias y marca de filas ya calculadas
+            self.table = array('H', [ORACLE_INF]) * (self.n*self.n)
+            self.row_done = bytearray(self.n)
+            self.landmarks = []
+        else:
+            self.table = None
+            self.row_done = None
+            self.component = self._label_components()
+            self.landmarks = self._pick_landmarks(num_landmarks)
+
+    # BFS sobre índices compactos; devuelve las distancias desde src en un array uint16
+    def _bfs(self, src):
+        n, cols, rows = self.n, self.cols, self.rows
+        cells, index = self.cells, self.index
+        dist = array('H', [ORACLE_INF]) * n
+        dist[src] = 0
+        q = collections.deque([src])
+        while q:
+            i = q.popleft()
+            idx = cells[i]
+            r, c = divmod(idx, cols)
+            nd = dist[i] + 1
+            for nidx, ok in ((idx-cols, r > 0), (idx+cols, r < rows-1), (idx-1, c > 0), (idx+1, c < cols-1)):
+                if ok:
+                    j = index[nidx]
+                    if j >= 0 and dist[j] == ORACLE_INF:
+                        dist[j] = nd
+                        q.append(j)
+        return dist
+
+    # Etiqueta de componente conexa de cada índice compacto: dos celdas de componentes
+    # distintas no tienen camino aunque ningún landmark caiga en ellas
+    def _label_components(self):
+        n, cols, rows = self.n, self.cols, self.rows
+        cells, index = self.cells, self.index
+        label = array('i', [-1]) * n
+        for first in range(n):
+            if label[first] >= 0:
+                continue
+            label[first] = first
+            stack = [first]
+            while stack:
+                i = stack.pop()
+                idx = cells[i]
+                r, c = divmod(idx, cols)
+                for nidx, ok in ((idx-cols, r > 0), (idx+cols, r < rows-1), (idx-1, c > 0), (idx+1, c < cols-1)):
+                    if ok:
+                        j = index[nidx]
+                        if j >= 0 and label[j] < 0:
+                            label[j] = first
+                            stack.append(j)
+        return label
+
+    # Calcula (una sola vez) la fila de distancias exactas desde el índice compacto i
+    def _ensure_row(self, i):
+        if not self.row_done[i]:
+            n = self.n
+            self.table[i*n:(i+1)*n] = self._bfs(i)
+            self.row_done[i] = 1
+
+    # Elige landmarks por "punto más lejano" y guarda sus distancias a todas las celdas
+    def _pick_landmarks(self, k):
+        landmarks = []
+        if self.n == 0:
+            return landmarks
+        # min_d[i]: distancia del nodo i al landmark más cercano ya elegido
+        min_d = array('H', [ORACLE_INF]) * self.n
+        current = random.randrange(self.n)
+        for _ in range(k):
+            dist = self._bfs(current)
+            landmarks.append(dist)
+            best, best_d = None, -1
+            for i in range(self.n):
+                if dist[i] < min_d[i]:
+                    min_d[i] = dist[i]
+                # Los inalcanzables (INF) también cuentan: cubren otras componentes
+                if min_d[i] > best_d:
+                    best, best_d = i, min_d[i]
+            if best_d <= 0:
+                break
+            current = best
+        return landmarks
+
+    # Distancia entre celdas planas; None si no hay camino (o alguna no es transitable)
+    def distance_idx(self, a, b):
+        ia, ib = self.index[a], self.index[b]
+        if ia < 0 or ib < 0:
+            return None
+        if self.exact:
+            # El grafo es no dirigido: sirve la fila de cualquiera de los dos extremos
+            if not self.row_done[ia]:
+                if self.row_done[ib]:
+                    ia, ib = ib, ia
+                else:
+                    self._ensure_row(ia)
+            d = self.table[ia*self.n + ib]
+            return None if d == ORACLE_INF else d
+        return self._astar(ia, ib)
+
+    def distance(self, a, b):
+        # Distancia entre celdas (r,c); None si no hay camino
+        return self.distance_idx(a[0]*self.cols + a[1], b[0]*self.cols + b[1])
+
+    # Cota inferior de la distancia (exacta en mapas pequeños); ORACLE_INF si no hay camino
+    def lower_bound(self, a, b):
+        ia, ib = self.index[a[0]*self.cols + a[1]], self.index[b[0]*self.cols + b[1]]
+        if ia < 0 or ib < 0:
+            return ORACLE_INF
+        if self.exact:
+            d = self.distance_idx(a[0]*self.cols + a[1], b[0]*self.cols + b[1])
+            return ORACLE_INF if d is None else d
+        return self._alt_bound(ia, ib)
+
+    def _alt_bound(self, ia, ib):
+        # Desigualdad triangular: |d(L,a) - d(L,b)| <= d(a,b) para cada landmark L
+        if self.component[ia] != self.component[ib]:
+            return ORACLE_INF
+        best = 0
+        for dist in self.landmarks:
+            da, db = dist[ia], dist[ib]
+            # Misma componente: o los dos alcanzan al landmark o ninguno
+            if da != ORACLE_INF:
+                diff = da - db if da > db else db - da
+                if diff > best:
+                    best = diff
+        return best
+
+    # A* con heurística ALT (solo en modo landmarks)
+    def _astar(self, src, dst):
+        if src == dst:
+            return 0
+        h0 = self._alt_bound(src, dst)
+        if h0 == ORACLE_INF:
+            return None
+        cols, rows, cells, index = self.cols, self.rows, self.cells, self.index
+        g = {src: 0}
+        heap = [(h0, 0, src)]
+        while heap:
+            f, gi, i = heapq.heappop(heap)
+            if i == dst:
+                return gi
+            if gi > g.get(i, ORACLE_INF):
+                continue
+            idx = cells[i]
+            r, c = divmod(idx, cols)
+            for nidx, ok in ((idx-cols, r > 0), (idx+cols, r < rows-1), (idx-1, c > 0), (idx+1, c < cols-1)):
+                if ok:
+                    j = index[nidx]
+                    if j >= 0 and gi+1 < g.get(j, ORACLE_INF):
+                        g[j] = gi+1
+                        heapq.heappush(heap, (gi+1 + self._alt_bound(j, dst), gi+1, j))
+        return None
+
+    def field(self, target):
+        # Campo de distancias hacia target usable por plan_enemy_moves (búsquedas O(1))
+        idx = target[0]*self.cols + target[1]
+        # En modo exacto se rellena la fila del objetivo: así todas las consultas del
+        # campo la reutilizan en vez de lanzar un BFS por cada celda consultada
+        if self.exact and self.index[idx] >= 0:
+            self._ensure_row(self.index[idx])
+        return _OracleField(self, idx)
+
+    def farthest_from(self, cell):
+        # Celda alcanzable más lejana desde cell y su distancia ((r,c), d); None si cell no es transitable
+        i = self.index[cell[0]*self.cols + cell[1]]
+        if i < 0:
+            return None
+        if self.exact:
+            self._ensure_row(i)
+            row = self.table[i*self.n:(i+1)*self.n]
+        else:
+            row = self._bfs(i)
+        best, best_d = i, 0
+        for j, d in enumerate(row):
+            if d != ORACLE_INF and d > best_d:
+                best, best_d = j, d
+        return divmod(self.cells[best], self.cols), best_d
+
+    def memory_bytes(self):
+        # Memoria usada por las tablas del oráculo (para informes y depuración)
+        total = self.cells.itemsize*len(self.cells) + self.index.itemsize*len(self.index)
+        if self.exact:
+            total += self.table.itemsize*len(self.table) + len(self.row_done)
+        else:
+            total += self.component.itemsize*len(self.component)
+        total += sum(d.itemsize*len(d) for d in self.landmarks)
+        return total
+
+    def __repr__(self):
+        mode = "exacto" if self.exact else f"ALT({len(self.landmarks)} landmarks)"
+        return f"DistanceOracle({mode}, celdas={self.n}, memoria={self.memory_bytes()/1024:.1f} KiB)"
+
+# Intentos de inicio por mapa antes de generar otro (la salida queda demasiado cerca)
+MAX_START_ATTEMPTS = 8
+
+def build_level(seed=None, rng=random, grid=None):
+    # Genera un mapa y elige inicio del jugador y salida: la salida es la celda alcanzable
+    # más lejana (por camino real) desde el inicio; si queda a menos de MIN_EXIT_DISTANCE se
+    # prueba otro inicio y, tras MAX_START_ATTEMPTS intentos, otro mapa con semilla nueva.
+    # Con grid se parte de un mapa ya hecho (p. ej. cargado de disco) en vez de generarlo;
+    # ese mapa nunca se reemplaza: si no tiene inicio y salida válidos lanza ValueError.
+    # Retorna (seed, grid, oráculo del jugador, inicio, salida, estadísticas de reintentos).
+    given = grid is not None
+    if grid is None:
+        if seed is None:
+            seed = rng.randrange(2**31)
+        grid = generate_maze_with_features(seed)
+    # Oráculo de distancias con las reglas de movimiento del jugador
+    oracle = DistanceOracle(grid, for_enemy=False)
+    start = find_random_cell_of_type(grid, allowed_types=PLAYER_SPAWN_TYPES, rng=rng)
+    stats = {"start_retries": 0, "regenerations": 0}
+    attempts = 0
+    while True:
+        far = oracle.farthest_from(start)
+        if far is not None and far[1] >= MIN_EXIT_DISTANCE:
+            return seed, grid, oracle, start, far[0], stats
+        attempts += 1
+        stats["start_retries"] += 1
+        if attempts > MAX_START_ATTEMPTS:
+            if given:
+                raise ValueError(f"sin inicio y salida a {MIN_EXIT_DISTANCE}+ pasos tras {attempts} intentos")
+            # Forzar nueva generación de mapa (y su oráculo)
+            seed = rng.randrange(2**31)
+            grid = generate_maze_with_features(seed)
+            oracle = DistanceOracle(grid, for_enemy=False)
+            stats["regenerations"] += 1
+            attempts = 0
+        # Cambia la celda de inicio por otra aleatoria y vuelve a verificar
+        start = find_random_cell_of_type(grid, allowed_types=PLAYER_SPAWN_TYPES, rng=rng)
+
+# ----------------------------
+# Percepción de los enemigos (línea de visión y memoria)
+# ----------------------------
+# Alcance de la visión de los enemigos en celdas (distancia euclídea)
+VISION_RANGE = 7
+# Coseno del semiángulo del cono de visión (0.5 = cono de 120 grados)
+VISION_CONE_COS = 0.5
+# Distancia a la que un enemigo nota al jugador aunque quede fuera de su cono
+VISION_NEAR = 1.5
+# Segundos que un enemigo recuerda la última posición donde vio al jugador
+MEMORY_TIME = 6.0
+# Máximo de celdas del jugador con visibilidad guardada (caché LRU)
+VISION_CACHE_MAX = 4096
+# Puntos de patrulla por mapa (los enemigos que no saben dónde está el jugador los recorren;
+# al ser pocos, sus filas de distancias se calculan una vez y se reutilizan)
+PATROL_POINTS = 8
+
+def bresenham_line(r0, c0, r1, c1):
+    # Celdas de la recta entre (r0,c0) y (r1,c1) con el algoritmo de Bresenham (extremos incluidos)
+    cells = []
+    dr, dc = abs(r1-r0), abs(c1-c0)
+    sr = 1 if r1 > r0 else -1
+    sc = 1 if c1 > c0 else -1
+    err = dc - dr
+    r, c = r0, c0
+    while True:
+        cells.append((r, c))
+        if r == r1 and c == c1:
+            break
+        e2 = 2*err
+        if e2 > -dr:
+            err -= dr
+            c += sc
+        if e2 < dc:
+            err += dc
+            r += sr
+    return cells
+
+# Rayos relativos precalculados por alcance de visión (compartidos por todos los mapas)
+_rays_cache: Dict[float, List] = {}
+
+def vision_rays(vision_range):
+    # Lista de (dr, dc, celdas intermedias relativas) dentro del alcance
+    rays = _rays_cache.get(vision_range)
+    if rays is None:
+        reach = int(vision_range)
+        rays = []
+        for dr in range(-reach, reach+1):
+            for dc in range(-reach, reach+1):
+                if (dr or dc) and dr*dr + dc*dc <= vision_range*vision_range:
+                    rays.append((dr, dc, bresenham_line(0, 0, dr, dc)[1:-1]))
+        _rays_cache[vision_range] = rays
+    return rays
+
+class VisibilityCache:
+    # Para cada celda del jugador, conjunto de celdas (índice plano) desde las que se le ve
+    # dentro de VISION_RANGE. Las rectas de Bresenham solo dependen del desplazamiento, así
+    # que se precalculan una vez como rayos relativos; cada celda del jugador se resuelve
+    # una sola vez y se guarda en una caché LRU (se recalcula solo al cambiar de celda).
+    def __init__(self, grid, vision_range=VISION_RANGE, max_entries=VISION_CACHE_MAX):
+        self.grid = grid
+        self.rows, self.cols = len(grid), len(grid[0])
+        self.max_entries = max_entries
+        # Rayos precalculados: (dr, dc, celdas intermedias relativas)
+        self.rays = vision_rays(vision_range)
+        # Celda plana del jugador -> frozenset de celdas que lo ven
+        self._cache = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def visible_from(self, r, c):
+        # Celdas con línea de visión hacia (r,c) dentro del alcance
+        key = r*self.cols + c
+        vis = self._cache.get(key)
+        if vis is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return vis
+        self.misses += 1
+        grid, rows, cols = self.grid, self.rows, self.cols
+        blocks = TERRAIN_BLOCKS_SIGHT
+        seen = {key}
+        for dr, dc, mid in self.rays:
+            tr, tc = r+dr, c+dc
+            if not (0 <= tr < rows and 0 <= tc < cols):
+                continue
+            # El rayo se corta en la primera celda que tapa la visión
+            for mr, mc in mid:
+                if blocks[grid[r+mr][c+mc]]:
+                    break
+            else:
+                seen.add(tr*cols + tc)
+        vis = frozenset(seen)
+        self._cache[key] = vis
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return vis
+
+class Player:
+    def __init__(self, r, c, name="Player"):
+        # Posición de la celda del jugador
+        self.r = r
+        self.c = c
+        # Posición en el tick de lógica anterior (para interpolar el dibujado)
+        self.prev_r = r
+        self.prev_c = c
+        # Nombre del jugador
+        self.name = name
+
+        # Energía actual y máxima del jugador
+        self.energy = 100.0
+        self.max_energy = 100.0
+
+        # Coste por segundo de usar sprint
+        self.sprint_cost = 25.0
+        # Velocidad al hacer sprint (tiles por tick)
+        self.sprint_speed = 2
+        # Velocidad normal del jugador
+        self.base_speed = 1
+
+        # Bandera que indica si el jugador está esprintando
+        self.sprinting = False
+
+        # Número de trampas que puede colocar
+        self.traps_available = 3
+        # Tiempo mínimo entre colocaciones
+        self.trap_cooldown = 5.0
+        # Última vez en que colocó una trampa
+        self.last_trap_time = -999.0
+
+        # Puntuación acumulada
+        self.score = 0
+
+        # Estado de vida (para terminar juego)
+        self.alive = True
+
+    # Determina si el jugador puede o no colocar una trampa
+    def can_place_trap(self, now, active_traps_count):
+        # Limitación: máximo MAX_TRAPS trampas activas simultáneamente
+        if active_traps_count >= MAX_TRAPS:
+            return False
+        # Limitación de cooldown entre uso
+        if now - self.last_trap_time < self.trap_cooldown:
+            return False
+        # Si pasó el cooldown y no hay exceso de trampas, puede colocar
+        return True
+
+class Enemy:
+    def __init__(self, r, c, id_=0):
+        # Posición del enemigo
+        self.r = r
+        self.c = c
+        # Posición en el tick de lógica anterior (para interpolar el dibujado)
+        self.prev_r = r
+        self.prev_c = c
+        # ID para distinguir enemigos
+        self.id = id_
+
+        # Si está vivo (puede morir por trampas)
+        self.alive = True
+
+        # Cuando muere se programa un respawn (segundos en el futuro)
+        self.respawn_time = None
+
+        # Velocidad del enemigo en tiles por tick
+        self.speed = 1
+
+        # Enemigos se mueven cada cierto tiempo (cooldown en segundos)
+        self.move_cooldown = 1.0
+
+        # Última vez que se movió (tiempo de simulación; negativo = puede moverse ya)
+        self.last_move = -999.0
+
+        # Si lo controla una persona (servidor en red), la IA no lo mueve
+        self.controlled = False
+
+        # Ralentización por trampa: multiplicador del cooldown y hasta cuándo dura
+        self.slow_factor = 1.0
+        self.slow_until = -1.0
+
+        # Percepción: dirección a la que mira ((0,0) = mira a todos lados),
+        # si ve al jugador este tick y última posición vista (con su instante)
+        self.facing = (0, 0)
+        self.sees_player = False
+        self.last_seen: Optional[Tuple[int,int]] = None
+        self.last_seen_time = -999.0
+        # Celda hacia la que patrulla cuando no sabe dónde está el jugador
+        self.patrol_target: Optional[Tuple[int,int]] = None
+
+    # Retorna la posición como tupla (r,c)
+    def as_tuple(self):
+        return (self.r, self.c)
+
+class Trap:
+    def __init__(self, r,c, placed_time, ttype=None):
+        # Trampa colocada en una celda específica
+        self.r = r
+        self.c = c
+        # Momento exacto en que fue puesta (para expiración)
+        self.placed_time = placed_time
+        # Tipo de trampa (efecto, radio, duración)
+        self.type: Optional[TrapType] = ttype
+        # Celdas que cubre según su radio (las rellena TrapManager)
+        self.cells: List[Tuple[int,int]] = []
+        # Posición en la lista de activas (-1 = inactiva / en el pool)
+        self.slot = -1
+        # Generación: invalida entradas viejas del heap cuando la trampa se recicla
+        self.gen = 0
+        # Ids de los enemigos que ya ralentizó (cada uno solo una vez por trampa)
+        self.affected = set()
+
+class TrapManager:
+    # Trampas activas con expiración por heap de tiempos, pool de objetos reutilizables
+    # e índice por celda para consultar en O(1) si una celda tiene trampa.
+    def __init__(self):
+        # Trampas activas (orden sin importancia; se borran intercambiando con la última)
+        self.active: List[Trap] = []
+        # Celda -> trampas que la cubren
+        self.by_cell: Dict[Tuple[int,int], List[Trap]] = {}
+        # Heap de (instante de expiración, secuencia, generación, trampa)
+        self._heap = []
+        self._seq = 0
+        # Trampas retiradas listas para reutilizar
+        self._pool: List[Trap] = []
+
+    def __len__(self):
+        return len(self.active)
+
+    def __iter__(self):
+        return iter(self.active)
+
+    def place(self, r, c, now, ttype, grid):
+        # Activa una trampa (reutilizada del pool si hay) y la indexa en sus celdas
+        t = self._pool.pop() if self._pool else Trap(r, c, now)
+        t.r, t.c, t.placed_time, t.type = r, c, now, ttype
+        t.cells = [(r, c)]
+        t.affected.clear()
+        # Celdas extra dentro del radio que los enemigos pueden pisar
+        for dr in range(-ttype.radius, ttype.radius+1):
+            span = ttype.radius - abs(dr)
+            for dc in range(-span, span+1):
+                nr, nc = r+dr, c+dc
+                if (dr or dc) and in_bounds(nr, nc) and TERRAIN_WALK_ENEMY[grid[nr][nc]]:
+                    t.cells.append((nr, nc))
+        for cell in t.cells:
+            self.by_cell.setdefault(cell, []).append(t)
+        t.slot = len(self.active)
+        self.active.append(t)
+        if ttype.duration is not None:
+            self._seq += 1
+            heapq.heappush(self._heap, (now + ttype.duration, self._seq, t.gen, t))
+        return t
+
+    def remove(self, t):
+        # Desactiva la trampa en O(1) (intercambio con la última) y la devuelve al pool
+        if t.slot < 0:
+            return
+        last = self.active.pop()
+        if last is not t:
+            self.active[t.slot] = last
+            last.slot = t.slot
+        for cell in t.cells:
+            lst = self.by_cell[cell]
+            lst.remove(t)
+            if not lst:
+                del self.by_cell[cell]
+        t.slot = -1
+        # Las entradas del heap de esta trampa dejan de ser válidas
+        t.gen += 1
+        self._pool.append(t)
+
+    def expire(self, now):
+        # Retira las trampas cuyo tiempo venció (O(1) si no vence ninguna)
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, _, gen, t = heapq.heappop(heap)
+            if t.gen == gen:
+                self.remove(t)
+
+    def all_at(self, r, c):
+        # Todas las trampas que cubren la celda (copia: activarlas puede retirarlas)
+        lst = self.by_cell.get((r, c))
+        return tuple(lst) if lst else ()
+
+    def clear(self):
+        # Retira todas las trampas (quedan en el pool para la siguiente partida)
+        for t in list(self.active):
+            self.remove(t)
+        self._heap.clear()
+
+# ----------------------------
+# Manejo de puntuacion
+# ----------------------------
+def load_scores(path=SCORES_FILE):
+    # Verifica si existe el archivo de puntajes
+    if os.path.exists(path):
+        try:
+            # Intenta cargarlo y devolver su contenido dict
+            with open(path,"r") as f:
+                return json.load(f)
+        except Exception:
+            pass
+    # Si no existe o falla lectura, crea estructura base con dos modos
+    # "escapa" y "cazador" cada uno con una lista de puntajes
+    return {"escapa": [], "cazador": []}
+
+# Base de datos SQLite con el historial completo de partidas
+LEADERBOARD_FILE = "scores.db"
+# Modos con ranking propio
+MODES = ("escapa", "cazador")
+# Cuántas posiciones se muestran en el HUD por modo
+HUD_TOP = 5
+
+# Tabla de partidas e índices: (mode, score DESC, id) sirve top-N y paginación en orden;
+# (player, mode, score DESC) sirve la mejor marca personal con una sola búsqueda
+LEADERBOARD_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    difficulty TEXT,
+    seed INTEGER,
+    duration REAL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_mode_score ON runs(mode, score DESC, id);
+CREATE INDEX IF NOT EXISTS idx_runs_player_mode_score ON runs(player, mode, score DESC);
+"""
+
+class Leaderboard:
+    # Historial de todas las partidas por jugador y modo (con dificultad y semilla del mapa).
+    # Top-N, paginación y mejor marca personal salen de los índices de SQLite (O(log n) más
+    # las filas devueltas); el puesto de una puntuación se calcula con bisect sobre un array
+    # ordenado de puntuaciones por modo que se carga la primera vez que se pide y después se
+    # mantiene al insertar. top_cache guarda el top del HUD para no consultar cada cuadro.
+    def __init__(self, path=LEADERBOARD_FILE, legacy_file=SCORES_FILE):
+        # sqlite3 se importa aquí: solo se necesita tras el primer cuadro del menú
+        import sqlite3
+        self.path = path
+        self.db = sqlite3.connect(path)
+        # WAL + synchronous NORMAL: cada partida guardada es un commit barato
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(LEADERBOARD_SCHEMA)
+        # Puntuaciones ordenadas (ascendente) por modo para calcular puestos con bisect
+        self._sorted: Dict[str, array] = {}
+        # Top del HUD por modo (misma forma que el antiguo scores.json)
+        self.top_cache: Dict[str, List[Dict]] = {}
+        # Primera apertura: importa el top 5 guardado en scores.json
+        if self.db.execute("PRAGMA user_version").fetchone()[0] == 0:
+            self._migrate(legacy_file)
+        for mode in MODES:
+            self._refresh_top(mode)
+
+    def _migrate(self, legacy_file):
+        # Copia las puntuaciones de scores.json (sin dificultad ni semilla) una sola vez
+        if legacy_file:
+            legacy = load_scores(legacy_file)
+            now = time.time()
+            rows = [(e["name"], mode, int(e["score"]), now)
+                    for mode, entries in legacy.items() for e in entries]
+            self.db.executemany("INSERT INTO runs (player, mode, score, created) VALUES (?,?,?,?)", rows)
+        self.db.execute("PRAGMA user_version = 1")
+        self.db.commit()
+
+    def _refresh_top(self, mode):
+        self.top_cache[mode] = self.top(mode, HUD_TOP)
+
+    def _scores_index(self, mode):
+        # Array ordenado de puntuaciones del modo (se lee del índice ya ordenado)
+        idx = self._sorted.get(mode)
+        if idx is None:
+            cur = self.db.execute("SELECT score FROM runs WHERE mode=? ORDER BY score", (mode,))
+            idx = array('q', (row[0] for row in cur))
+            self._sorted[mode] = idx
+        return idx
+
+    def record(self, player, mode, score, difficulty=None, seed=None, duration=None):
+        # Guarda una partida y actualiza el índice de puestos y el top del HUD; devuelve su id
+        score = int(score)
+        cur = self.db.execute(
+            "INSERT INTO runs (player, mode, score, difficulty, seed, duration, created) VALUES (?,?,?,?,?,?,?)",
+            (player, mode, score, difficulty, seed, duration, time.time()))
+        self.db.commit()
+        if mode in self._sorted:
+            bisect.insort(self._sorted[mode], score)
+        top = self.top_cache.get(mode, [])
+        # Solo entra al top si supera al último (los empates quedan detrás de los anteriores)
+        if len(top) < HUD_TOP or score > top[-1]["score"]:
+            self._refresh_top(mode)
+        return cur.lastrowid
+
+    def top(self, mode, limit=10, after=None):
+        # Mejores partidas del modo; after=(score, id) de la última fila de la página anterior
+        # (paginación por clave: cada página cuesta lo mismo sin importar su profundidad)
+        if after is None:
+            cur = self.db.execute(
+                "SELECT id, player, score, difficulty, seed FROM runs WHERE mode=? "
+                "ORDER BY score DESC, id LIMIT ?", (mode, limit))
+        else:
+            score, run_id = after
+            cur = self.db.execute(
+                "SELECT id, player, score, difficulty, seed FROM runs WHERE mode=? "
+                "AND score <= ? AND NOT (score = ? AND id <= ?) ORDER BY score DESC, id LIMIT ?",
+                (mode, score, score, run_id, limit))
+        return [{"id": i, "name": p, "score": sc, "difficulty": d, "seed": sd} for i, p, sc, d, sd in cur]
+
+    def rank(self, mode, score):
+        # Puesto que ocuparía score en el modo (1 = mejor); empates comparten puesto
+        idx = self._scores_index(mode)
+        return len(idx) - bisect.bisect_right(idx, score) + 1
+
+    def count(self, mode):
+        # Partidas guardadas del modo
+        return len(self._scores_index(mode))
+
+    def personal_best(self, player, mode):
+        # Mejor puntuación del jugador en el modo (None si no tiene partidas)
+        row = self.db.execute(
+            "SELECT score FROM runs WHERE player=? AND mode=? ORDER BY score DESC LIMIT 1",
+            (player, mode)).fetchone()
+        return row[0] if row else None
+
+    def history(self, player, mode=None, limit=20):
+        # Últimas partidas del jugador (todas o de un modo), de la más reciente a la más antigua
+        if mode is None:
+            cur = self.db.execute(
+                "SELECT mode, score, difficulty, seed, duration, created FROM runs WHERE player=? "
+                "ORDER BY id DESC LIMIT ?", (player, limit))
+        else:
+            cur = self.db.execute(
+                "SELECT mode, score, difficulty, seed, duration, created FROM runs WHERE player=? AND mode=? "
+                "ORDER BY id DESC LIMIT ?", (player, mode, limit))
+        keys = ("mode", "score", "difficulty", "seed", "duration", "created")
+        return [dict(zip(keys, row)) for row in cur]
+
+    def close(self):
+        self.db.close()
+
+# ----------------------------
+# Eventos de juego y telemetría
+# ----------------------------
+# Códigos de evento (enteros: publicar no crea diccionarios ni cadenas)
+EV_GAME_START = 1      # r: modo (índice en MODES), v: semilla del mapa
+EV_GAME_END = 2        # r: 1 si ganó, v: puntos finales
+EV_TRAP_PLACED = 3     # r,c: celda, v: tipo de trampa (TrapType.index)
+EV_ENEMY_TRAPPED = 4   # r,c: celda, v: id del enemigo muerto por trampa
+EV_ENEMY_SLOWED = 5    # r,c: celda, v: id del enemigo ralentizado
+EV_PLAYER_CAUGHT = 6   # r,c: celda, v: id del enemigo que atrapó al jugador
+EV_ENEMY_CAUGHT = 7    # r,c: celda, v: id del enemigo atrapado (modo cazador)
+EV_ENEMY_EXITED = 8    # r,c: salida, v: id del enemigo que llegó a la salida (modo cazador)
+EV_PLAYER_ESCAPED = 9  # r,c: salida alcanzada por el jugador
+EV_SCORE = 10          # v: puntuación del jugador tras el cambio
+EVENT_NAMES = {
+    EV_GAME_START: "game_start", EV_GAME_END: "game_end", EV_TRAP_PLACED: "trap_placed",
+    EV_ENEMY_TRAPPED: "enemy_trapped", EV_ENEMY_SLOWED: "enemy_slowed",
+    EV_PLAYER_CAUGHT: "player_caught", EV_ENEMY_CAUGHT: "enemy_caught",
+    EV_ENEMY_EXITED: "enemy_exited", EV_PLAYER_ESCAPED: "player_escaped", EV_SCORE: "score",
+}
+# Capacidad del buffer circular de eventos (potencia de 2)
+EVENT_RING_SIZE = 4096
+# Carpeta y periodo de volcado de la telemetría
+TELEMETRY_DIR = "telemetry"
+TELEMETRY_FLUSH_INTERVAL = 1.0
+
+class EventBus:
+    # Bus de eventos en proceso sobre un buffer circular preasignado de arrays paralelos
+    # (código, partida, tiempo, fila, columna, valor). publish solo escribe seis casillas y
+    # avanza head; los lectores (telemetría) siguen su propia secuencia con read(). Si un
+    # lector se queda más de EVENT_RING_SIZE eventos atrás, los más viejos se pierden y se
+    # cuentan como descartados. Los suscriptores síncronos son opcionales por código.
+    def __init__(self, capacity=EVENT_RING_SIZE):
+        assert capacity & (capacity-1) == 0, "la capacidad debe ser potencia de 2"
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.codes = array('b', bytes(capacity))
+        self.games = array('i', [0]) * capacity
+        self.times = array('d', [0.0]) * capacity
+        self.rs = array('i', [0]) * capacity
+        self.cs = array('i', [0]) * capacity
+        self.vs = array('q', [0]) * capacity
+        # Secuencia del próximo evento (total publicado)
+        self.head = 0
+        # Número de partida actual (se incrementa con EV_GAME_START)
+        self.game = 0
+        # Suscriptores por código (listas vacías = sin coste extra al publicar)
+        self._subscribers = [[] for _ in range(max(EVENT_NAMES)+1)]
+
+    def publish(self, code, t, r=-1, c=-1, v=0):
+        if code == EV_GAME_START:
+            self.game += 1
+        i = self.head & self.mask
+        self.codes[i] = code
+        self.games[i] = self.game
+        self.times[i] = t
+        self.rs[i] = r
+        self.cs[i] = c
+        self.vs[i] = v
+        self.head += 1
+        subs = self._subscribers[code]
+        if subs:
+            for fn in subs:
+                fn(code, t, r, c, v)
+
+    def subscribe(self, code, fn):
+        # fn(code, t, r, c, v) se llama en el mismo hilo al publicar ese código
+        self._subscribers[code].append(fn)
+
+    def read(self, seq):
+        # Eventos publicados desde la secuencia seq: (lista de tuplas, nueva seq, descartados)
+        head = self.head
+        dropped = 0
+        if head - seq > self.capacity:
+            dropped = head - self.capacity - seq
+            seq = head - self.capacity
+        mask = self.mask
+        events = [(self.codes[i & mask], self.games[i & mask], self.times[i & mask],
+                   self.rs[i & mask], self.cs[i & mask], self.vs[i & mask]) for i in range(seq, head)]
+        # Si mientras se copiaba el productor dio la vuelta al buffer, las primeras copias
+        # pueden estar pisadas: se descartan
+        overrun = self.head - self.capacity - seq
+        if overrun > 0:
+            events = events[overrun:]
+            dropped += overrun
+        return events, head, dropped
+
+class TelemetrySink:
+    # Vuelca los eventos del bus a archivos JSONL comprimidos (gzip) desde un hilo de fondo:
+    # cada TELEMETRY_FLUSH_INTERVAL segundos lee lo nuevo del buffer circular y lo escribe en
+    # un solo bloque, así el bucle del juego nunca espera al disco.
+    def __init__(self, bus, directory=TELEMETRY_DIR, interval=TELEMETRY_FLUSH_INTERVAL):
+        import threading
+        self.bus = bus
+        self.directory = directory
+        self.interval = interval
+        self.path = os.path.join(directory, time.strftime("events-%Y%m%d-%H%M%S") + f"-{os.getpid()}.jsonl.gz")
+        # Empieza a leer desde lo ya publicado (los eventos anteriores no se vuelcan)
+        self.seq = bus.head
+        self.written = 0
+        self.dropped = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="telemetria", daemon=True)
+        self._file = None
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        # Detiene el hilo y vuelca lo pendiente
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+
+    def flush(self):
+        events, self.seq, dropped = self.bus.read(self.seq)
+        self.dropped += dropped
+        if not events:
+            return
+        if self._file is None:
+            import gzip
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = gzip.open(self.path, "at", encoding="utf-8")
+        lines = [json.dumps({"event": EVENT_NAMES.get(code, code), "game": game, "t": round(t, 3),
+                             "r": r, "c": c, "v": v}) for code, game, t, r, c, v in events]
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+        self.written += len(lines)
+
+# ----------------------------
+# Simulación (reglas del juego sin pygame)
+# ----------------------------
+# Estado y reglas de una partida; no dibuja ni lee teclado, por lo que puede
+# ejecutarse sin ventana (servidor, pruebas, entrenamiento).
+class Simulation:
+    # Constructor de la simulación: estado del mapa, entidades y reloj (sin pygame).
+    # Con defer_map=True no se genera el mapa hasta llamar a reset_game_state.
+    def __init__(self, mode="menu", defer_map=False):
+        # Estado general del juego (el mapa lo genera reset_game_state)
+        self.grid: Optional[List[List[int]]] = None
+        # Semilla con la que se generó el mapa actual
+        self.seed: Optional[int] = None
+        # Bus de eventos de la partida (trampas, capturas, puntuación...)
+        self.events = EventBus()
+        # Modo actual de la interfaz: 'menu', 'escapa', 'cazador', 'playing', 'gameover'
+        self.mode = mode
+        # Nombre del jugador (se completa en registro)
+        self.player_name = None
+
+        # Entidades dinámicas del juego (se crearán en reset_game_state)
+        self.player: Optional[Player] = None
+        self.enemies: List[Enemy] = []
+        self.traps = TrapManager()
+        # Tipo de trampa que coloca el jugador
+        self.trap_type = get_config().get("default_trap_type", "Basica")
+        # Marca de tiempo de inicio (para medir tiempo jugado)
+        self.start_time = time.time()
+        # Tiempo transcurrido acumulado
+        self.elapsed_time = 0.0
+        # Tiempo de simulación (avanza LOGIC_DT por tick, no depende de los FPS)
+        self.sim_time = 0.0
+        # Tiempo real pendiente de simular (bucle de paso fijo)
+        self.accumulator = 0.0
+        # Pulsaciones de dirección recibidas como eventos y aún no procesadas
+        self.input_buffer = collections.deque(maxlen=INPUT_BUFFER_SIZE)
+
+        # Ajustes de control / dificultad por defecto (perfil de config.json)
+        self.num_enemies = 4
+        # Factor usado como cooldown de movimiento (más bajo = más rápido)
+        self.enemy_speed = 1.0
+        self.difficulty = "Normal"
+        self.set_difficulty(get_config().get("default_difficulty", "Normal"))
+
+        # Crea el estado inicial del mapa, jugador y enemigos
+        if not defer_map:
+            self.reset_game_state()
+
+    # Aplica un perfil de dificultad por nombre (número y velocidad de enemigos)
+    def set_difficulty(self, name):
+        # Si el perfil no existe se mantiene la dificultad actual
+        profile = DIFFICULTIES.get(name)
+        if profile is None:
+            return
+        self.difficulty = name
+        self.num_enemies = int(profile.get("num_enemies", self.num_enemies))
+        self.enemy_speed = float(profile.get("enemy_speed", self.enemy_speed))
+
+    # Pasa al siguiente perfil de dificultad (en el orden definido en la configuración)
+    def cycle_difficulty(self):
+        names = list(DIFFICULTIES)
+        if not names:
+            return
+        idx = names.index(self.difficulty) if self.difficulty in names else -1
+        self.set_difficulty(names[(idx+1) % len(names)])
+
+    # Pasa al siguiente tipo de trampa definido en la configuración
+    def cycle_trap_type(self):
+        names = list(TRAP_TYPES)
+        if not names:
+            return
+        idx = names.index(self.trap_type) if self.trap_type in names else -1
+        self.trap_type = names[(idx+1) % len(names)]
+
+    # Reinicia o inicializa el estado del juego (mapa, jugador, enemigos, trampas)
+    def reset_game_state(self):
+        # Regenera el laberinto con características (puertas, lianas, etc.) a partir de una
+        # semilla nueva (queda guardada con la puntuación para poder repetir el mapa) y
+        # elige inicio y salida lejana con la misma lógica que usa el analizador de mapas
+        self.seed, self.grid, self.player_oracle, (pr, pc), (exit_r, exit_c), _ = build_level()
+        # Oráculo de distancias con las reglas de los enemigos (spawn, respawn y persecución)
+        self.enemy_oracle = DistanceOracle(self.grid, for_enemy=True)
+        # En mapas muy grandes los enemigos buscan camino con HPA* (clusters bajo demanda)
+        self.enemy_hpa = None
+        if len(self.grid)*len(self.grid[0]) >= HPA_MIN_CELLS:
+            from .hpa import HierarchicalPathfinder
+            self.enemy_hpa = HierarchicalPathfinder(self.grid, for_enemy=True)
+        # Visibilidad precalculada por celda del jugador (línea de visión de los enemigos)
+        self.vision = VisibilityCache(self.grid)
+        # Puntos de patrulla de este mapa
+        self.patrol_points = [find_random_cell_of_type(self.grid, allowed_types=ENEMY_SPAWN_TYPES)
+                              for _ in range(PATROL_POINTS)]
+
+        # Crea la entidad Player en la posición elegida; usa player_name si existe o "ANON"
+        self.player = Player(pr,pc,self.player_name or "ANON")
+        # Guarda la celda de salida
+        self.exit_cell = (exit_r, exit_c)
+        # Lista de enemigos vacía (se llenará a continuación)
+        self.enemies = []
+        # Coloca enemigos en celdas permisibles (no demasiado cerca del jugador)
+        placed = 0
+        tries = 0
+        # Celdas ya ocupadas (dos enemigos no empiezan en la misma celda)
+        taken = set()
+        while placed < self.num_enemies and tries < 1000:
+            # Busca celdas donde los enemigos puedan aparecer (lianas o caminos)
+            er, ec = find_random_cell_of_type(self.grid, allowed_types=ENEMY_SPAWN_TYPES)
+            # Solo coloca si está libre y lejos del jugador por camino transitable (evita spawn inmediato)
+            if (er, ec) not in taken and self.spawn_is_safe(er, ec, pr, pc):
+                # Crea enemigo con id incremental
+                self.enemies.append(Enemy(er,ec, id_=placed))
+                taken.add((er, ec))
+                placed += 1
+            tries += 1
+        # Si no se colocó ninguno (caso raro), los genera en bordes como fallback
+        if not self.enemies:
+            for i in range(self.num_enemies):
+                self.enemies.append(Enemy(0, i*2+1, id_=i))
+
+        # Retira las trampas de la partida anterior
+        self.traps.clear()
+        # Invalida el campo de distancias de persecución (mapa nuevo)
+        self._chase_field_key = None
+        self._chase_field = None
+        # Reinicia tiempo de inicio
+        self.start_time = time.time()
+        # Reinicia reloj de simulación, acumulador y entradas pendientes
+        self.sim_time = 0.0
+        self.accumulator = 0.0
+        self.input_buffer.clear()
+        # Flags de estado de juego
+        self.game_over = False
+        self.won = False
+        # Anuncia el inicio de una partida (no en la vista previa del menú)
+        if self.mode in MODES:
+            self.events.publish(EV_GAME_START, 0.0, MODES.index(self.mode), -1, self.seed)
+
+    # Indica si un enemigo puede aparecer en (er,ec) sin estar a pocos pasos del jugador
+    def spawn_is_safe(self, er, ec, pr, pc):
+        # Si el jugador está en una celda que los enemigos no pisan (túnel), se mide hasta
+        # sus vecinos transitables para enemigos (un paso más)
+        if TERRAIN_WALK_ENEMY[self.grid[pr][pc]]:
+            targets = [((pr,pc), 0)]
+        else:
+            targets = [((nr,nc), 1) for nr,nc in neighbors(pr,pc) if TERRAIN_WALK_ENEMY[self.grid[nr][nc]]]
+        best = None
+        for cell, extra in targets:
+            d = self.enemy_oracle.distance((er,ec), cell)
+            if d is not None and (best is None or d + extra < best):
+                best = d + extra
+        if best is not None:
+            return best > SPAWN_MIN_DISTANCE
+        # Sin camino de enemigo hasta el jugador no se da por seguro: distancia Manhattan
+        return abs(er - pr) + abs(ec - pc) > SPAWN_MIN_DISTANCE
+
+    def place_trap(self):
+        # obtiene tiempo actual de simulación
+        now = self.sim_time
+        # verifica si el jugador puede colocar una trampa según sus reglas (cooldown y tope)
+        if self.player.can_place_trap(now, len(self.traps)):
+            # activa una trampa del tipo elegido en la posición actual del jugador
+            ttype = TRAP_TYPES.get(self.trap_type) or next(iter(TRAP_TYPES.values()))
+            self.traps.place(self.player.r, self.player.c, now, ttype, self.grid)
+            self.events.publish(EV_TRAP_PLACED, now, self.player.r, self.player.c, ttype.index)
+            # actualiza el último tiempo de trampa del jugador para aplicar cooldown
+            self.player.last_trap_time = now
+            # la cantidad de trampas activas queda controlada por len(self.traps)
+            return True
+        # si no se puede, retorna False
+        return False
+
+    def enemy_respawn_check(self):
+        # obtiene tiempo actual de simulación
+        now = self.sim_time
+        # recorre todos los enemigos
+        for e in self.enemies:
+            # si el enemigo no está vivo y tiene tiempo de reaparición definido
+            if not e.alive and e.respawn_time is not None and now >= e.respawn_time:
+                # busca una celda aleatoria permitida para reaparecer (camino o liana),
+                # libre de otros enemigos y preferentemente lejos del jugador por camino transitable
+                taken = {(o.r, o.c) for o in self.enemies if o.alive}
+                for _ in range(20):
+                    r,c = find_random_cell_of_type(self.grid, allowed_types=ENEMY_SPAWN_TYPES)
+                    if (r,c) not in taken and self.spawn_is_safe(r, c, self.player.r, self.player.c):
+                        break
+                # actualiza posición del enemigo (sin interpolar el salto)
+                e.r, e.c = r,c
+                e.prev_r, e.prev_c = r,c
+                # marca como vivo de nuevo
+                e.alive = True
+                # limpia el tiempo de reaparición
+                e.respawn_time = None
+                # reaparece sin recordar al jugador ni ruta de patrulla
+                e.last_seen = None
+                e.patrol_target = None
+                e.facing = (0, 0)
+
+    def move_player(self, dr, dc, sprinting=False):
+        # calcula nueva fila/columna destino según el desplazamiento pedido
+        nr, nc = self.player.r + dr, self.player.c + dc
+        # si está fuera de los límites, no hace nada
+        if not in_bounds(nr,nc):
+            return
+        # obtiene el valor de terreno de la celda destino
+        tval = self.grid[nr][nc]
+        # si el terreno permite caminar al jugador (tabla de transitabilidad)
+        if TERRAIN_WALK_PLAYER[tval]:
+            # actualiza la posición del jugador
+            self.player.r, self.player.c = nr, nc
+            # consumo de energía si está esprintando
+            if sprinting:
+                # reduce energía proporcional al coste de sprint por tick de lógica (coste/s * LOGIC_DT)
+                self.player.energy -= (self.player.sprint_cost * LOGIC_DT)
+                # si la energía baja de 0, la fija a 0 y desactiva sprinting
+                if self.player.energy < 0:
+                    self.player.energy = 0
+                    self.player.sprinting = False
+            else:
+                # si no sprinta, recupera energía lentamente (1% del máximo por movimiento)
+                self.player.energy = min(self.player.max_energy, self.player.energy + (self.player.max_energy*0.01))
+        else:
+            # si el terreno no es caminable, no cambia nada (bloqueado)
+            pass
+
+    def enemy_ready(self, e, now):
+        # True si ya pasó el cooldown de movimiento del enemigo (escalado por la velocidad
+        # de la dificultad y más largo mientras una trampa lo ralentiza)
+        cooldown = e.move_cooldown * (1.0/self.enemy_speed)
+        if now < e.slow_until:
+            cooldown *= e.slow_factor
+        return now - e.last_move >= cooldown
+
+    def enemy_behavior_step(self):
+        # obtiene tiempo actual de simulación para controlar cooldowns
+        now = self.sim_time
+        # enemigos listos para perseguir en este tick (se planifican juntos al final)
+        chasers = []
+        # en "escapa" primero se actualiza lo que ve cada enemigo (una consulta por tick)
+        if self.mode == "escapa":
+            self.update_perception(now)
+        # recorre cada enemigo
+        for e in self.enemies:
+            # si el enemigo está muerto o lo controla un jugador, se salta su lógica
+            if not e.alive or e.controlled:
+                continue
+            # aplica cooldown de movimiento (más largo si una trampa lo ralentiza)
+            if not self.enemy_ready(e, now):
+                continue
+            # actualiza la marca del último movimiento al tiempo actual
+            e.last_move = now
+            # comportamiento según el modo actual del juego
+            if self.mode == "escapa":
+                # en modo "escapa" los enemigos persiguen al jugador; se agrupan para
+                # planificarlos en una sola pasada cooperativa
+                chasers.append(e)
+            elif self.mode == "cazador":
+                # en modo "cazador" los enemigos huyen del jugador:
+                # se elige el vecino que aumente la distancia Manhattan y sea transitable
+                best = (e.r, e.c)
+                best_dist = abs(e.r - self.player.r) + abs(e.c - self.player.c)
+                # itera sobre vecinos válidos (función neighbors devuelve celdas adyacentes)
+                for nr,nc in neighbors(e.r,e.c):
+                    # solo considera celdas por las que los enemigos pueden moverse
+                    if TERRAIN_WALK_ENEMY[self.grid[nr][nc]]:
+                        # calcula la distancia Manhattan desde ese vecino hasta el jugador
+                        d = abs(nr - self.player.r) + abs(nc - self.player.c)
+                        # si la distancia es mayor que la mejor conocida, la actualiza
+                        if d > best_dist:
+                            best_dist = d
+                            best = (nr,nc)
+                # mueve al enemigo a la mejor posición encontrada (o lo deja donde estaba)
+                e.r, e.c = best
+        # planificación conjunta de los perseguidores (un solo campo de distancias)
+        if chasers:
+            self.plan_chasers(chasers, self.choose_goals(chasers, now))
+
+    # Actualiza qué enemigos ven al jugador y su última posición conocida
+    def update_perception(self, now):
+        pr, pc = self.player.r, self.player.c
+        # Conjunto de celdas con línea de visión hacia el jugador (caché por celda del jugador)
+        vis = self.vision.visible_from(pr, pc)
+        cols = self.vision.cols
+        for e in self.enemies:
+            if not e.alive or e.controlled:
+                e.sees_player = False
+                continue
+            e.sees_player = (e.r*cols + e.c) in vis and self.in_vision_cone(e, pr, pc)
+            if e.sees_player:
+                e.last_seen = (pr, pc)
+                e.last_seen_time = now
+                e.patrol_target = None
+
+    # True si (pr,pc) cae dentro del cono de visión del enemigo (o muy cerca de él)
+    def in_vision_cone(self, e, pr, pc):
+        fr, fc = e.facing
+        if fr == 0 and fc == 0:
+            return True
+        dr, dc = pr - e.r, pc - e.c
+        dist2 = dr*dr + dc*dc
+        if dist2 <= VISION_NEAR*VISION_NEAR:
+            return True
+        dot = dr*fr + dc*fc
+        return dot > 0 and dot*dot >= VISION_CONE_COS*VISION_CONE_COS*dist2
+
+    # Objetivo de cada perseguidor que no ve al jugador: última posición vista o patrulla
+    def choose_goals(self, chasers, now):
+        goals = {}
+        for e in chasers:
+            # si ve al jugador usa el campo compartido hacia el jugador
+            if e.sees_player:
+                continue
+            # recuerda dónde lo vio por última vez durante MEMORY_TIME segundos
+            if (e.last_seen is not None and now - e.last_seen_time < MEMORY_TIME
+                    and (e.r, e.c) != e.last_seen):
+                goals[id(e)] = e.last_seen
+                continue
+            e.last_seen = None
+            # patrulla: elige un destino nuevo al llegar o si no tiene
+            if e.patrol_target is None or (e.r, e.c) == e.patrol_target:
+                e.patrol_target = self.pick_patrol_target(e)
+            goals[id(e)] = e.patrol_target
+        return goals
+
+    # Punto de patrulla alcanzable por el enemigo, elegido al azar
+    def pick_patrol_target(self, e):
+        here = (e.r, e.c)
+        if self.enemy_hpa is not None:
+            options = [p for p in self.patrol_points if p != here and self.enemy_hpa.distance(here, p)]
+        else:
+            options = [p for p in self.patrol_points
+                       if p != here and self.enemy_oracle.field(p)[e.r*GRID_COLS + e.c] > 0]
+        return random.choice(options) if options else here
+
+    # Mueve a los perseguidores un paso con el planificador cooperativo
+    def plan_chasers(self, chasers, goals=None):
+        # goals: {id(enemigo): celda} para los que no persiguen al jugador directamente
+        goals = goals or {}
+        goal = (self.player.r, self.player.c)
+        if self.enemy_hpa is not None:
+            self.plan_chasers_hpa(chasers, goals, goal)
+            return
+        # Campo de distancias hacia el jugador servido por el oráculo (búsquedas O(1));
+        # solo se crea una vista nueva si cambió la celda del jugador
+        if self._chase_field_key != goal:
+            self._chase_field = self.enemy_oracle.field(goal)
+            self._chase_field_key = goal
+        # Todos los enemigos vivos ocupan celdas (también los que esperan su cooldown)
+        alive = [e for e in self.enemies if e.alive]
+        index = {id(e): i for i, e in enumerate(alive)}
+        positions = [(e.r, e.c) for e in alive]
+        movers = [index[id(e)] for e in chasers]
+        # Campos propios (vistas del oráculo) para los que van a otra celda
+        fields = {index[key]: self.enemy_oracle.field(cell) for key, cell in goals.items()}
+        moves = plan_enemy_moves(self.grid, positions, movers, goal, dist=self._chase_field, goals=fields)
+        for i, (nr, nc) in moves.items():
+            e = alive[i]
+            # la dirección del último paso define hacia dónde mira el enemigo
+            if (nr, nc) != (e.r, e.c):
+                e.facing = (nr - e.r, nc - e.c)
+            e.r, e.c = nr, nc
+
+    # Persecución en mapas muy grandes: cada enemigo da el primer paso de su camino HPA*
+    # (sin campos de distancias de todo el mapa) y se respetan las mismas reservas de celda
+    def plan_chasers_hpa(self, chasers, goals, goal):
+        reserved = collections.Counter((e.r, e.c) for e in self.enemies if e.alive)
+        for e in chasers:
+            step = self.enemy_hpa.next_step((e.r, e.c), goals.get(id(e), goal))
+            # Sin camino o celda ya ocupada por otro enemigo: espera (la del jugador no se reserva)
+            if step is None or (reserved[step] and step != goal):
+                continue
+            reserved[(e.r, e.c)] -= 1
+            reserved[step] += 1
+            e.facing = (step[0] - e.r, step[1] - e.c)
+            e.r, e.c = step
+
+    def check_collisions(self):
+        # obtiene tiempo actual de simulación (para programar reapariciones)
+        now = self.sim_time
+        # detecta colisiones entre enemigos y trampas con el índice por celda (O(1) por enemigo)
+        for e in self.enemies:
+            if e.alive:
+                # una celda puede estar cubierta por varias trampas: se activan todas
+                for t in self.traps.all_at(e.r, e.c):
+                    ttype = t.type
+                    if ttype.effect == "kill":
+                        # el enemigo muere y reaparece tras el retardo del tipo de trampa
+                        e.alive = False
+                        e.respawn_time = now + ttype.respawn_delay
+                        self.events.publish(EV_ENEMY_TRAPPED, now, e.r, e.c, e.id)
+                    elif ttype.effect == "slow":
+                        # una trampa que no se consume sigue activa mientras el enemigo está en
+                        # su radio: solo lo ralentiza (y puntúa) la primera vez
+                        if e.id in t.affected:
+                            continue
+                        t.affected.add(e.id)
+                        # el enemigo queda ralentizado durante slow_time segundos
+                        e.slow_factor = ttype.slow_factor
+                        e.slow_until = now + ttype.slow_time
+                        self.events.publish(EV_ENEMY_SLOWED, now, e.r, e.c, e.id)
+                    # bonificación de puntuación según el tipo de trampa
+                    if ttype.score:
+                        self.player.score += ttype.score
+                        self.events.publish(EV_SCORE, now, v=self.player.score)
+                    # las trampas consumibles desaparecen al activarse
+                    if ttype.consumed:
+                        self.traps.remove(t)
+                    # un enemigo muerto no activa las demás trampas de la celda
+                    if not e.alive:
+                        break
+        # detecta colisiones donde el enemigo atrapa al jugador (o jugador atrapa en cazador)
+        for e in self.enemies:
+            # solo considerar enemigos vivos
+            if e.alive and (e.r, e.c) == (self.player.r, self.player.c):
+                if self.mode == "escapa":
+                    # en modo ESCAPA, si un enemigo alcanza al jugador -> pérdida
+                    self.game_over = True
+                    self.won = False
+                    self.events.publish(EV_PLAYER_CAUGHT, now, e.r, e.c, e.id)
+                elif self.mode == "cazador":
+                    # en modo CAZADOR, si el jugador alcanza al enemigo -> puntuación y respawn
+                    self.player.score += 100
+                    e.alive = False
+                    # reaparición más rápida en modo cazador (3s)
+                    e.respawn_time = now + 3.0
+                    self.events.publish(EV_ENEMY_CAUGHT, now, e.r, e.c, e.id)
+                    self.events.publish(EV_SCORE, now, v=self.player.score)
+        # verifica si el jugador llegó a la salida (solo relevante en ESCAPA)
+        if (self.player.r, self.player.c) == self.exit_cell and self.mode == "escapa":
+            # si llegó a la salida, marca juego terminado y victoria
+            self.game_over = True
+            self.won = True
+            self.events.publish(EV_PLAYER_ESCAPED, now, self.player.r, self.player.c)
+
+    # Un tick de lógica de duración fija LOGIC_DT (movimiento, IA, colisiones)
+    def logic_step(self, held_dr=0, held_dc=0, sprint_held=False):
+        # Guarda posiciones actuales como "anteriores" para interpolar el dibujado
+        self.player.prev_r, self.player.prev_c = self.player.r, self.player.c
+        for e in self.enemies:
+            e.prev_r, e.prev_c = e.r, e.c
+        # Avanza el reloj de simulación y retira las trampas vencidas
+        self.sim_time += LOGIC_DT
+        self.traps.expire(self.sim_time)
+
+        # Activa o desactiva la bandera de sprint según energía disponible
+        if sprint_held and self.player.energy > 0:
+            self.player.sprinting = True
+        else:
+            self.player.sprinting = False
+
+        # Prioriza pulsaciones guardadas; si no hay, usa las teclas mantenidas
+        if self.input_buffer:
+            dr, dc = self.input_buffer.popleft()
+        else:
+            dr, dc = held_dr, held_dc
+
+        # Si hubo intento de movimiento
+        if dr != 0 or dc != 0:
+            # Determina multiplicador de pasos: sprint_speed si sprintando, sino 1
+            speed_multiplier = self.player.sprint_speed if self.player.sprinting else 1
+            # Ejecuta movimientos repetidos según el multiplicador (si sprint permite múltiple)
+            for step in range(speed_multiplier):
+                # Mueve jugador paso a paso (consumo de energía y comprobaciones internas)
+                self.move_player(dr, dc, sprinting=self.player.sprinting)
+
+        # Paso de IA de enemigos (decisiones y desplazamientos)
+        self.enemy_behavior_step()
+
+        # Lógica de reaparición de enemigos caídos
+        self.enemy_respawn_check()
+
+        # Comprobación de colisiones (trampas, enemigos, salida)
+        self.check_collisions()
+
+        # Reglas adicionales de fin de juego para modo 'cazador'
+        if self.mode == "cazador":
+            # Si algún enemigo llega a la salida, penaliza al jugador y hace respawn
+            for e in self.enemies:
+                if e.alive and (e.r, e.c) == self.exit_cell:
+                    # Aplica penalización en el puntaje
+                    self.player.score -= 50
+                    # Marca enemigo como muerto temporalmente y programa reaparición
+                    e.alive = False
+                    e.respawn_time = self.sim_time + 5.0
+                    self.events.publish(EV_ENEMY_EXITED, self.sim_time, e.r, e.c, e.id)
+                    self.events.publish(EV_SCORE, self.sim_time, v=self.player.score)
+
@@ -0,0 +1,313 @@
+# Entorno de entrenamiento (aprendizaje por refuerzo) sobre las reglas del núcleo
+
+import random
+import time
+
+# NumPy es obligatorio para este módulo (el juego y el servidor no lo necesitan)
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("El entorno de entrenamiento necesita numpy: pip install numpy") from None
+
+from .core import (GRID_ROWS, GRID_COLS, LOGIC_DT, LOGIC_HZ, MAX_TRAPS, MIN_EXIT_DISTANCE,
+                   ORACLE_INF, SPAWN_MIN_DISTANCE, PLAYER_SPAWN_TYPES, TERRAIN_WALK_PLAYER,
+                   TERRAIN_WALK_ENEMY, DistanceOracle, Player, Enemy, bfs_distance_field,
+                   find_random_cell_of_type, generate_maze_with_features, in_bounds)
+
+# ----------------------------
+# Entorno de entrenamiento (aprendizaje por refuerzo)
+# ----------------------------
+# Acciones de dirección: 0 quieto, 1 arriba, 2 abajo, 3 izquierda, 4 derecha
+ACTION_DIRS = [(0,0), (-1,0), (1,0), (0,-1), (0,1)]
+
+class VecEnv:
+    # Muchas partidas de "escapa" avanzadas a la vez con operaciones de numpy.
+    # Modelo simplificado de logic_step sobre arrays (entornos, ...): movimiento, sprint,
+    # trampas, reapariciones, captura y salida siguen las mismas reglas, pero:
+    # - los enemigos siempre saben dónde está el jugador y lo persiguen por el camino más
+    #   corto (sin línea de visión, cono, memoria ni patrullas, y sin reservas de celda);
+    # - solo hay trampas que matan, de una celda y sin expiración (no usa TRAP_TYPES);
+    # - la velocidad de los enemigos es la de dificultad Normal;
+    # - un enemigo sin camino hasta el jugador cuenta como aparición segura.
+    # Los mapas salen de una reserva precalculada con sus distancias de enemigo entre
+    # todos los pares, así la IA de los enemigos es una consulta de tabla por entorno.
+    def __init__(self, num_envs=256, num_enemies=4, maze_pool_size=32, starts_per_maze=16, max_steps=2000, seed=None):
+        self.num_envs = num_envs
+        self.num_enemies = num_enemies
+        self.max_steps = max_steps
+        self.maze_pool_size = maze_pool_size
+        self.starts_per_maze = starts_per_maze
+        self.rng = np.random.default_rng(seed)
+        R, C = GRID_ROWS, GRID_COLS
+        N = R*C
+        self.rows, self.cols, self.num_cells = R, C, N
+
+        # Tabla de vecinos por celda plana: columna = acción (0 = quedarse)
+        nbr = np.empty((N, 5), dtype=np.int32)
+        for idx in range(N):
+            r, c = divmod(idx, C)
+            for a, (dr, dc) in enumerate(ACTION_DIRS):
+                nbr[idx, a] = (r+dr)*C + (c+dc) if in_bounds(r+dr, c+dc) else idx
+        self.nbr = nbr
+
+        # Reserva de mapas: terreno, transitabilidad, distancias de enemigo, inicios y salidas
+        self.build_pool(seed)
+
+        # Parámetros de reglas convertidos a ticks de LOGIC_DT
+        player = Player(0, 0)
+        enemy = Enemy(0, 0)
+        self.max_energy = player.max_energy
+        self.sprint_drain = player.sprint_cost * LOGIC_DT
+        self.energy_regen = player.max_energy * 0.01
+        self.trap_cooldown_ticks = int(round(player.trap_cooldown * LOGIC_HZ))
+        self.enemy_period = max(1, int(round(enemy.move_cooldown * LOGIC_HZ)))
+        self.trap_respawn_ticks = int(round(10.0 * LOGIC_HZ))
+
+        # Estado por entorno
+        B, E = num_envs, num_enemies
+        self.maze = np.zeros(B, dtype=np.int32)
+        self.player = np.zeros(B, dtype=np.int32)
+        self.exit = np.zeros(B, dtype=np.int32)
+        self.energy = np.zeros(B, dtype=np.float32)
+        self.score = np.zeros(B, dtype=np.float32)
+        self.trap_timer = np.zeros(B, dtype=np.int32)
+        self.traps = np.full((B, MAX_TRAPS), -1, dtype=np.int32)
+        self.enemy = np.zeros((B, E), dtype=np.int32)
+        self.enemy_alive = np.ones((B, E), dtype=bool)
+        self.enemy_timer = np.zeros((B, E), dtype=np.int32)
+        self.enemy_respawn = np.zeros((B, E), dtype=np.int32)
+        self.steps = np.zeros(B, dtype=np.int32)
+        self.grid_obs = np.zeros((B, R, C), dtype=np.uint8)
+        self.reset()
+
+    def build_pool(self, seed=None):
+        # (Re)construye la reserva de mapas con un generador propio: la misma semilla da la
+        # misma reserva, sin reiniciar ni consumir el random global del proceso
+        C, N = self.cols, self.num_cells
+        self.pool_seed = seed
+        maze_rng = random.Random(seed)
+        grids, dists, starts, exits = [], [], [], []
+        for _ in range(self.maze_pool_size):
+            grid = generate_maze_with_features(seed=maze_rng.randrange(2**31))
+            D = np.full((N, N), ORACLE_INF, dtype=np.uint16)
+            for idx in range(N):
+                r, c = divmod(idx, C)
+                if TERRAIN_WALK_ENEMY[grid[r][c]]:
+                    row = np.array(bfs_distance_field(grid, (r,c), for_enemy=True), dtype=np.int32)
+                    D[idx] = np.where(row >= 0, row, ORACLE_INF)
+            oracle = DistanceOracle(grid, for_enemy=False)
+            pairs = []
+            for _ in range(self.starts_per_maze*20):
+                pr, pc = find_random_cell_of_type(grid, allowed_types=PLAYER_SPAWN_TYPES, rng=maze_rng)
+                far = oracle.farthest_from((pr,pc))
+                if far is not None and far[1] >= MIN_EXIT_DISTANCE:
+                    pairs.append((pr*C + pc, far[0][0]*C + far[0][1]))
+                    if len(pairs) == self.starts_per_maze:
+                        break
+            # Mapas sin inicio válido se descartan; los incompletos repiten parejas
+            if not pairs:
+                continue
+            while len(pairs) < self.starts_per_maze:
+                pairs.append(pairs[len(pairs) % len(pairs)])
+            grids.append(grid)
+            dists.append(D)
+            starts.append([a for a, _ in pairs])
+            exits.append([b for _, b in pairs])
+        self.pool_grids = np.array(grids, dtype=np.uint8).reshape(len(grids), N)
+        self.pool_dist = np.stack(dists)
+        self.pool_starts = np.array(starts, dtype=np.int32)
+        self.pool_exits = np.array(exits, dtype=np.int32)
+        self.pool_walk_player = np.array(TERRAIN_WALK_PLAYER, dtype=bool)[self.pool_grids]
+        self.pool_walk_enemy = np.array(TERRAIN_WALK_ENEMY, dtype=bool)[self.pool_grids]
+        # Celdas de aparición de enemigos por mapa (rellenadas hasta N con la primera)
+        counts = self.pool_walk_enemy.sum(axis=1)
+        self.pool_enemy_counts = np.maximum(counts, 1)
+        self.pool_enemy_cells = np.zeros((len(grids), N), dtype=np.int32)
+        for p in range(len(grids)):
+            cells = np.flatnonzero(self.pool_walk_enemy[p])
+            self.pool_enemy_cells[p, :len(cells)] = cells
+
+    def _spawn_enemy_cells(self, envs, count):
+        # Celdas de enemigo aleatorias lejos del jugador (hasta 8 candidatos por enemigo)
+        maze = self.maze[envs]
+        k = self.rng.random((len(envs), count, 8))
+        cand = self.pool_enemy_cells[maze[:,None,None], (k * self.pool_enemy_counts[maze][:,None,None]).astype(np.int32)]
+        d = self.pool_dist[maze[:,None,None], cand, self.player[envs][:,None,None]]
+        safe = d > SPAWN_MIN_DISTANCE
+        pick = np.where(safe.any(-1), safe.argmax(-1), 7)
+        return np.take_along_axis(cand, pick[...,None], -1)[...,0]
+
+    def reset(self, envs=None):
+        # Reinicia los entornos indicados (todos por defecto) y devuelve observaciones
+        if envs is None:
+            envs = np.arange(self.num_envs)
+        n = len(envs)
+        if n == 0:
+            return self.observe()
+        maze = self.rng.integers(len(self.pool_grids), size=n)
+        k = self.rng.integers(self.pool_starts.shape[1], size=n)
+        self.maze[envs] = maze
+        self.player[envs] = self.pool_starts[maze, k]
+        self.exit[envs] = self.pool_exits[maze, k]
+        self.energy[envs] = self.max_energy
+        self.score[envs] = 0
+        self.trap_timer[envs] = 0
+        self.traps[envs] = -1
+        self.enemy[envs] = self._spawn_enemy_cells(envs, self.num_enemies)
+        self.enemy_alive[envs] = True
+        self.enemy_timer[envs] = 0
+        self.enemy_respawn[envs] = 0
+        self.steps[envs] = 0
+        self.grid_obs[envs] = self.pool_grids[maze].reshape(n, self.rows, self.cols)
+        return self.observe()
+
+    def observe(self):
+        # Observaciones compactas; "grid" es el mismo array entre pasos (solo cambia al reiniciar)
+        C = self.cols
+        enemies = np.stack([self.enemy // C, self.enemy % C, self.enemy_alive], axis=-1).astype(np.int16)
+        traps = np.stack([self.traps // C, self.traps % C, self.traps >= 0], axis=-1).astype(np.int16)
+        return {
+            "grid": self.grid_obs,
+            "player": np.stack([self.player // C, self.player % C], axis=-1).astype(np.int16),
+            "exit": np.stack([self.exit // C, self.exit % C], axis=-1).astype(np.int16),
+            "energy": self.energy / self.max_energy,
+            "enemies": enemies,
+            "traps": traps,
+        }
+
+    def step(self, actions, enemy_actions=None):
+        # actions: (entornos, 3) = [dirección 0-4, sprint 0/1, trampa 0/1]
+        # enemy_actions: opcional (entornos, enemigos) con dirección 0-4 para controlar enemigos
+        actions = np.asarray(actions)
+        B = self.num_envs
+        envs = np.arange(B)
+        direction = actions[:, 0].astype(np.int32)
+        sprinting = (actions[:, 1] > 0) & (self.energy > 0)
+        score_before = self.score.copy()
+
+        # Trampas: cooldown y máximo de activas, se colocan en la celda actual
+        np.maximum(self.trap_timer - 1, 0, out=self.trap_timer)
+        free = self.traps < 0
+        place = (actions[:, 2] > 0) & (self.trap_timer <= 0) & free.any(axis=1)
+        slot = free.argmax(axis=1)
+        self.traps[envs[place], slot[place]] = self.player[place]
+        self.trap_timer[place] = self.trap_cooldown_ticks
+
+        # Movimiento del jugador: 1 paso o 2 con sprint (mismo bucle que logic_step)
+        two_steps = sprinting.copy()
+        for k in range(2):
+            active = (direction != 0) & ((k == 0) | two_steps)
+            target = self.nbr[self.player, direction]
+            ok = active & self.pool_walk_player[self.maze, target]
+            self.player = np.where(ok, target, self.player)
+            drain = ok & sprinting
+            regen = ok & ~sprinting
+            self.energy = np.where(drain, self.energy - self.sprint_drain, self.energy)
+            self.energy = np.where(regen, np.minimum(self.max_energy, self.energy + self.energy_regen), self.energy)
+            # Sin energía se corta el sprint (como en move_player)
+            empty = self.energy < 0
+            self.energy[empty] = 0
+            sprinting &= ~empty
+
+        # Enemigos: se mueven cada enemy_period ticks
+        self.enemy_timer -= 1
+        moving = self.enemy_alive & (self.enemy_timer <= 0)
+        self.enemy_timer[moving] = self.enemy_period
+        cand = self.nbr[self.enemy]
+        if enemy_actions is None:
+            # IA: paso que reduce la distancia de camino al jugador (tabla de la reserva)
+            dcand = self.pool_dist[self.maze[:,None,None], cand, self.player[:,None,None]].astype(np.int32)
+            dcur = dcand[..., 0]
+            good = (dcand == (dcur - 1)[..., None]) & ((dcur > 0) & (dcur < ORACLE_INF))[..., None]
+            good[..., 0] = False
+            choice = np.where(good.any(-1), good.argmax(-1), 0)
+        else:
+            choice = np.asarray(enemy_actions, dtype=np.int32)
+        target = np.take_along_axis(cand, choice[..., None], -1)[..., 0]
+        ok = moving & self.pool_walk_enemy[self.maze[:, None], target]
+        self.enemy = np.where(ok, target, self.enemy)
+
+        # Reapariciones de enemigos muertos por trampa
+        np.maximum(self.enemy_respawn - 1, 0, out=self.enemy_respawn)
+        back = ~self.enemy_alive & (self.enemy_respawn <= 0)
+        if back.any():
+            rows = np.flatnonzero(back.any(axis=1))
+            cells = self._spawn_enemy_cells(rows, self.num_enemies)
+            self.enemy[rows] = np.where(back[rows], cells, self.enemy[rows])
+            self.enemy_alive |= back
+
+        # Trampas contra enemigos: el enemigo muere, la trampa se consume, +50 puntos
+        hit = (self.enemy[:, :, None] == self.traps[:, None, :]) & self.enemy_alive[:, :, None] & (self.traps >= 0)[:, None, :]
+        killed = hit.any(axis=2)
+        self.enemy_alive &= ~killed
+        self.enemy_respawn[killed] = self.trap_respawn_ticks
+        self.traps[hit.any(axis=1)] = -1
+        self.score += 50 * killed.sum(axis=1)
+
+        # Captura del jugador y llegada a la salida
+        caught = (self.enemy_alive & (self.enemy == self.player[:, None])).any(axis=1)
+        won = (self.player == self.exit) & ~caught
+        self.steps += 1
+        terminated = caught | won
+        truncated = ~terminated & (self.steps >= self.max_steps)
+
+        # Recompensa: puntos ganados/100, +1 al escapar, -1 al ser atrapado, -0.001 por paso
+        reward = (self.score - score_before) / 100.0 + won.astype(np.float32) - caught.astype(np.float32) - 0.001
+        info = {"won": won, "caught": caught, "score": self.score.copy()}
+        # Reinicio automático de los entornos terminados
+        done = np.flatnonzero(terminated | truncated)
+        obs = self.reset(done) if len(done) else self.observe()
+        return obs, reward.astype(np.float32), terminated, truncated, info
+
+class EscapaEnv:
+    # Entorno individual con la API de Gymnasium (reset/step) sobre un VecEnv de tamaño 1.
+    # Si gymnasium está instalado, observation_space y action_space usan sus espacios.
+    metadata = {"render_modes": []}
+
+    def __init__(self, num_enemies=4, maze_pool_size=8, max_steps=2000, seed=None):
+        self.vec = VecEnv(1, num_enemies=num_enemies, maze_pool_size=maze_pool_size, max_steps=max_steps, seed=seed)
+        self.observation_space, self.action_space = self._spaces()
+
+    def _spaces(self):
+        try:
+            from gymnasium import spaces
+        except ImportError:
+            return None, None
+        E = self.vec.num_enemies
+        return spaces.Dict({
+            "grid": spaces.Box(0, 255, (GRID_ROWS, GRID_COLS), np.uint8),
+            "player": spaces.Box(0, max(GRID_ROWS, GRID_COLS), (2,), np.int16),
+            "exit": spaces.Box(0, max(GRID_ROWS, GRID_COLS), (2,), np.int16),
+            "energy": spaces.Box(0.0, 1.0, (), np.float32),
+            "enemies": spaces.Box(-1, max(GRID_ROWS, GRID_COLS), (E, 3), np.int16),
+            "traps": spaces.Box(-1, max(GRID_ROWS, GRID_COLS), (MAX_TRAPS, 3), np.int16),
+        }), spaces.MultiDiscrete([5, 2, 2])
+
+    def _single(self, obs):
+        return {k: v[0] for k, v in obs.items()}
+
+    def reset(self, seed=None, options=None):
+        # Con semilla se reinicia también la reserva de mapas (si era de otra semilla), así
+        # reset(seed=n) repite mapas, inicios y enemigos
+        if seed is not None:
+            if seed != self.vec.pool_seed:
+                self.vec.build_pool(seed)
+            self.vec.rng = np.random.default_rng(seed)
+        return self._single(self.vec.reset()), {}
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.vec.step(np.asarray(action).reshape(1, 3))
+        return self._single(obs), float(reward[0]), bool(terminated[0]), bool(truncated[0]), {k: v[0] for k, v in info.items()}
+
+def bench_vecenv(num_envs=512, steps=200):
+    # Mide pasos de entorno por segundo del VecEnv con acciones aleatorias
+    env = VecEnv(num_envs)
+    rng = np.random.default_rng(0)
+    actions = rng.integers(0, [5, 2, 2], size=(steps, num_envs, 3))
+    t0 = time.perf_counter()
+    for i in range(steps):
+        env.step(actions[i])
+    elapsed = time.perf_counter() - t0
+    print(f"Entornos: {num_envs}, pasos: {steps}")
+    print(f"Pasos de entorno por segundo: {num_envs*steps/elapsed:,.0f}")
+
@@ -0,0 +1,432 @@
+# Pathfinding jerárquico (HPA*) para mapas muy grandes
+
+import random
+import heapq
+import collections
+from array import array
+from typing import List, Tuple, Dict
+
+from .core import TERRAIN_WALK_PLAYER, TERRAIN_WALK_ENEMY
+
+# ----------------------------
+# Pathfinding jerárquico (HPA*) para mapas muy grandes
+# ----------------------------
+# Lado de cada cluster en celdas
+HPA_CLUSTER_SIZE = 16
+# Tramos de borde transitables de al menos esta longitud tienen dos entradas (una por extremo)
+HPA_ENTRANCE_SPLIT = 6
+# Landmarks (ALT) sobre el grafo abstracto para guiar el A* en mapas laberínticos
+HPA_LANDMARKS = 16
+# Distancia "infinita" en las tablas de landmarks (uint32)
+HPA_INF = 0xFFFFFFFF
+
+class HierarchicalPathfinder:
+    # HPA*: divide el mapa en clusters de HPA_CLUSTER_SIZE x HPA_CLUSTER_SIZE. En cada borde
+    # entre clusters vecinos, los tramos transitables a ambos lados dan pares de celdas de
+    # entrada (nodos abstractos) unidos por una arista de coste 1. Dentro de cada cluster las
+    # distancias entre sus nodos se calculan con un BFS limitado al cluster la primera vez
+    # que la búsqueda lo atraviesa (o todas con precompute) y quedan guardadas. Una consulta
+    # conecta inicio y meta a los nodos de su cluster, busca con A* en el grafo abstracto y
+    # refina cada tramo con un BFS local solo cuando se pide el camino celda a celda.
+    # En laberintos la distancia Manhattan orienta mal al A*; build_landmarks calcula
+    # distancias abstractas desde unos pocos landmarks (misma técnica ALT que DistanceOracle)
+    # y el A* usa la cota más alta de las dos.
+    # Hay una instancia por regla de movimiento (jugador o enemigo). set_terrain rehace solo
+    # las entradas del cluster tocado y descarta las distancias internas afectadas. Las
+    # distancias de los landmarks no se tiran: antes de la siguiente consulta se corrigen solo
+    # alrededor de los clusters tocados (ver _repair_landmarks) y siguen dando cotas válidas;
+    # build_landmarks las vuelve a dejar exactas.
+    def __init__(self, grid, for_enemy=True, cluster_size=HPA_CLUSTER_SIZE):
+        self.grid = grid
+        self.for_enemy = for_enemy
+        self.walkable = TERRAIN_WALK_ENEMY if for_enemy else TERRAIN_WALK_PLAYER
+        self.rows, self.cols = len(grid), len(grid[0])
+        self.size = cluster_size
+        # Clusters por fila y por columna (los del borde pueden ser más pequeños)
+        self.crows = -(-self.rows // cluster_size)
+        self.ccols = -(-self.cols // cluster_size)
+        # (cluster, cluster vecino a la derecha/abajo) -> pares de entrada (celda, celda)
+        self.border_pairs: Dict[Tuple[int,int], List[Tuple[int,int]]] = {}
+        # Nodo -> nodos del cluster vecino unidos por arista de coste 1
+        self.inter: Dict[int, List[int]] = collections.defaultdict(list)
+        # Cuántos pares de entrada usan cada nodo y nodos de cada cluster
+        self.node_refs = collections.Counter()
+        self.cluster_nodes = [set() for _ in range(self.crows*self.ccols)]
+        # Cluster -> {nodo: [(otro nodo del cluster, distancia)]} (se rellena bajo demanda)
+        self._intra: Dict[int, Dict[int, List[Tuple[int,int]]]] = {}
+        # Landmarks: nodo -> índice compacto y distancias abstractas desde cada landmark
+        self.node_index: Dict[int, int] = {}
+        self.landmark_dist: List[array] = []
+        # Clusters cambiados desde la última corrección de los landmarks
+        self._dirty = set()
+        for k in range(self.crows*self.ccols):
+            cr, cc = divmod(k, self.ccols)
+            if cc+1 < self.ccols:
+                self._set_border(k, k+1, True)
+            if cr+1 < self.crows:
+                self._set_border(k, k+self.ccols, False)
+
+    def cluster_of(self, idx):
+        r, c = divmod(idx, self.cols)
+        return (r // self.size)*self.ccols + c // self.size
+
+    def _bounds(self, k):
+        # Filas y columnas [r0, r1) x [c0, c1) del cluster k
+        cr, cc = divmod(k, self.ccols)
+        r0, c0 = cr*self.size, cc*self.size
+        return r0, c0, min(self.rows, r0+self.size), min(self.cols, c0+self.size)
+
+    def _scan_border(self, k1, vertical):
+        # Pares de entrada entre k1 y su vecino de la derecha (vertical) o de abajo. La
+        # dirección se pasa explícita: con una sola columna de clusters el de abajo también
+        # es k1+1 y no se puede deducir de los índices
+        cols, grid, walk = self.cols, self.grid, self.walkable
+        r0, c0, r1, c1 = self._bounds(k1)
+        if vertical:
+            # Borde vertical: última columna de k1 y primera de k2
+            cells = [(r*cols + c1-1, r*cols + c1) for r in range(r0, r1)]
+        else:
+            # Borde horizontal: última fila de k1 y primera de k2
+            cells = [((r1-1)*cols + c, r1*cols + c) for c in range(c0, c1)]
+        pairs, run = [], []
+        for a, b in cells:
+            if walk[grid[a // cols][a % cols]] and walk[grid[b // cols][b % cols]]:
+                run.append((a, b))
+                continue
+            self._close_run(run, pairs)
+            run = []
+        self._close_run(run, pairs)
+        return pairs
+
+    def _close_run(self, run, pairs):
+        # Un tramo corto tiene una entrada en el centro; uno largo, una en cada extremo
+        if not run:
+            return
+        if len(run) < HPA_ENTRANCE_SPLIT:
+            pairs.append(run[len(run)//2])
+        else:
+            pairs.append(run[0])
+            pairs.append(run[-1])
+
+    def _set_border(self, k1, k2, vertical):
+        # (Re)calcula las entradas del borde entre k1 y k2 (k2 a la derecha si vertical, si no
+        # debajo) y actualiza aristas y nodos de ambos clusters
+        for a, b in self.border_pairs.pop((k1, k2), ()):
+            self.inter[a].remove(b)
+            self.inter[b].remove(a)
+            self._unref(a)
+            self._unref(b)
+        pairs = self._scan_border(k1, vertical)
+        if pairs:
+            self.border_pairs[(k1, k2)] = pairs
+        for a, b in pairs:
+            self.inter[a].append(b)
+            self.inter[b].append(a)
+            self._ref(a)
+            self._ref(b)
+
+    def _ref(self, node):
+        self.node_refs[node] += 1
+        if self.node_refs[node] == 1:
+            self.cluster_nodes[self.cluster_of(node)].add(node)
+
+    def _unref(self, node):
+        self.node_refs[node] -= 1
+        if self.node_refs[node] == 0:
+            del self.node_refs[node]
+            self.cluster_nodes[self.cluster_of(node)].discard(node)
+            if not self.inter[node]:
+                del self.inter[node]
+
+    def _local_bfs(self, k, src, want_parent=False, stop=None):
+        # BFS sin salir del cluster k desde la celda plana src; distancias por índice local.
+        # Con stop (celda plana) termina en cuanto la alcanza.
+        r0, c0, r1, c1 = self._bounds(k)
+        h, w = r1-r0, c1-c0
+        grid, walk = self.grid, self.walkable
+        dist = [-1] * (h*w)
+        parent = [-1] * (h*w) if want_parent else None
+        sr, sc = divmod(src, self.cols)
+        s = (sr-r0)*w + (sc-c0)
+        dist[s] = 0
+        stop_li = -1
+        if stop is not None:
+            tr, tc = divmod(stop, self.cols)
+            stop_li = (tr-r0)*w + (tc-c0)
+        q = collections.deque([s])
+        while q:
+            li = q.popleft()
+            if li == stop_li:
+                break
+            lr, lc = divmod(li, w)
+            nd = dist[li] + 1
+            for nlr, nlc, ok in ((lr-1, lc, lr > 0), (lr+1, lc, lr < h-1), (lr, lc-1, lc > 0), (lr, lc+1, lc < w-1)):
+                if ok:
+                    ni = nlr*w + nlc
+                    if dist[ni] < 0 and walk[grid[r0+nlr][c0+nlc]]:
+                        dist[ni] = nd
+                        if parent is not None:
+                            parent[ni] = li
+                        q.append(ni)
+        return dist, parent
+
+    def _local(self, k, idx):
+        # Índice local de la celda plana idx dentro del cluster k
+        r0, c0, _, c1 = self._bounds(k)
+        r, c = divmod(idx, self.cols)
+        return (r-r0)*(c1-c0) + (c-c0)
+
+    def _links(self, k, src):
+        # Nodos del cluster k alcanzables desde src sin salir de él, con su distancia
+        dist, _ = self._local_bfs(k, src)
+        links = []
+        for node in self.cluster_nodes[k]:
+            d = dist[self._local(k, node)]
+            if d >= 0 and node != src:
+                links.append((node, d))
+        return links, dist
+
+    def cluster_edges(self, k):
+        # Distancias internas entre los nodos del cluster k (calculadas una vez)
+        edges = self._intra.get(k)
+        if edges is None:
+            edges = {node: self._links(k, node)[0] for node in self.cluster_nodes[k]}
+            self._intra[k] = edges
+        return edges
+
+    def precompute(self):
+        # Calcula por adelantado las distancias internas de todos los clusters
+        for k in range(self.crows*self.ccols):
+            self.cluster_edges(k)
+
+    def set_terrain(self, r, c, terrain_id):
+        # Cambia una celda y rehace solo lo afectado: las entradas de los bordes del cluster
+        # y las distancias internas de ese cluster y de sus vecinos. Si hay otra instancia
+        # (la otra regla de movimiento) sobre el mismo grid, también debe recibir el cambio.
+        self.grid[r][c] = terrain_id
+        k = self.cluster_of(r*self.cols + c)
+        cr, cc = divmod(k, self.ccols)
+        touched = {k}
+        for nk, ok, vertical in ((k-1, cc > 0, True), (k+1, cc+1 < self.ccols, True),
+                                 (k-self.ccols, cr > 0, False), (k+self.ccols, cr+1 < self.crows, False)):
+            if ok:
+                self._set_border(min(k, nk), max(k, nk), vertical)
+                touched.add(nk)
+        for t in touched:
+            self._intra.pop(t, None)
+        # Las cotas de los landmarks se corrigen en la siguiente consulta
+        if self.landmark_dist:
+            self._dirty |= touched
+
+    def _repair_landmarks(self):
+        # Las distancias de cada landmark se usan como potencial: |D(u) - D(v)| es cota
+        # inferior de d(u,v) mientras D(v) <= D(u) + w en cada arista (u,v). Las aristas que
+        # no cambiaron siguen cumpliéndolo; solo las de los clusters tocados pueden violarlo.
+        # Se relajan desde sus nodos (como un Dijkstra que solo baja valores) hasta que todas
+        # lo cumplen. Quitar muros propaga hasta donde acorta caminos; ponerlos apenas cuesta,
+        # pero las cotas se quedan más flojas hasta el próximo build_landmarks.
+        dirty, self._dirty = self._dirty, set()
+        index = self.node_index
+        seeds = set()
+        for k in dirty:
+            self.cluster_edges(k)
+            seeds |= self.cluster_nodes[k]
+        # Nodos nuevos (entradas que no existían al elegir los landmarks) empiezan sin cota;
+        # solo pueden aparecer en los bordes rehechos, es decir, en clusters tocados
+        for node in seeds:
+            if node not in index:
+                index[node] = len(index)
+                for dist in self.landmark_dist:
+                    dist.append(HPA_INF)
+        cluster_of, cluster_edges, inter = self.cluster_of, self.cluster_edges, self.inter
+        for dist in self.landmark_dist:
+            heap = [(dist[index[n]], n) for n in seeds if dist[index[n]] != HPA_INF]
+            heapq.heapify(heap)
+            while heap:
+                d, n = heapq.heappop(heap)
+                if d > dist[index[n]]:
+                    continue
+                for succ in (cluster_edges(cluster_of(n)).get(n, ()), [(m, 1) for m in inter.get(n, ())]):
+                    for m, w in succ:
+                        j = index[m]
+                        if d + w < dist[j]:
+                            dist[j] = d + w
+                            heapq.heappush(heap, (d + w, m))
+
+    def _abstract_dijkstra(self, src):
+        # Distancias abstractas desde el nodo src a todos los nodos (por índice compacto)
+        index = self.node_index
+        dist = array('I', [HPA_INF]) * len(index)
+        dist[index[src]] = 0
+        heap = [(0, src)]
+        while heap:
+            d, n = heapq.heappop(heap)
+            if d > dist[index[n]]:
+                continue
+            for m, w in self.cluster_edges(self.cluster_of(n)).get(n, ()):
+                j = index[m]
+                if d + w < dist[j]:
+                    dist[j] = d + w
+                    heapq.heappush(heap, (d + w, m))
+            for m in self.inter.get(n, ()):
+                j = index[m]
+                if d + 1 < dist[j]:
+                    dist[j] = d + 1
+                    heapq.heappush(heap, (d + 1, m))
+        return dist
+
+    def build_landmarks(self, k=HPA_LANDMARKS):
+        # Elige landmarks por "punto más lejano" (como DistanceOracle) y guarda sus distancias
+        # abstractas a todos los nodos; necesita las distancias internas de todos los clusters
+        self.precompute()
+        nodes = list(self.node_refs)
+        self.node_index = {n: i for i, n in enumerate(nodes)}
+        self.landmark_dist = []
+        self._dirty = set()
+        if not nodes:
+            return
+        min_d = array('I', [HPA_INF]) * len(nodes)
+        current = nodes[random.randrange(len(nodes))]
+        for _ in range(k):
+            dist = self._abstract_dijkstra(current)
+            self.landmark_dist.append(dist)
+            best, best_d = None, -1
+            for i, d in enumerate(dist):
+                if d < min_d[i]:
+                    min_d[i] = d
+                # Los inalcanzables (INF) también cuentan: cubren otras componentes
+                if min_d[i] > best_d:
+                    best, best_d = i, min_d[i]
+            if best_d <= 0:
+                break
+            current = nodes[best]
+
+    def abstract_path(self, start, goal):
+        # A* sobre el grafo abstracto: (lista de celdas planas [inicio, nodos..., meta], coste)
+        # o None si no hay camino
+        cols, walk, grid = self.cols, self.walkable, self.grid
+        if not walk[grid[start[0]][start[1]]] or not walk[grid[goal[0]][goal[1]]]:
+            return None
+        s, g = start[0]*cols + start[1], goal[0]*cols + goal[1]
+        if s == g:
+            return [s], 0
+        if self._dirty:
+            self._repair_landmarks()
+        ks, kg = self.cluster_of(s), self.cluster_of(g)
+        # Inicio y meta se enlazan temporalmente a los nodos de su cluster
+        start_links, sdist = self._links(ks, s)
+        if ks == kg and sdist[self._local(kg, g)] >= 0:
+            start_links.append((g, sdist[self._local(kg, g)]))
+        goal_links = dict(self._links(kg, g)[0])
+        gr, gc = goal
+        index = self.node_index
+        # Distancia abstracta de cada landmark a la meta: la meta solo se alcanza por sus
+        # enlaces, así que es el mínimo sobre ellos (exacta en el grafo abstracto)
+        goal_lm = []
+        for dist in self.landmark_dist:
+            dg = HPA_INF
+            for m, w in goal_links.items():
+                dm = dist[index[m]]
+                if dm != HPA_INF and dm + w < dg:
+                    dg = dm + w
+            if dg != HPA_INF:  # Un landmark que no llega a la meta no aporta cota
+                goal_lm.append((dist, dg))
+        hcache = {}  # La heurística de cada nodo se calcula una sola vez por consulta
+
+        def heuristic(m):
+            # Cota inferior: Manhattan o ALT (|d(L,m) - d(L,meta)|), la mayor
+            h = hcache.get(m)
+            if h is not None:
+                return h
+            mr, mc = divmod(m, cols)
+            h = abs(mr-gr) + abs(mc-gc)
+            i = index.get(m)
+            if i is not None:
+                for dist, dg in goal_lm:
+                    dm = dist[i]
+                    if dm == HPA_INF:
+                        continue
+                    if dm - dg > h:
+                        h = dm - dg
+                    elif dg - dm > h:
+                        h = dg - dm
+            hcache[m] = h
+            return h
+
+        best = {s: 0}
+        prev = {s: None}
+        cluster_of, cluster_edges, inter = self.cluster_of, self.cluster_edges, self.inter
+        push, pop = heapq.heappush, heapq.heappop
+        # En empates de f se expande primero el nodo más profundo (-coste): con una
+        # heurística ajustada hay muchos empates y así se va directo a la meta
+        heap = [(heuristic(s), 0, s)]
+        while heap:
+            _, neg, n = pop(heap)
+            cost = -neg
+            if n == g:
+                path = []
+                while n is not None:
+                    path.append(n)
+                    n = prev[n]
+                path.reverse()
+                return path, cost
+            if cost > best[n]:
+                continue
+            succ = start_links if n == s else cluster_edges(cluster_of(n)).get(n, ())
+            steps = [(m, 1) for m in inter.get(n, ())]
+            if n != s and n in goal_links:
+                steps.append((g, goal_links[n]))
+            for succ_list in (succ, steps):
+                for m, w in succ_list:
+                    nc = cost + w
+                    if nc < best.get(m, HPA_INF):
+                        best[m] = nc
+                        prev[m] = n
+                        push(heap, (nc + heuristic(m), -nc, m))
+        return None
+
+    def refine(self, abstract):
+        # Convierte el camino abstracto en celdas (r,c) tramo a tramo, bajo demanda
+        cols = self.cols
+        yield divmod(abstract[0], cols)
+        for u, v in zip(abstract, abstract[1:]):
+            k = self.cluster_of(u)
+            if k != self.cluster_of(v):
+                # Arista entre clusters: celdas adyacentes
+                yield divmod(v, cols)
+                continue
+            # Tramo interno: BFS local desde v y se siguen los padres desde u
+            _, parent = self._local_bfs(k, v, want_parent=True, stop=u)
+            r0, c0, _, c1 = self._bounds(k)
+            w = c1 - c0
+            li = parent[self._local(k, u)]
+            while li >= 0:
+                lr, lc = divmod(li, w)
+                yield r0+lr, c0+lc
+                li = parent[li]
+
+    def find_path(self, start, goal):
+        # Camino completo de start a goal como lista de (r,c) (igual que bfs_shortest_path)
+        found = self.abstract_path(start, goal)
+        if found is None:
+            return None
+        return list(self.refine(found[0]))
+
+    def next_step(self, start, goal):
+        # Primera celda del camino de start a goal (solo se refina el primer tramo); None si no
+        # hay camino o ya está en la meta
+        found = self.abstract_path(start, goal)
+        if found is None or len(found[0]) < 2:
+            return None
+        steps = self.refine(found[0])
+        next(steps)
+        return next(steps)
+
+    def distance(self, start, goal):
+        # Longitud del camino abstracto (sin refinar); None si no hay camino
+        found = self.abstract_path(start, goal)
+        return None if found is None else found[1]
+
+    def node_count(self):
+        return len(self.node_refs)
+
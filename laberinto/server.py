@@ -0,0 +1,277 @@
+# Servidor multijugador: partidas en red sobre la simulación del núcleo
+
+import random
+import json
+import time
+import collections
+from typing import List, Tuple, Optional, Dict
+
+from .core import (INPUT_BUFFER_SIZE, LOGIC_DT, LOGIC_HZ, TERRAIN_WALK_ENEMY,
+                   Simulation, in_bounds)
+
+# ----------------------------
+# Servidor multijugador (asyncio + TCP)
+# ----------------------------
+# Dirección y puerto por defecto del servidor (solo localhost)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+# Cada cuántos ticks se envía un snapshot completo (entre medias solo deltas)
+SNAPSHOT_INTERVAL = 100
+# Duración máxima de una partida en red (segundos de simulación)
+MATCH_MAX_TIME = 300.0
+# Bytes pendientes de envío a partir de los cuales se desconecta a un cliente lento
+MAX_SEND_BUFFER = 256 * 1024
+
+def encode_message(msg):
+    # Serializa un mensaje como una línea JSON compacta (protocolo del servidor)
+    return (json.dumps(msg, separators=(",",":")) + "\n").encode()
+
+class Match(Simulation):
+    # Partida en red en modo "escapa": el rol "runner" controla al jugador y el rol
+    # "hunter" controla al enemigo 0; el resto de enemigos siguen con su IA.
+    def __init__(self, match_id):
+        super().__init__(mode="escapa")
+        self.match_id = match_id
+        # Número de tick de simulación (se envía en cada mensaje de estado)
+        self.tick = 0
+        # Cola de entradas por rol: (dr, dc, sprint, trampa); se consume una por tick
+        self.inputs = {
+            "runner": collections.deque(maxlen=INPUT_BUFFER_SIZE),
+            "hunter": collections.deque(maxlen=INPUT_BUFFER_SIZE),
+        }
+        # Último estado enviado (base para calcular los deltas)
+        self.last_state = None
+        # Rol ganador cuando termina la partida
+        self.winner = None
+
+    def reset_game_state(self):
+        # Igual que en la simulación local, pero el primer enemigo lo controla el cazador
+        super().reset_game_state()
+        self.winner = None
+        if self.enemies:
+            self.enemies[0].controlled = True
+
+    def push_input(self, role, msg):
+        # Valida y encola una entrada recibida del cliente
+        try:
+            dr, dc = (max(-1, min(1, int(v))) for v in msg.get("dir", (0,0)))
+        except (TypeError, ValueError):
+            return
+        self.inputs[role].append((dr, dc, bool(msg.get("sprint")), bool(msg.get("trap"))))
+
+    def step(self):
+        # Avanza un tick aplicando como máximo una entrada por rol
+        # (la del cazador se aplica en enemy_behavior_step cuando puede moverse)
+        rdr, rdc, sprint, trap = self.inputs["runner"].popleft() if self.inputs["runner"] else (0,0,False,False)
+        if trap:
+            self.place_trap()
+        self.logic_step(rdr, rdc, sprint)
+        self.tick += 1
+        # Fin de partida: salida alcanzada, jugador atrapado o tiempo agotado
+        if self.game_over:
+            self.winner = "runner" if self.won else "hunter"
+        elif self.sim_time >= MATCH_MAX_TIME:
+            self.winner = "hunter"
+
+    def enemy_behavior_step(self):
+        # El cazador se mueve con las mismas reglas que los enemigos de IA: cooldown según la
+        # velocidad de la dificultad y ralentización de las trampas. Su entrada espera en la
+        # cola hasta que puede moverse.
+        now = self.sim_time
+        hunter = self.enemies[0] if self.enemies else None
+        if hunter is not None and hunter.alive and self.inputs["hunter"] and self.enemy_ready(hunter, now):
+            hdr, hdc, _, _ = self.inputs["hunter"].popleft()
+            nr, nc = hunter.r + hdr, hunter.c + hdc
+            if (hdr or hdc) and in_bounds(nr,nc) and TERRAIN_WALK_ENEMY[self.grid[nr][nc]]:
+                hunter.r, hunter.c = nr, nc
+                hunter.last_move = now
+        super().enemy_behavior_step()
+
+    def state(self):
+        # Estado dinámico compacto (listas en vez de dicts para reducir bytes)
+        p = self.player
+        return {
+            "t": self.tick,
+            "p": [p.r, p.c, round(p.energy, 1), int(p.score)],
+            "e": [[e.r, e.c, int(e.alive)] for e in self.enemies],
+            "x": [[t.r, t.c] for t in self.traps],
+        }
+
+    def snapshot(self):
+        # Estado completo: mapa, salida y entidades (al unirse y cada SNAPSHOT_INTERVAL ticks)
+        self.last_state = self.state()
+        msg = {"type": "snapshot", "grid": self.grid, "exit": list(self.exit_cell)}
+        msg.update(self.last_state)
+        return msg
+
+    def delta(self):
+        # Solo los campos que cambiaron desde el último estado enviado
+        cur = self.state()
+        prev = self.last_state
+        msg = {"type": "delta", "t": cur["t"]}
+        if prev is None or cur["p"] != prev["p"]:
+            msg["p"] = cur["p"]
+        if prev is None or cur["x"] != prev["x"]:
+            msg["x"] = cur["x"]
+        # Enemigos cambiados como [índice, fila, columna, vivo]
+        changed = [[i] + e for i, e in enumerate(cur["e"]) if prev is None or i >= len(prev["e"]) or e != prev["e"][i]]
+        if changed:
+            msg["e"] = changed
+        self.last_state = cur
+        return msg
+
+class Connection:
+    # Un cliente TCP conectado: flujo de escritura, partida y rol asignados
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.match: Optional[Match] = None
+        self.role: Optional[str] = None
+
+    def send(self, data):
+        # Escritura sin bloquear; asyncio envía el búfer en segundo plano
+        if not self.writer.is_closing():
+            self.writer.write(data)
+
+    def lagging(self):
+        # True si el cliente no consume los datos que se le envían
+        return self.writer.transport.get_write_buffer_size() > MAX_SEND_BUFFER
+
+class GameServer:
+    # Servidor autoritativo: empareja clientes de dos en dos y simula todas las
+    # partidas en un único bucle de ticks a LOGIC_HZ.
+    def __init__(self, host=SERVER_HOST, port=SERVER_PORT):
+        self.host = host
+        self.port = port
+        # Partidas activas: id -> (partida, [conexión runner, conexión hunter])
+        self.matches: Dict[int, Tuple[Match, List[Connection]]] = {}
+        # Cliente esperando rival
+        self.waiting: Optional[Connection] = None
+        self.next_match_id = 0
+
+    async def serve(self):
+        # Arranca el servidor TCP y el bucle de simulación
+        import asyncio
+        server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        print(f"Servidor escuchando en {self.host}:{self.port}")
+        tick_task = asyncio.create_task(self.tick_loop())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            tick_task.cancel()
+
+    async def handle_client(self, reader, writer):
+        # Lee mensajes JSON por línea del cliente y los encola en su partida
+        conn = Connection(reader, writer)
+        self.join(conn)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    continue
+                # JSON válido pero que no es un objeto ([], 1, "x") se ignora igual
+                if not isinstance(msg, dict):
+                    continue
+                if msg.get("type") == "input" and conn.match is not None:
+                    conn.match.push_input(conn.role, msg)
+        except ConnectionError:
+            pass
+        finally:
+            self.leave(conn)
+            writer.close()
+
+    def join(self, conn):
+        # Empareja al cliente con el que está esperando o lo deja en espera
+        if self.waiting is None or self.waiting.writer.is_closing():
+            self.waiting = conn
+            conn.send(encode_message({"type": "wait"}))
+            return
+        runner, hunter = self.waiting, conn
+        self.waiting = None
+        match = Match(self.next_match_id)
+        self.next_match_id += 1
+        runner.match, runner.role = match, "runner"
+        hunter.match, hunter.role = match, "hunter"
+        self.matches[match.match_id] = (match, [runner, hunter])
+        snapshot = encode_message(match.snapshot())
+        for c in (runner, hunter):
+            c.send(encode_message({"type": "welcome", "role": c.role, "match": match.match_id}))
+            c.send(snapshot)
+
+    def leave(self, conn):
+        # Un cliente se fue: si estaba en partida, gana el rival
+        if self.waiting is conn:
+            self.waiting = None
+        match = conn.match
+        if match is not None and match.match_id in self.matches:
+            match.winner = "hunter" if conn.role == "runner" else "runner"
+            self.end_match(match.match_id)
+
+    def end_match(self, match_id):
+        # Notifica el resultado y libera la partida
+        match, conns = self.matches.pop(match_id)
+        msg = encode_message({"type": "end", "winner": match.winner, "score": int(match.player.score)})
+        for c in conns:
+            c.send(msg)
+            c.match = None
+
+    async def tick_loop(self):
+        # Bucle de paso fijo: simula y envía estado de todas las partidas cada LOGIC_DT
+        import asyncio
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            for match_id, (match, conns) in list(self.matches.items()):
+                match.step()
+                if match.tick % SNAPSHOT_INTERVAL == 0:
+                    data = encode_message(match.snapshot())
+                else:
+                    data = encode_message(match.delta())
+                for c in conns:
+                    c.send(data)
+                    # Clientes que no leen se desconectan para no acumular memoria
+                    if c.lagging():
+                        c.writer.close()
+                if match.winner is not None:
+                    self.end_match(match_id)
+            next_tick += LOGIC_DT
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+def bench_server(num_matches=200, ticks=200):
+    # Mide el coste por tick de simulación y de serialización de num_matches partidas
+    # sin red, con entradas aleatorias, para estimar cuántas caben en un proceso.
+    matches = [Match(i) for i in range(num_matches)]
+    sim_time = ser_time = 0.0
+    delta_bytes = 0
+    snapshot_bytes = len(encode_message(matches[0].snapshot()))
+    dirs = [(0,0), (-1,0), (1,0), (0,-1), (0,1)]
+    for _ in range(ticks):
+        for m in matches:
+            m.push_input("runner", {"dir": random.choice(dirs), "sprint": random.random() < 0.2, "trap": random.random() < 0.02})
+            m.push_input("hunter", {"dir": random.choice(dirs)})
+        t0 = time.perf_counter()
+        for m in matches:
+            m.step()
+        t1 = time.perf_counter()
+        for m in matches:
+            delta_bytes += len(encode_message(m.delta()))
+        t2 = time.perf_counter()
+        sim_time += t1 - t0
+        ser_time += t2 - t1
+        # Las partidas terminadas se reinician para mantener la carga constante
+        for m in matches:
+            if m.winner is not None:
+                m.reset_game_state()
+    steps = num_matches * ticks
+    per_tick = (sim_time + ser_time) / steps
+    print(f"Partidas: {num_matches}, ticks: {ticks}")
+    print(f"Simulación por partida y tick: {sim_time/steps*1e6:.1f} us")
+    print(f"Serialización por partida y tick: {ser_time/steps*1e6:.1f} us")
+    print(f"Delta medio: {delta_bytes/steps:.1f} bytes, snapshot: {snapshot_bytes} bytes")
+    print(f"Partidas sostenibles a {LOGIC_HZ} ticks/s en un proceso: {int(1.0/(per_tick*LOGIC_HZ))}")
+
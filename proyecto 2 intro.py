@@ -2,539 +2,249 @@
 
 
 
-# Importa la librería pygame para gráficos y manejo de eventos
-import pygame
 # Importa módulo random para operaciones aleatorias
 import random
-# Importa json para guardar/leer puntuaciones en formato JSON
-import json
 # Importa time para mediciones temporales simples
 import time
-# Importa collections por si se usan estructuras como deque, Counter, etc.
-import collections
 # Importa os para operaciones con sistema de archivos (rutas, existencias)
 import os
 # Importaciones de tipos para anotaciones estáticas (List, Tuple, Optional, Dict)
 from typing import List, Tuple, Optional, Dict
 
-# ----------------------------
-# Configuración general
-# ----------------------------
-# Ancho de la ventana en píxeles
-WINDOW_WIDTH = 960
-# Alto de la ventana en píxeles
-WINDOW_HEIGHT = 720
-# Número de filas de la cuadrícula lógica
-GRID_ROWS = 20
-# Número de columnas de la cuadrícula lógica
-GRID_COLS = 25
-# Tamaño en píxeles de cada celda visible de la cuadrícula
-CELL_SIZE = 28  # cuadrícula visible
-# Cuadros por segundo objetivo (velocidad de actualización)
-FPS = 20
-
-# colores (tuplas RGB)
-WHITE = (255,255,255)
-BLACK = (0,0,0)
-GRAY = (160,160,160)
-DARKGRAY = (70,70,70)
-GREEN = (50,200,50)
-RED = (200,50,50)
-BLUE = (50,50,200)
-YELLOW = (230,230,30)
-BROWN = (150,100,50)
-PURPLE = (160,60,200)
-
-# Nombre de archivo donde se guardan las puntuaciones
-SCORES_FILE = "scores.json"
-
-# ----------------------------
-# Terrenos (cada uno como clase)
-# ----------------------------
-# Clase base que representa un tipo de terreno en la cuadrícula
-class Terrain:
-    # Identificador numérico del terreno (por defecto 0)
-    id: int = 0
-    # Nombre legible del terreno
-    name: str = "Terrain"
-    # Indica si el jugador puede caminar sobre este terreno
-    walkable_for_player = True
-    # Indica si los enemigos pueden caminar sobre este terreno
-    walkable_for_enemy = True
-    # Color por defecto para representar el terreno en pantalla
-    color = GRAY
-
-    # Representación en string de la clase/instancia (útil para depuración)
-    def __repr__(self):
-        return f"{self.name}"
-
-# Subclase que representa un camino transitable por ambos
-class Camino(Terrain):
-    # Identificador específico de Camino
-    id = 0
-    # Nombre legible
-    name = "Camino"
-    # Jugador puede caminar
-    walkable_for_player = True
-    # Enemigos pueden caminar
-    walkable_for_enemy = True
-    # Color visual del camino
-    color = (200,200,200)
-
-# Subclase que representa un muro no transitable
-class Muro(Terrain):
-    # Identificador de Muro
-    id = 1
-    # Nombre legible
-    name = "Muro"
-    # Jugador NO puede caminar
-    walkable_for_player = False
-    # Enemigo NO puede caminar
-    walkable_for_enemy = False
-    # Color visual del muro
-    color = (60,60,60)
-
-# Subclase que representa lianas (obstáculo para jugador, transitable por enemigo)
-class Lianas(Terrain):
-    # Identificador de Lianas
-    id = 2
-    # Nombre legible
-    name = "Lianas"
-    # Jugador NO puede caminar (ej. requiere herramienta)
-    walkable_for_player = False
-    # Enemigos SÍ pueden moverse por las lianas
-    walkable_for_enemy = True
-    # Color representativo
-    color = (34,139,34)
-
-# Subclase que representa túnel (transitable por jugador, bloquea enemigos)
-class Tunel(Terrain):
-    # Identificador de Tunel
-    id = 3
-    # Nombre legible
-    name = "Tunel"
-    # Jugador puede pasar por túnel
-    walkable_for_player = True
-    # Enemigos NO pueden pasar
-    walkable_for_enemy = False
-    # Color representativo del túnel
-    color = (135,206,235)
-# Diccionario que asocia IDs numéricos de terreno con sus clases correspondientes.
-TERRAINS = {
-    0: Camino,   # Terreno transitable para jugador y enemigos
-    1: Muro,     # Terreno bloqueante para ambos
-    2: Lianas,   # Bloquea al jugador, permite enemigos
-    3: Tunel,    # Permite jugador, bloquea enemigos
-}
-
-# ----------------------------
-# Utilidades de mapa y generación
-# ----------------------------
-
-# Función que verifica si una celda (r,c) está dentro de los límites válidos del grid
-def in_bounds(r,c):
-    # Retorna True si fila y columna están dentro del rango permitido
-    return 0 <= r < GRID_ROWS and 0 <= c < GRID_COLS
-
-# Generador que retorna vecinos ortogonales válidos (arriba, abajo, izquierda, derecha)
-def neighbors(r,c):
-    # Recorre desplazamientos verticales y horizontales
-    for dr,dc in [(-1,0),(1,0),(0,-1),(0,1)]:
-        # Calcula nueva posición vecina
-        nr, nc = r+dr, c+dc
-        # Si el vecino está dentro del grid, se produce mediante yield
-        if in_bounds(nr,nc):
-            yield nr, nc
-
-# Función principal que genera un laberinto y añade terrenos especiales
-def generate_maze_with_features() -> List[List[int]]:
-    # Crea una matriz llena de muros (1 = muro)
-    grid = [[1 for _ in range(GRID_COLS)] for __ in range(GRID_ROWS)]
-
-    # Función interna recursiva que excava el laberinto usando DFS
-    def carve(r,c):
-        # Lista de direcciones en saltos de 2 celdas (propio del maze generation)
-        dirs = [(-2,0),(2,0),(0,-2),(0,2)]
-        # Mezcla las direcciones para obtener laberintos distintos cada vez
-        random.shuffle(dirs)
-        # Itera sobre las direcciones en orden aleatorio
-        for dr,dc in dirs:
-            # Nueva posición candidata
-            nr, nc = r+dr, c+dc
-            # Si está dentro del grid y la celda destino aún es muro → se puede excavar
-            if 0 <= nr < GRID_ROWS and 0 <= nc < GRID_COLS and grid[nr][nc]==1:
-                # Abre la celda final al convertirla en camino
-                grid[nr][nc] = 0
-                # Abre también la celda intermedia para conectar túnel
-                grid[r+dr//2][c+dc//2] = 0
-                # Llamada recursiva para extender el maze desde la nueva celda
-                carve(nr,nc)
-
-    # Determina celda inicial para el DFS, idealmente en posiciones impares del grid
-    sr = 1 if GRID_ROWS>2 else 0
-    sc = 1 if GRID_COLS>2 else 0
-    # Marca celda inicial como camino
-    grid[sr][sc] = 0
-    # Genera el laberinto desde esa celda
-    carve(sr,sc)
-
-    # Tras el DFS, la matriz contiene un laberinto perfecto (0 caminos, 1 muros).
-    # Ahora se reemplazan algunos caminos por túneles o lianas con cierta probabilidad.
-    for r in range(GRID_ROWS):
-        for c in range(GRID_COLS):
-            # Solo modificamos si la celda es camino
-            if grid[r][c] == 0:
-                # Se toma un valor aleatorio para determinar el tipo de terreno
-                p = random.random()
-                # 5% de probabilidad de tunel
-                if p < 0.05:
-                    grid[r][c] = 3  # tunel
-                # 7% siguiente de probabilidad de lianas
-                elif p < 0.12:
-                    grid[r][c] = 2  # lianas
-                else:
-                    # El resto sigue siendo camino
-                    grid[r][c] = 0  
-            else:
-                # Los muros permanecen como muros
-                grid[r][c] = 1
-
-    # No se seleccionan aquí salida ni inicio; solo se retorna el grid generado
-    return grid
-
-# Encuentra aleatoriamente una celda que pertenezca a un conjunto de tipos permitidos
-def find_random_cell_of_type(grid, allowed_types=[0]):
-    # Intentos aleatorios para encontrar una celda válida
-    tries = 0
-    while tries < 1000:
-        # Selecciona una fila aleatoria
-        r = random.randrange(GRID_ROWS)
-        # Selecciona una columna aleatoria
-        c = random.randrange(GRID_COLS)
-        # Verifica si la celda tiene un tipo permitido
-        if grid[r][c] in allowed_types:
-            return r,c
-        # Incrementa contador
-        tries += 1
-
-    # Si falló en modo aleatorio, recorre secuencialmente toda la matriz
-    for r in range(GRID_ROWS):
-        for c in range(GRID_COLS):
-            # Retorna la primera celda compatible que encuentre
-            if grid[r][c] in allowed_types:
-                return r,c
-
-    # Si no se encuentra ninguna, se retorna un fallback (0,0)
-    return 0,0
-
-# ----------------------------
-# Pathfinding: BFS en terreno permitido
-# ----------------------------
-def bfs_shortest_path(grid, start, goal, for_enemy=True):
-    # Se crea una cola doble (deque) para implementar BFS
-    q = collections.deque()
-    # Se inicializa la cola con la posición inicial
-    q.append(start)
-
-    # Diccionario que almacena de dónde venimos para reconstruir el camino
-    prev = {start: None}
-
-    # Mientras haya nodos por explorar
-    while q:
-        cur = q.popleft()   # Se obtiene la posición actual desde el frente de la cola
-        # Si ya alcanzamos la meta, debemos reconstruir el camino
-        if cur == goal:
-            path = []   # Lista para guardar el camino
-            # Comenzamos desde la meta y seguimos los padres hacia atrás
-            node = cur
-            while node:
-                path.append(node)
-                node = prev[node]
-            path.reverse()  # Como se reconstruye al revés, se invierte
-            return path
-
-        # Extraemos fila y columna actual
-        r,c = cur
-
-        # Recorremos vecinos válidos 
-        for nr,nc in neighbors(r,c):
-            # Solo procesamos vecinos no visitados previamente
-            if (nr,nc) not in prev:
-                # Obtenemos el tipo de terreno numérico
-                t = grid[nr][nc]
-                # Obtenemos la clase de terreno asociada
-                cls = TERRAINS.get(t, Camino)
-
-                # Según si el BFS es para enemigo o para jugador, revisamos si ese terreno es transitable
-                if for_enemy:
-                    # Caminable por enemigo
-                    if cls.walkable_for_enemy:
-                        prev[(nr,nc)] = cur
-                        q.append((nr,nc))
-                else:
-                    # Caminable por jugador
-                    if cls.walkable_for_player:
-                        prev[(nr,nc)] = cur
-                        q.append((nr,nc))
-    # Si se agotó BFS (Busaqueda por amplitud) sin encontrar ruta, no hay camino posible
-    return None
-
-class Player:
-    def __init__(self, r, c, name="Player"):
-        # Posición de la celda del jugador
-        self.r = r
-        self.c = c
-        # Nombre del jugador
-        self.name = name
-
-        # Energía actual y máxima del jugador
-        self.energy = 100.0
-        self.max_energy = 100.0
-
-        # Coste por segundo de usar sprint
-        self.sprint_cost = 25.0
-        # Velocidad al hacer sprint (tiles por tick)
-        self.sprint_speed = 2
-        # Velocidad normal del jugador
-        self.base_speed = 1
-
-        # Bandera que indica si el jugador está esprintando
-        self.sprinting = False
-
-        # Número de trampas que puede colocar
-        self.traps_available = 3
-        # Tiempo mínimo entre colocaciones
-        self.trap_cooldown = 5.0
-        # Última vez en que colocó una trampa
-        self.last_trap_time = -999.0
-
-        # Puntuación acumulada
-        self.score = 0
-
-        # Estado de vida (para terminar juego)
-        self.alive = True
-
-    # Determina si el jugador puede o no colocar una trampa
-    def can_place_trap(self, now, active_traps_count):
-        # Limitación: máximo 3 trampas activas simultáneamente
-        if active_traps_count >= 3:
-            return False
-        # Limitación de cooldown entre uso
-        if now - self.last_trap_time < self.trap_cooldown:
-            return False
-        # Si pasó el cooldown y no hay exceso de trampas, puede colocar
-        return True
-
-class Enemy:
-    def __init__(self, r, c, id_=0):
-        # Posición del enemigo
-        self.r = r
-        self.c = c
-        # ID para distinguir enemigos
-        self.id = id_
-
-        # Si está vivo (puede morir por trampas)
-        self.alive = True
-
-        # Cuando muere se programa un respawn (segundos en el futuro)
-        self.respawn_time = None
-
-        # Velocidad del enemigo en tiles por tick
-        self.speed = 1
-
-        # Enemigos se mueven cada cierto tiempo (cooldown en segundos)
-        self.move_cooldown = 1.0
-
-        # Última vez que se movió
-        self.last_move = 0.0
-
-    # Retorna la posición como tupla (r,c)
-    def as_tuple(self):
-        return (self.r, self.c)
-
-class Trap:
-    def __init__(self, r,c, placed_time):
-        # Trampa colocada en una celda específica
-        self.r = r
-        self.c = c
-        # Momento exacto en que fue puesta (para expiración)
-        self.placed_time = placed_time
-        
-        
-        
-# ----------------------------
-# Manejo de puntuacion
-# ----------------------------
-def load_scores():
-    # Verifica si existe el archivo de puntajes
-    if os.path.exists(SCORES_FILE):
-        try:
-            # Intenta cargarlo y devolver su contenido dict
-            with open(SCORES_FILE,"r") as f:
-                return json.load(f)
-        except Exception:
-            pass
-    # Si no existe o falla lectura, crea estructura base con dos modos
-    # "escapa" y "cazador" cada uno con una lista de puntajes
-    return {"escapa": [], "cazador": []}
-
-def save_scores(scores):
-    # Guarda la estructura de puntajes en JSON con indentación
-    with open(SCORES_FILE,"w") as f:
-        json.dump(scores, f, indent=2)
-
-def update_top(scores, mode_key, player_name, score):
-    # Obtiene el arreglo de puntajes de un modo concreto
-    arr = scores.get(mode_key, [])
-    # Añade el nuevo puntaje
-    arr.append({"name":player_name, "score":score})
-
-    # Ordena de mayor a menor puntaje y toma solo los 5 mejores
-    arr = sorted(arr, key=lambda x: x["score"], reverse=True)[:5]
-
-    # Actualiza estructura
-    scores[mode_key] = arr
-
-    # Guarda cambios
-    save_scores(scores)
-
+# Marca de tiempo al cargar el módulo (para medir el tiempo hasta el primer cuadro)
+MODULE_LOAD_TIME = time.perf_counter()
+
+# Reglas, mapas y puntuaciones viven en el paquete laberinto (importable sin pygame desde
+# el servidor, el entrenamiento y las pruebas); este script solo dibuja y lee el teclado
+from laberinto.core import (
+    CONFIG_FILE, WINDOW_WIDTH, WINDOW_HEIGHT, GRID_ROWS, GRID_COLS, CELL_SIZE, FPS, LOGIC_DT, RENDER_FPS,
+    MAX_FRAME_TIME, WHITE, BLACK, DARKGRAY, GREEN, RED, BLUE, YELLOW, PREVIEW_SCALE,
+    MINIMAP_MIN_CELLS, MINIMAP_WIDTH, MAX_TRAPS, HUD_TOP, TERRAIN_COLORS, TRAP_TYPES,
+    EV_GAME_END, Enemy, Leaderboard, Simulation, TelemetrySink, generate_maze_with_features)
+
+# La librería pygame (gráficos y eventos) solo la necesita Game; se importa al abrir la
+# ventana para que las opciones sin ventana (servidor, análisis, mediciones) no la carguen
+pygame = None
+
+def load_pygame():
+    # Importa pygame e inicializa solo los subsistemas que usa el juego (vídeo y fuentes),
+    # no audio ni joystick como haría pygame.init()
+    global pygame
+    if pygame is None:
+        import pygame as pg
+        pygame = pg
+        pygame.display.init()
+        pygame.font.init()
+        # Teclas de dirección que se guardan en el buffer de entrada: tecla -> (dr, dc)
+        DIRECTION_KEYS.update({
+            pygame.K_UP: (-1,0), pygame.K_w: (-1,0),
+            pygame.K_DOWN: (1,0), pygame.K_s: (1,0),
+            pygame.K_LEFT: (0,-1), pygame.K_a: (0,-1),
+            pygame.K_RIGHT: (0,1), pygame.K_d: (0,1),
+        })
+    return pygame
+
+# Teclas de dirección del buffer de entrada (se rellena en load_pygame)
+DIRECTION_KEYS: Dict[int, Tuple[int,int]] = {}
+
+# Fuentes ya creadas por tamaño (SysFont busca en las fuentes del sistema y es lento)
+_font_cache: Dict[int, object] = {}
+
+def get_font(size):
+    # Devuelve (y guarda) la fuente Arial del tamaño indicado
+    font = _font_cache.get(size)
+    if font is None:
+        font = pygame.font.SysFont("Arial", size)
+        _font_cache[size] = font
+    return font
+
+def build_minimap_surface(grid, scale):
+    # Construye la imagen del mapa escribiendo un byte (id de terreno) por celda en un
+    # buffer con paleta, en lugar de llamar a pygame.draw.rect por cada celda, y la
+    # escala con pygame.transform.scale (scale = píxeles por celda).
+    rows, cols = len(grid), len(grid[0])
+    indices = bytes(v for row in grid for v in row)
+    small = pygame.image.frombuffer(indices, (cols, rows), "P")
+    # Paleta de 256 colores: los ids de terreno indexan TERRAIN_COLORS
+    small.set_palette(TERRAIN_COLORS + [BLACK]*(256 - len(TERRAIN_COLORS)))
+    # scale crea una superficie nueva, así no depende del buffer temporal
+    return pygame.transform.scale(small, (cols*scale, rows*scale))
 
 def draw_text(surface, text, x, y, size=20, color=WHITE):
-    # Crea una fuente del sistema usando Arial y tamaño indicado
-    font = pygame.font.SysFont("Arial", size)
+    # Obtiene la fuente del sistema usando Arial y tamaño indicado (cacheada)
+    font = get_font(size)
     # Renderiza el texto en color especificado
     text_surf = font.render(text, True, color)
     # Dibuja el texto en la superficie (pantalla o subsuperficie)
     surface.blit(text_surf, (x,y))
 
+# ----------------------------
+# Sprites de entidades (atlas)
+# ----------------------------
+# Cuadros de animación por sprite y duración de cada cuadro (segundos de simulación)
+SPRITE_FRAMES = 4
+SPRITE_FRAME_TIME = 0.15
+# Píxeles que encoge la figura en cada cuadro (pulso suave: normal, -1, -2, -1)
+SPRITE_PULSE = (0, 1, 2, 1)
+# Tinte del enemigo ralentizado por una trampa de red
+SLOWED_COLOR = (120,90,220)
+# Color clave (transparente) del atlas: ningún sprite lo usa
+SPRITE_KEY = (255,0,255)
+
+class SpriteAtlas:
+    # Todas las imágenes de entidades pre-dibujadas en una sola superficie: una fila por
+    # variante (entidad + tinte de estado) y una columna por cuadro de animación, cada
+    # una de cell x cell píxeles para blitearla en la esquina de la celda. Al dibujar
+    # solo se eligen sprites ya hechos y se pasan todos juntos a Surface.blits().
+    def __init__(self, cell, trap_colors):
+        self.cell = cell
+        # Variantes: (clave, función que pinta la figura, tinte, contorno amarillo)
+        variants = [("player", self._paint_square(4), BLUE, False)]
+        # Enemigos: índice = 2*ralentizado + ve al jugador
+        for slowed in (False, True):
+            for alert in (False, True):
+                variants.append((("enemy", slowed, alert), self._paint_square(6),
+                                 SLOWED_COLOR if slowed else RED, alert))
+        # Trampas: una fila por tipo, tintada con el color del tipo
+        for i, color in enumerate(trap_colors):
+            variants.append((("trap", i), self._paint_circle(), color, False))
+        # Los sprites son opacos salvo el fondo, que lleva el color clave (transparente)
+        self.surface = pygame.Surface((cell*SPRITE_FRAMES, cell*len(variants)))
+        self.surface.fill(SPRITE_KEY)
+        for row, (key, paint, tint, outline) in enumerate(variants):
+            for f in range(SPRITE_FRAMES):
+                # La figura se pinta en blanco y se multiplica por el tinte
+                tile = pygame.Surface((cell, cell), pygame.SRCALPHA)
+                paint(tile, SPRITE_PULSE[f])
+                tile.fill(tint + (255,), special_flags=pygame.BLEND_RGBA_MULT)
+                # El contorno de alerta no pulsa ni se tinta
+                if outline:
+                    pygame.draw.rect(tile, YELLOW, (4, 4, cell-8, cell-8), 2)
+                self.surface.blit(tile, (f*cell, row*cell))
+        # Con ventana abierta se convierte al formato de la pantalla (sin conversión por blit)
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+        # Clave -> sprites, uno por cuadro. Cada uno es una copia de su celda del atlas con
+        # color clave y RLE: blitear una superficie RLE entera copia solo los tramos
+        # visibles, mientras que blitear un área del atlas no aprovecha el RLE y cuesta
+        # más que el pygame.draw de antes
+        self.frames: Dict[object, List[object]] = {}
+        for row, (key, _, _, _) in enumerate(variants):
+            sprites = []
+            for f in range(SPRITE_FRAMES):
+                sprite = self.surface.subsurface((f*cell, row*cell, cell, cell)).copy()
+                sprite.set_colorkey(SPRITE_KEY, pygame.RLEACCEL)
+                sprites.append(sprite)
+            self.frames[key] = sprites
+        # Accesos directos para el bucle de dibujado
+        self.player = self.frames["player"]
+        self.enemy = [self.frames[("enemy", s, a)] for s in (False, True) for a in (False, True)]
+        self.trap = [self.frames[("trap", i)] for i in range(len(trap_colors))]
+
+    def _paint_square(self, inset):
+        # Cuadrado blanco con margen inset (más el pulso del cuadro)
+        cell = self.cell
+        def paint(tile, pulse):
+            m = inset + pulse
+            pygame.draw.rect(tile, WHITE, (m, m, cell - 2*m, cell - 2*m))
+        return paint
+
+    def _paint_circle(self):
+        # Círculo blanco centrado de radio cell/3 (menos el pulso del cuadro)
+        cell = self.cell
+        def paint(tile, pulse):
+            pygame.draw.circle(tile, WHITE, (cell//2, cell//2), cell//3 - pulse)
+        return paint
+
+# Atlas ya construidos por (tamaño de celda, colores de los tipos de trampa)
+_atlas_cache: Dict[tuple, SpriteAtlas] = {}
+
+def get_sprite_atlas(cell=CELL_SIZE):
+    # Devuelve (y guarda) el atlas; se reconstruye solo si cambian los tipos de trampa
+    trap_colors = tuple(tuple(t.color) for t in sorted(TRAP_TYPES.values(), key=lambda t: t.index))
+    key = (cell, trap_colors)
+    atlas = _atlas_cache.get(key)
+    if atlas is None:
+        atlas = SpriteAtlas(cell, trap_colors)
+        _atlas_cache[key] = atlas
+    return atlas
+
 # ----------------------------
 # Clase del juego (principal)
 # ----------------------------
-class Game:
-    # Constructor de la clase Game: inicializa Pygame, ventana, estado y valores por defecto
+class Game(Simulation):
+    # Constructor de la clase Game: estado y valores por defecto. No toca pygame: la
+    # ventana se abre en open_window y el mapa y las puntuaciones se cargan tras el
+    # primer cuadro (finish_startup), así el menú aparece lo antes posible.
     def __init__(self):
-        # Inicializa todos los módulos de pygame
-        pygame.init()
-        # Establece el título de la ventana
-        pygame.display.set_caption("Escapa / Cazador")
-        # Crea la ventana con tamaño predeterminado (WINDOW_WIDTH, WINDOW_HEIGHT)
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-        # Reloj para controlar FPS y tiempos
-        self.clock = pygame.time.Clock()
+        # Ventana, reloj y fuente (se crean en open_window)
+        self.screen = None
+        self.clock = None
+        self.font = None
         # Flag para el bucle principal del juego
         self.running = True
 
-        # Estado general del juego
-        # Genera un laberinto/mapa con características (función externa)
-        self.grid = generate_maze_with_features()
-        # Modo actual de la interfaz: 'menu', 'escapa', 'cazador', 'playing', 'gameover'
-        self.mode = "menu"
-        # Nombre del jugador (se completa en registro)
-        self.player_name = None
-
-        # Entidades dinámicas del juego (se crearán en reset_game_state)
-        self.player: Optional[Player] = None
-        self.enemies: List[Enemy] = []
-        self.traps: List[Trap] = []
-        # Carga puntuaciones/leaderboard desde almacenamiento persistente
-        self.scores = load_scores()
-        # Marca de tiempo de inicio (para medir tiempo jugado)
-        self.start_time = time.time()
-        # Tiempo transcurrido acumulado
-        self.elapsed_time = 0.0
-
-        # Ajustes de control / dificultad por defecto
-        self.num_enemies = 4
-        # Factor usado como cooldown de movimiento (más bajo = más rápido)
-        self.enemy_speed = 1.0
-        self.difficulty = "Normal"
+        # Puntuaciones/leaderboard (se cargan en finish_startup)
+        self.leaderboard: Optional[Leaderboard] = None
+        self.telemetry: Optional[TelemetrySink] = None
+        self.scores = {"escapa": [], "cazador": []}
+        # Puesto (posición, total) y mejor marca de la última partida terminada
+        self.last_rank = (0, 0)
+        self.last_best = None
+        # Tiempo desde que se cargó el módulo hasta el primer cuadro (segundos)
+        self.first_frame_time: Optional[float] = None
+        # Fracción del tick actual usada para interpolar posiciones al dibujar
+        self.render_alpha = 1.0
 
         # Contador de frames (puede usarse para animaciones, ticks, etc.)
         self.frame_count = 0
 
         # Campos usados por el menú / registro
         self.input_text = ""
-        # Fuente por defecto para textos del menú
-        self.font = pygame.font.SysFont("Arial", 20)
+        # Caché de la miniatura del mapa (mapa del que se generó, escala y superficie)
+        self._minimap_grid = None
+        self._minimap_scale = None
+        self._minimap = None
 
         # Posiciones/layout: origen donde se dibuja la rejilla
         self.grid_origin = (20,20)
         # Posición X del HUD (a la derecha de la rejilla)
         self.hud_x = self.grid_origin[0] + GRID_COLS*CELL_SIZE + 20
-
+        # Tabla columna/fila -> píxel de la esquina de la celda (evita recalcular por entidad)
+        self.cell_x = [self.grid_origin[0] + c*CELL_SIZE for c in range(GRID_COLS)]
+        self.cell_y = [self.grid_origin[1] + r*CELL_SIZE for r in range(GRID_ROWS)]
+        # Blits de enemigos ya calculados: (tiempo de simulación, cuadro), lista de enemigos
+        # de la que salieron, quietos listos para blits() y (enemigo, sprite) de los que se mueven
+        self._enemy_layer_key = None
+        self._enemy_layer_src = None
+        self._enemy_static = []
+        self._enemy_moving = []
+
+        # Estado de la simulación (mapa, jugador, enemigos, trampas); el mapa se difiere
+        super().__init__(defer_map=True)
+
+    # Abre la ventana inicializando solo los subsistemas de pygame necesarios
+    def open_window(self):
+        load_pygame()
+        # Establece el título de la ventana
+        pygame.display.set_caption("Escapa / Cazador")
+        # Crea la ventana con tamaño predeterminado (WINDOW_WIDTH, WINDOW_HEIGHT)
+        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        # Reloj para controlar FPS y tiempos
+        self.clock = pygame.time.Clock()
+        # Fuente por defecto para textos del menú
+        self.font = get_font(20)
+
+    # Trabajo de arranque que puede esperar al primer cuadro: puntuaciones y mapa
+    def finish_startup(self):
+        # Abre el leaderboard (migra scores.json la primera vez); el HUD lee su top en caché
+        self.leaderboard = Leaderboard()
+        self.scores = self.leaderboard.top_cache
+        # Telemetría en segundo plano (archivos gzip JSONL en TELEMETRY_DIR)
+        self.telemetry = TelemetrySink(self.events).start()
         # Crea el estado inicial del mapa, jugador y enemigos
         self.reset_game_state()
 
-    # Reinicia o inicializa el estado del juego (mapa, jugador, enemigos, trampas)
-    def reset_game_state(self):
-        # Regenera el laberinto con características (puertas, lianas, etc.)
-        self.grid = generate_maze_with_features()
-        # Selecciona aleatoriamente una celda de tipo transitable (camino o túnel) para el jugador
-        pr, pc = find_random_cell_of_type(self.grid, allowed_types=[0,3])
-        # Inicializa la celda de salida con la posición del jugador (se buscará una lejana)
-        exit_r, exit_c = pr, pc
-        # Calcula la celda más lejana (Manhattan) para colocar la salida
-        maxdist = -1
-        for r in range(GRID_ROWS):
-            for c in range(GRID_COLS):
-                # Considera solo celdas transitables (0=camino, 3=túnel)
-                if self.grid[r][c] in (0,3):
-                    dist = abs(r-pr) + abs(c-pc)
-                    # Si la distancia es mayor, actualiza la celda de salida
-                    if dist > maxdist:
-                        exit_r, exit_c = r, c
-                        maxdist = dist
-        # Asegura conectividad entre jugador y salida: intenta buscar un camino válido
-        attempts = 0
-        while True:
-            # Busca el camino más corto desde player a exit (para pathfinding de jugador)
-            path = bfs_shortest_path(self.grid, (pr,pc), (exit_r,exit_c), for_enemy=False)
-            # Si existe un camino, salimos del bucle
-            if path:
-                break
-            # Si no hay camino, se reintenta hasta un límite, regenerando mapa si es necesario
-            attempts += 1
-            if attempts > 8:
-                # Forzar nueva generación de mapa y nuevos puntos de inicio/salida
-                self.grid = generate_maze_with_features()
-                pr,pc = find_random_cell_of_type(self.grid, allowed_types=[0,3])
-                exit_r, exit_c = find_random_cell_of_type(self.grid, allowed_types=[0,3])
-                attempts = 0
-            else:
-                # Cambia la celda de salida por otra aleatoria y vuelve a verificar
-                exit_r, exit_c = find_random_cell_of_type(self.grid, allowed_types=[0,3])
-
-        # Crea la entidad Player en la posición elegida; usa player_name si existe o "ANON"
-        self.player = Player(pr,pc,self.player_name or "ANON")
-        # Guarda la celda de salida
-        self.exit_cell = (exit_r, exit_c)
-        # Lista de enemigos vacía (se llenará a continuación)
-        self.enemies = []
-        # Coloca enemigos en celdas permisibles (no demasiado cerca del jugador)
-        placed = 0
-        tries = 0
-        while placed < self.num_enemies and tries < 1000:
-            # Busca celdas donde los enemigos puedan aparecer (lianas o caminos)
-            er, ec = find_random_cell_of_type(self.grid, allowed_types=[0,2])
-            # Solo coloca si la distancia Manhattan al jugador es mayor a 6 (evita spawn inmediato)
-            if abs(er-pr)+abs(ec-pc) > 6:
-                # Crea enemigo con id incremental
-                self.enemies.append(Enemy(er,ec, id_=placed))
-                placed += 1
-            tries += 1
-        # Si no se colocó ninguno (caso raro), los genera en bordes como fallback
-        if not self.enemies:
-            for i in range(self.num_enemies):
-                self.enemies.append(Enemy(0, i*2+1, id_=i))
-
-        # Inicializa lista de trampas vacía
-        self.traps = []
-        # Reinicia tiempo de inicio
-        self.start_time = time.time()
-        # Flags de estado de juego
-        self.game_over = False
-        self.won = False
-
     # Dibuja y maneja la pantalla de registro (entrada de nombre y selección de modo)
     def handle_registration(self):
         # Limpia la pantalla pintando fondo negro
@@ -553,26 +263,38 @@ class Game:
         draw_text(self.screen, "Presione 2 para Modo CAZADOR (cazar).", 50, 170)
         # Instrucciones para regenerar/actualizar el mapa si el usuario lo desea
         draw_text(self.screen, "Presione R para generar/actualizar mapa aleatorio", 50, 210)
-        # Crea una superficie pequeña para previsualizar el mapa actual (miniatura)
-        preview_surface = pygame.Surface((GRID_COLS*6, GRID_ROWS*6))
-        # Llena la miniatura con negro como fondo
-        preview_surface.fill(BLACK)
-        # Recorre cada celda de la rejilla para pintar la miniatura
-        for r in range(GRID_ROWS):
-            for c in range(GRID_COLS):
-                # Obtiene el valor de terreno en la celda
-                val = self.grid[r][c]
-                # Mapea el valor a la clase de terreno (fallback Camino)
-                cls = TERRAINS.get(val, Camino)
-                # Obtiene el color asociado al tipo de terreno
-                color = cls.color
-                # Dibuja un rectángulo pequeño representando la celda en la miniatura
-                pygame.draw.rect(preview_surface, color, (c*6, r*6, 6, 6))
-        # Blitea la miniatura en la ventana principal en posición (500,80)
-        self.screen.blit(preview_surface, (500, 80))
+        # Dificultad actual y tecla para cambiarla
+        draw_text(self.screen, f"Presione TAB para cambiar dificultad: {self.difficulty}", 50, 240)
+        # Miniatura del mapa (en el primer cuadro el mapa aún no existe); se construye
+        # una vez por mapa y en los demás cuadros solo se blitea
+        if self.grid is not None:
+            # Blitea la miniatura en la ventana principal en posición (500,80)
+            self.screen.blit(self.get_minimap(PREVIEW_SCALE), (500, 80))
         # Actualiza la pantalla para mostrar todo lo dibujado en este método
         pygame.display.flip()
 
+    # Devuelve la imagen del mapa actual con la escala pedida (cacheada por mapa)
+    def get_minimap(self, scale):
+        # La caché guarda el propio grid: se reconstruye solo si se generó un mapa nuevo
+        if self._minimap_grid is not self.grid or self._minimap_scale != scale:
+            self._minimap = build_minimap_surface(self.grid, scale)
+            self._minimap_grid = self.grid
+            self._minimap_scale = scale
+        return self._minimap
+
+    # Minimapa del HUD para mapas grandes: terreno cacheado y solo los puntos de entidades por cuadro
+    def draw_minimap(self, x, y):
+        scale = max(1, MINIMAP_WIDTH // GRID_COLS)
+        self.screen.blit(self.get_minimap(scale), (x, y))
+        dot = max(2, scale)
+        # salida, enemigos vivos y jugador como puntos de color
+        er, ec = self.exit_cell
+        self.screen.fill(YELLOW, (x + ec*scale, y + er*scale, dot, dot))
+        for e in self.enemies:
+            if e.alive:
+                self.screen.fill(RED, (x + e.c*scale, y + e.r*scale, dot, dot))
+        self.screen.fill(BLUE, (x + self.player.c*scale, y + self.player.r*scale, dot, dot))
+
     def draw_grid(self):
         # obtiene origen de dibujo (offset) en pantalla
         ox, oy = self.grid_origin
@@ -582,10 +304,8 @@ class Game:
             for c in range(GRID_COLS):
                 # valor numérico del terreno en la celda (ej. camino, muro, liana, túnel...)
                 val = self.grid[r][c]
-                # obtiene la clase/definición del terreno a partir del mapa TERRAINS (fallback Camino)
-                cls = TERRAINS.get(val, Camino)
-                # color asociado al tipo de terreno
-                color = cls.color
+                # color asociado al tipo de terreno (tabla compilada desde la configuración)
+                color = TERRAIN_COLORS[val]
                 # rectángulo donde se dibujará la celda (se deja 1px de separación visual)
                 rect = pygame.Rect(ox + c*CELL_SIZE, oy + r*CELL_SIZE, CELL_SIZE-1, CELL_SIZE-1)
                 # dibuja la celda en pantalla con su color
@@ -596,25 +316,49 @@ class Game:
         pygame.draw.rect(self.screen, YELLOW, (ox + ec*CELL_SIZE, oy + er*CELL_SIZE, CELL_SIZE-1, CELL_SIZE-1))
 
     def draw_entities(self):
-        # obtiene offsets de dibujo
-        ox, oy = self.grid_origin
-        # dibuja jugador: obtiene posición de fila/columna
-        pr,pc = self.player.r, self.player.c
-        # dibuja rectángulo azul representando al jugador (ligeramente inset para verse mejor)
-        pygame.draw.rect(self.screen, BLUE, (ox + pc*CELL_SIZE+4, oy + pr*CELL_SIZE+4, CELL_SIZE-8, CELL_SIZE-8))
-        # dibuja enemigos
-        for e in self.enemies:
-            # solo dibuja si el enemigo está vivo
-            if e.alive:
-                # rectángulo rojo para enemigo (más pequeño que el jugador por margen visual)
-                pygame.draw.rect(self.screen, RED, (ox + e.c*CELL_SIZE+6, oy + e.r*CELL_SIZE+6, CELL_SIZE-12, CELL_SIZE-12))
-        # dibuja trampas
-        for t in self.traps:
-            # dibuja un círculo morado centrado en la celda de la trampa
-            pygame.draw.circle(self.screen, PURPLE, (ox + t.c*CELL_SIZE+CELL_SIZE//2, oy + t.r*CELL_SIZE+CELL_SIZE//2), CELL_SIZE//3)
-            
-       
-def draw_hud(self):
+        # Dibuja trampas, enemigos y jugador con sprites del atlas: una llamada a
+        # Surface.blits() por capa en lugar de un pygame.draw por entidad
+        atlas = get_sprite_atlas()
+        cell_x, cell_y = self.cell_x, self.cell_y
+        # desplazamiento en píxeles por celda de diferencia, según la fracción del tick de
+        # lógica transcurrida (0 = posición anterior, 1 = actual)
+        step = self.render_alpha*CELL_SIZE
+        # cuadro de animación global (tiempo de simulación interpolado); cada entidad lo
+        # desfasa con su id o su celda para que no pulsen todas a la vez
+        frame = int((self.sim_time + self.render_alpha*LOGIC_DT) / SPRITE_FRAME_TIME)
+        # capa de trampas (debajo), del color de su tipo
+        trap_frames = atlas.trap
+        self.screen.blits([(trap_frames[t.type.index][(frame + t.r + t.c) % SPRITE_FRAMES], (cell_x[t.c], cell_y[t.r]))
+                           for t in self.traps], doreturn=False)
+        # capa de enemigos vivos. Su estado solo cambia en los ticks de lógica y el cuadro de
+        # animación cada SPRITE_FRAME_TIME, así que la lista de blits de los que están quietos
+        # se reutiliza entre cuadros; solo los que se mueven se interpolan en cada cuadro
+        # (posición desde la tabla celda -> píxel)
+        key = (self.sim_time, frame)
+        if self._enemy_layer_key != key or self._enemy_layer_src is not self.enemies:
+            enemy_frames = atlas.enemy
+            now = self.sim_time
+            static, moving = [], []
+            for e in self.enemies:
+                if not e.alive:
+                    continue
+                # variante según estado (ralentizado, viendo al jugador) y cuadro desfasado
+                sprite = enemy_frames[2*(now < e.slow_until) + e.sees_player][(frame + e.id) % SPRITE_FRAMES]
+                if e.r == e.prev_r and e.c == e.prev_c:
+                    static.append((sprite, (cell_x[e.c], cell_y[e.r])))
+                else:
+                    moving.append((e, sprite))
+            self._enemy_layer_key, self._enemy_layer_src = key, self.enemies
+            self._enemy_static, self._enemy_moving = static, moving
+        self.screen.blits(self._enemy_static, doreturn=False)
+        self.screen.blits([(sprite, (cell_x[e.prev_c] + int((e.c - e.prev_c)*step), cell_y[e.prev_r] + int((e.r - e.prev_r)*step)))
+                           for e, sprite in self._enemy_moving], doreturn=False)
+        # capa del jugador (encima de todo)
+        p = self.player
+        self.screen.blit(atlas.player[frame % SPRITE_FRAMES],
+                         (cell_x[p.prev_c] + int((p.c - p.prev_c)*step), cell_y[p.prev_r] + int((p.r - p.prev_r)*step)))
+
+    def draw_hud(self):
         # posición horizontal del HUD
         x = self.hud_x
         # posición vertical inicial
@@ -626,6 +370,9 @@ def draw_hud(self):
         # muestra el modo actual (ESCAPA o CAZADOR)
         draw_text(self.screen, f"Modo: {'ESCAPA' if self.mode=='escapa' else 'CAZADOR'}", x, y)
         y += 30
+        # muestra el perfil de dificultad activo
+        draw_text(self.screen, f"Dificultad: {self.difficulty}", x, y)
+        y += 30
         # etiqueta para la barra de energía
         draw_text(self.screen, "Energía:", x, y)
         y += 20
@@ -640,189 +387,68 @@ def draw_hud(self):
         draw_text(self.screen, f"Puntos: {int(self.player.score)}", x, y)
         y += 30
         # muestra cuántas trampas activas hay actualmente (máx visual 3)
-        draw_text(self.screen, f"Trampas activas: {len(self.traps)} / 3", x, y)
+        draw_text(self.screen, f"Trampas activas: {len(self.traps)} / {MAX_TRAPS}", x, y)
+        y += 30
+        # tipo de trampa seleccionado (T para cambiarlo)
+        draw_text(self.screen, f"Trampa (T): {self.trap_type}", x, y)
         y += 30
-        # muestra tiempo transcurrido desde el inicio de la partida
-        draw_text(self.screen, f"Tiempo: {int(time.time() - self.start_time)}s", x, y)
+        # muestra tiempo de simulación transcurrido desde el inicio de la partida
+        draw_text(self.screen, f"Tiempo: {int(self.sim_time)}s", x, y)
         y += 40
-        # encabezado TOP 5 modo ESCAPA
-        draw_text(self.screen, "TOP 5 ESCAPA", x, y)
+        # encabezado del top del modo ESCAPA
+        draw_text(self.screen, f"TOP {HUD_TOP} ESCAPA", x, y)
         y += 20
         # itera sobre la lista de scores del modo 'escapa' (si existe) y los dibuja
         for sc in self.scores.get("escapa", []):
             draw_text(self.screen, f"{sc['name']}: {sc['score']}", x, y)
             y += 18
         y += 8
-        # encabezado TOP 5 modo CAZADOR
-        draw_text(self.screen, "TOP 5 CAZADOR", x, y)
+        # encabezado del top del modo CAZADOR
+        draw_text(self.screen, f"TOP {HUD_TOP} CAZADOR", x, y)
         y += 20
         # itera sobre la lista de scores del modo 'cazador' (si existe) y los dibuja
         for sc in self.scores.get("cazador", []):
             draw_text(self.screen, f"{sc['name']}: {sc['score']}", x, y)
             y += 18
+        # minimapa solo en mapas grandes (en los normales la rejilla completa ya es visible)
+        if GRID_ROWS*GRID_COLS >= MINIMAP_MIN_CELLS:
+            self.draw_minimap(x, y + 20)
 
-def place_trap(self):
-        # obtiene tiempo actual
-        now = time.time()
-        # verifica si el jugador puede colocar una trampa según sus reglas (cooldown y tope)
-        if self.player.can_place_trap(now, len(self.traps)):
-            # agrega una trampa en la posición actual del jugador con marca de tiempo
-            self.traps.append(Trap(self.player.r, self.player.c, now))
-            # actualiza el último tiempo de trampa del jugador para aplicar cooldown
-            self.player.last_trap_time = now
-            # la cantidad de trampas activas queda controlada por len(self.traps)
-            return True
-        # si no se puede, retorna False
-        return False
-
-def enemy_respawn_check(self):
-        # obtiene tiempo actual
-        now = time.time()
-        # recorre todos los enemigos
-        for e in self.enemies:
-            # si el enemigo no está vivo y tiene tiempo de reaparición definido
-            if not e.alive and e.respawn_time is not None and now >= e.respawn_time:
-                # busca una celda aleatoria permitida para reaparecer (camino o liana)
-                r,c = find_random_cell_of_type(self.grid, allowed_types=[0,2])
-                # actualiza posición del enemigo
-                e.r, e.c = r,c
-                # marca como vivo de nuevo
-                e.alive = True
-                # limpia el tiempo de reaparición
-                e.respawn_time = None
-
-def move_player(self, dr, dc, sprinting=False):
-        # calcula nueva fila/columna destino según el desplazamiento pedido
-        nr, nc = self.player.r + dr, self.player.c + dc
-        # si está fuera de los límites, no hace nada
-        if not in_bounds(nr,nc):
-            return
-        # obtiene el valor de terreno de la celda destino
-        tval = self.grid[nr][nc]
-        # obtiene la clase/definición del terreno
-        cls = TERRAINS.get(tval, Camino)
-        # si el terreno permite caminar al jugador
-        if cls.walkable_for_player:
-            # actualiza la posición del jugador
-            self.player.r, self.player.c = nr, nc
-            # consumo de energía si está esprintando
-            if sprinting:
-                # reduce energía proporcional al coste de sprint por frame (se divide por FPS)
-                self.player.energy -= (self.player.sprint_cost / FPS)
-                # si la energía baja de 0, la fija a 0 y desactiva sprinting
-                if self.player.energy < 0:
-                    self.player.energy = 0
-                    self.player.sprinting = False
-            else:
-                # si no sprinta, recupera energía lentamente (1% del máximo por movimiento)
-                self.player.energy = min(self.player.max_energy, self.player.energy + (self.player.max_energy*0.01))
-        else:
-            # si el terreno no es caminable, no cambia nada (bloqueado)
-            pass
-def enemy_behavior_step(self):
-        # obtiene tiempo actual para controlar cooldowns
-        now = time.time()
-        # recorre cada enemigo
-        for e in self.enemies:
-            # si el enemigo está muerto, se salta su lógica
-            if not e.alive:
-                continue
-            # aplica cooldown de movimiento: si no ha pasado suficiente tiempo, omitir
-            if now - e.last_move < (e.move_cooldown * (1.0/self.enemy_speed)):
-                continue
-            # actualiza la marca del último movimiento al tiempo actual
-            e.last_move = now
-            # comportamiento según el modo actual del juego
-            if self.mode == "escapa":
-                # en modo "escapa" los enemigos persiguen al jugador:
-                # calculamos el camino más corto (BFS) desde enemigo hasta jugador
-                path = bfs_shortest_path(self.grid, (e.r,e.c), (self.player.r,self.player.c), for_enemy=True)
-                # si existe un camino y tiene al menos un paso hacia adelante
-                if path and len(path) >= 2:
-                    # toma el siguiente nodo en el camino y mueve al enemigo allí
-                    nr,nc = path[1]
-                    e.r, e.c = nr, nc
-            elif self.mode == "cazador":
-                # en modo "cazador" los enemigos huyen del jugador:
-                # se elige el vecino que aumente la distancia Manhattan y sea transitable
-                best = (e.r, e.c)
-                best_dist = abs(e.r - self.player.r) + abs(e.c - self.player.c)
-                # itera sobre vecinos válidos (función neighbors devuelve celdas adyacentes)
-                for nr,nc in neighbors(e.r,e.c):
-                    # obtiene la clase de terreno de la celda vecina
-                    cls = TERRAINS.get(self.grid[nr][nc], Camino)
-                    # solo considera celdas por las que los enemigos pueden moverse
-                    if cls.walkable_for_enemy:
-                        # calcula la distancia Manhattan desde ese vecino hasta el jugador
-                        d = abs(nr - self.player.r) + abs(nc - self.player.c)
-                        # si la distancia es mayor que la mejor conocida, la actualiza
-                        if d > best_dist:
-                            best_dist = d
-                            best = (nr,nc)
-                # mueve al enemigo a la mejor posición encontrada (o lo deja donde estaba)
-                e.r, e.c = best
-
-def check_collisions(self):
-        # obtiene tiempo actual (puede usarse para efectos temporales)
-        now = time.time()
-        # detecta colisiones entre enemigos y trampas (las trampas matan enemigos)
-        # recorremos copia implícita iterando sobre self.enemies (se modifican self.traps)
-        for e in self.enemies:
-            if e.alive:
-                for t in self.traps:
-                    # si el enemigo está exactamente sobre la trampa
-                    if (e.r, e.c) == (t.r, t.c):
-                        # el enemigo muere
-                        e.alive = False
-                        # fija tiempo de reaparición 10s en el futuro
-                        e.respawn_time = now + 10.0
-                        # intenta eliminar la trampa (puede ya haberse removido)
-                        try:
-                            self.traps.remove(t)
-                        except ValueError:
-                            # si falla la eliminación, se ignora el error
-                            pass
-                        # bonificación de puntuación por matar enemigo con trampa
-                        self.player.score += 50
-                        # sale del bucle de trampas para este enemigo
-                        break
-        # detecta colisiones donde el enemigo atrapa al jugador (o jugador atrapa en cazador)
-        for e in self.enemies:
-            # solo considerar enemigos vivos
-            if e.alive and (e.r, e.c) == (self.player.r, self.player.c):
-                if self.mode == "escapa":
-                    # en modo ESCAPA, si un enemigo alcanza al jugador -> pérdida
-                    self.game_over = True
-                    self.won = False
-                elif self.mode == "cazador":
-                    # en modo CAZADOR, si el jugador alcanza al enemigo -> puntuación y respawn
-                    self.player.score += 100
-                    e.alive = False
-                    # reaparición más rápida en modo cazador (3s)
-                    e.respawn_time = time.time() + 3.0
-        # verifica si el jugador llegó a la salida (solo relevante en ESCAPA)
-        if (self.player.r, self.player.c) == self.exit_cell and self.mode == "escapa":
-            # si llegó a la salida, marca juego terminado y victoria
-            self.game_over = True
-            self.won = True
-
-def update_scores_on_end(self):
-        # calcula tiempo total transcurrido desde el inicio de la partida
-        total_time = int(time.time() - self.start_time)
+    def update_scores_on_end(self):
+        # calcula tiempo total de simulación transcurrido desde el inicio de la partida
+        total_time = int(self.sim_time)
         if self.mode == "escapa":
             # en ESCAPA, los puntos base disminuyen con el tiempo (menos tiempo = más puntos)
             base = max(0, 1000 - total_time*3)
             points = base + int(self.player.score)
-            # actualiza el ranking/top con el puntaje calculado
-            update_top(self.scores, "escapa", self.player.name, points)
-            return points
         else:
             # en CAZADOR, los puntos ya están acumulados en self.player.score
             points = int(self.player.score)
-            # actualiza el ranking/top correspondiente
-            update_top(self.scores, "cazador", self.player.name, points)
-            return points
-def run(self):
+        # guarda la partida en el historial (con dificultad y semilla del mapa)
+        self.leaderboard.record(self.player.name, self.mode, points,
+                                difficulty=self.difficulty, seed=self.seed, duration=self.sim_time)
+        # puesto obtenido y mejor marca del jugador para la pantalla final
+        self.last_rank = (self.leaderboard.rank(self.mode, points), self.leaderboard.count(self.mode))
+        self.last_best = self.leaderboard.personal_best(self.player.name, self.mode)
+        return points
+
+    def run(self):
+        # Abre la ventana si aún no existe
+        if self.screen is None:
+            self.open_window()
+        try:
+            # Primer cuadro: el menú se dibuja antes de generar el mapa y cargar puntuaciones
+            if self.grid is None:
+                self.handle_registration()
+                self.first_frame_time = time.perf_counter() - MODULE_LOAD_TIME
+                self.finish_startup()
+            self.main_loop()
+        finally:
+            # Al salir (también si el bucle lanza una excepción) vuelca la telemetría pendiente
+            if self.telemetry is not None:
+                self.telemetry.stop()
+
+    def main_loop(self):
         # Bucle principal mientras el juego esté corriendo
         while self.running:
             # Si estamos en el menú/registro
@@ -861,6 +487,9 @@ def run(self):
                         # Tecla R: regenera mapa aleatorio (actualiza vista previa)
                         elif event.key == pygame.K_r:
                             self.grid = generate_maze_with_features()
+                        # Tecla TAB: pasa al siguiente perfil de dificultad (no se usa para escribir el nombre)
+                        elif event.key == pygame.K_TAB:
+                            self.cycle_difficulty()
                         else:
                             # Para cualquier otra tecla imprimible, la agrega al input_text
                             ch = event.unicode
@@ -886,19 +515,23 @@ def run(self):
                     elif event.key == pygame.K_SPACE:
                         if self.mode == "escapa":
                             self.place_trap()
+                    # T cambia el tipo de trampa
+                    elif event.key == pygame.K_t:
+                        self.cycle_trap_type()
+                    # Teclas de dirección: se guardan para que ningún toque rápido se pierda
+                    elif event.key in DIRECTION_KEYS:
+                        self.input_buffer.append(DIRECTION_KEYS[event.key])
                 # Aquí podrían agregarse eventos de ratón u otros
+            # Si se volvió al menú, no se simula ni dibuja la partida en este cuadro
+            if self.mode == "menu":
+                continue
 
-            # Obtiene el estado de teclas actuales
+            # Obtiene el estado de teclas actuales (teclas mantenidas)
             keys = pygame.key.get_pressed()
             # Determina si el jugador está intentando sprintar (Shift izquierdo o derecho)
-            sprinting = keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]
-            # Activa o desactiva la bandera de sprint según energía disponible
-            if sprinting and self.player.energy > 0:
-                self.player.sprinting = True
-            else:
-                self.player.sprinting = False
+            sprint_held = keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]
 
-            # Manejo de movimiento: dr, dc serán -1, 0 o 1
+            # Manejo de movimiento mantenido: dr, dc serán -1, 0 o 1
             dr = dc = 0
             # Arriba/W
             if keys[pygame.K_UP] or keys[pygame.K_w]:
@@ -913,34 +546,12 @@ def run(self):
             elif keys[pygame.K_RIGHT] or keys[pygame.K_d]:
                 dc = 1
 
-            # Si hubo intento de movimiento
-            if dr != 0 or dc != 0:
-                # Determina multiplicador de pasos: sprint_speed si sprintando, sino 1
-                speed_multiplier = self.player.sprint_speed if self.player.sprinting else 1
-                # Ejecuta movimientos repetidos según el multiplicador (si sprint permite múltiple)
-                for step in range(speed_multiplier):
-                    # Mueve jugador paso a paso (consumo de energía y comprobaciones internas)
-                    self.move_player(dr, dc, sprinting=self.player.sprinting)
-
-            # Paso de IA de enemigos (decisiones y desplazamientos)
-            self.enemy_behavior_step()
-
-            # Lógica de reaparición de enemigos caídos
-            self.enemy_respawn_check()
-
-            # Comprobación de colisiones (trampas, enemigos, salida)
-            self.check_collisions()
-
-            # Reglas adicionales de fin de juego para modo 'cazador'
-            if self.mode == "cazador":
-                # Si algún enemigo llega a la salida, penaliza al jugador y hace respawn
-                for e in self.enemies:
-                    if e.alive and (e.r, e.c) == self.exit_cell:
-                        # Aplica penalización en el puntaje
-                        self.player.score -= 50
-                        # Marca enemigo como muerto temporalmente y programa reaparición
-                        e.alive = False
-                        e.respawn_time = time.time() + 5.0
+            # Ejecuta tantos ticks de lógica de duración fija como tiempo real se haya acumulado
+            while self.accumulator >= LOGIC_DT and not self.game_over:
+                self.logic_step(dr, dc, sprint_held)
+                self.accumulator -= LOGIC_DT
+            # Fracción del siguiente tick ya transcurrida (para interpolar el dibujado)
+            self.render_alpha = min(1.0, self.accumulator / LOGIC_DT)
 
             # ---------- DIBUJADO ----------
             # Limpia pantalla con color de fondo (negro)
@@ -958,6 +569,7 @@ def run(self):
             if self.game_over:
                 # Actualiza ranking y obtiene puntos finales
                 final_points = self.update_scores_on_end()
+                self.events.publish(EV_GAME_END, self.sim_time, int(self.won), -1, final_points)
                 # Muestra pantalla de fin de juego con puntos
                 self.show_game_over(final_points)
                 # Reinicia estado para volver al menú
@@ -969,12 +581,13 @@ def run(self):
                 # Continúa el bucle (saltando tick)
                 continue
 
-            # Controla FPS del bucle principal
-            self.clock.tick(FPS)
+            # Controla FPS del dibujado y acumula el tiempo real para la lógica
+            frame_time = self.clock.tick(RENDER_FPS) / 1000.0
+            self.accumulator += min(frame_time, MAX_FRAME_TIME)
             # Incrementa contador de frames global
             self.frame_count += 1
 
-def show_game_over(self, points):
+    def show_game_over(self, points):
         # Crea una superficie semi-transparente como overlay
         overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
         # Ajusta alpha para efecto semi-oscuro
@@ -991,6 +604,9 @@ def show_game_over(self, points):
             draw_text(self.screen, "HAS SIDO CAPTURADO / PERDISTE", 140, 200, size=36, color=WHITE)
         # Muestra puntos finales en pantalla
         draw_text(self.screen, f"Puntos finales: {points}", 320, 300, size=28, color=WHITE)
+        # Puesto en el ranking del modo y mejor marca personal
+        rank, total = self.last_rank
+        draw_text(self.screen, f"Puesto #{rank} de {total}  -  Tu mejor marca: {self.last_best}", 220, 340, color=WHITE)
         # Indica al usuario cómo regresar al menú
         draw_text(self.screen, "Presiona cualquier tecla para regresar al menú", 220, 400)
         # Refresca la pantalla para que se vea el overlay
@@ -1007,18 +623,182 @@ def show_game_over(self, points):
                 elif event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
                     waiting = False
             # Mantiene baja tasa de refresco mientras espera
-            self.clock.tick(10)       
-            
-            
+            self.clock.tick(10)
+
+# ----------------------------
+# Medición del dibujado de entidades
+# ----------------------------
+def bench_sprites(num_enemies=500, frames=300):
+    # Compara el dibujado con el atlas (Surface.blits por capa) con el anterior, que hacía
+    # un pygame.draw por entidad, en una partida con num_enemies enemigos
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    rng = random.Random(0)
+    game = Game()
+    game.open_window()
+    game.reset_game_state()
+    # Enemigos en celdas al azar: la mitad moviéndose, algunos ralentizados o alertados
+    game.enemies = []
+    for i in range(num_enemies):
+        r, c = rng.randrange(1, GRID_ROWS-1), rng.randrange(1, GRID_COLS-1)
+        e = Enemy(r, c, id_=i)
+        if i % 2:
+            e.prev_r, e.prev_c = r + rng.choice((-1, 1)), c
+        e.sees_player = i % 5 == 0
+        e.slow_until = 1e9 if i % 7 == 0 else -1.0
+        game.enemies.append(e)
+    ttypes = list(TRAP_TYPES.values())
+    for i in range(MAX_TRAPS*4):
+        game.traps.place(rng.randrange(1, GRID_ROWS-1), rng.randrange(1, GRID_COLS-1), 0.0, ttypes[i % len(ttypes)], game.grid)
+
+    def draw_immediate():
+        # Dibujado anterior: coordenadas recalculadas y una llamada de pygame.draw por entidad
+        ox, oy = game.grid_origin
+        a = game.render_alpha
+        p = game.player
+        pr = p.prev_r + (p.r - p.prev_r)*a
+        pc = p.prev_c + (p.c - p.prev_c)*a
+        pygame.draw.rect(game.screen, BLUE, (ox + int(pc*CELL_SIZE)+4, oy + int(pr*CELL_SIZE)+4, CELL_SIZE-8, CELL_SIZE-8))
+        for e in game.enemies:
+            if e.alive:
+                er = e.prev_r + (e.r - e.prev_r)*a
+                ec = e.prev_c + (e.c - e.prev_c)*a
+                pygame.draw.rect(game.screen, RED, (ox + int(ec*CELL_SIZE)+6, oy + int(er*CELL_SIZE)+6, CELL_SIZE-12, CELL_SIZE-12))
+                if e.sees_player:
+                    pygame.draw.rect(game.screen, YELLOW, (ox + int(ec*CELL_SIZE)+4, oy + int(er*CELL_SIZE)+4, CELL_SIZE-8, CELL_SIZE-8), 2)
+        for t in game.traps:
+            pygame.draw.circle(game.screen, t.type.color, (ox + t.c*CELL_SIZE+CELL_SIZE//2, oy + t.r*CELL_SIZE+CELL_SIZE//2), CELL_SIZE//3)
+
+    def timed(fn):
+        # Tres cuadros por tick de lógica (RENDER_FPS / LOGIC_HZ), como en la partida
+        game.sim_time = 0.0
+        t = time.perf_counter()
+        for f in range(frames):
+            if f % 3 == 0:
+                game.sim_time += LOGIC_DT
+            game.render_alpha = (f % 3) / 3
+            fn()
+        return (time.perf_counter() - t) / frames * 1000
+
+    t = time.perf_counter()
+    get_sprite_atlas()
+    print(f"Atlas construido en {(time.perf_counter()-t)*1000:.1f} ms")
+    print(f"Entidades: {num_enemies} enemigos, {len(game.traps)} trampas, {frames} cuadros")
+    before = timed(draw_immediate)
+    print(f"  pygame.draw por entidad: {before:.3f} ms/cuadro")
+    after = timed(game.draw_entities)
+    print(f"  atlas + blits por capa: {after:.3f} ms/cuadro ({before/after:.1f}x)")
+
+# ----------------------------
+# Medición del arranque
+# ----------------------------
+def bench_startup(runs=5):
+    # Mide en procesos nuevos el tiempo de importar este script y el tiempo hasta el
+    # primer cuadro del menú, y lista los imports más costosos según -X importtime.
+    # Los procesos corren en una carpeta temporal (con una copia de config.json) para que
+    # scores.db y telemetry/ de la medición no ensucien la carpeta del juego; el paquete
+    # laberinto se encuentra por PYTHONPATH.
+    import shutil
+    import subprocess
+    import sys
+    import tempfile
+    path = os.path.abspath(__file__)
+    here = os.path.dirname(path)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")])))
+    load = ("import importlib.util,time;t=time.perf_counter();"
+            f"spec=importlib.util.spec_from_file_location('juego',{path!r});"
+            "m=importlib.util.module_from_spec(spec);spec.loader.exec_module(m);")
+    import_code = load + "print(time.perf_counter()-t)"
+    frame_code = load + ("g=m.Game();g.open_window();g.handle_registration();"
+                         "print(time.perf_counter()-t);t=time.perf_counter();g.finish_startup();"
+                         "print(time.perf_counter()-t)")
+    imports, frames, deferred = [], [], []
+    with tempfile.TemporaryDirectory() as work:
+        config = os.path.join(here, CONFIG_FILE)
+        if os.path.exists(config):
+            shutil.copy(config, work)
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, "-c", import_code], capture_output=True, text=True, check=True, cwd=work, env=env)
+            imports.append(float(out.stdout.split()[-1]))
+            out = subprocess.run([sys.executable, "-c", frame_code], capture_output=True, text=True, check=True, cwd=work, env=env)
+            first, rest = out.stdout.split()[-2:]
+            frames.append(float(first))
+            deferred.append(float(rest))
+        # Imports más costosos (tiempo acumulado) del último proceso con -X importtime
+        out = subprocess.run([sys.executable, "-X", "importtime", "-c", import_code], capture_output=True, text=True, check=True, cwd=work, env=env)
+    costs = []
+    for line in out.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            name = parts[2].rstrip()
+            # Solo imports de primer nivel (sin sangría)
+            if name.startswith(" ") and not name.startswith("  "):
+                costs.append((int(parts[1]), name.strip()))
+    print(f"Importar el script: {min(imports)*1000:.1f} ms (mejor de {runs})")
+    print(f"Hasta el primer cuadro del menú: {min(frames)*1000:.1f} ms")
+    print(f"Trabajo diferido tras el primer cuadro (mapa y puntuaciones): {min(deferred)*1000:.1f} ms")
+    print("Imports más costosos:")
+    for us, name in sorted(costs, reverse=True)[:8]:
+        print(f"  {name}: {us/1000:.1f} ms")
+
 # ----------------------------
 # correr juego
 # ----------------------------
 if __name__ == "__main__":
-    # Intento rápido de ejecutar el juego y capturar errores de inicio
-    try:
-        g = Game()
-        g.run()
-    except Exception as e:
-        # Informativo por consola si ocurre un error al iniciar
-        print("Error al iniciar el juego:", e)
-        print("Asegúrate de tener pygame instalado: pip install pygame")
+    # Argumentos de línea de comandos (sin argumentos se abre el juego normal)
+    import argparse
+    # Constantes del servidor para los valores por defecto (el módulo no importa asyncio)
+    from laberinto.server import SERVER_HOST, SERVER_PORT
+    parser = argparse.ArgumentParser(description="Escapa / Cazador")
+    parser.add_argument("--server", action="store_true", help="ejecuta el servidor multijugador")
+    parser.add_argument("--host", default=SERVER_HOST, help="dirección del servidor")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="puerto del servidor")
+    parser.add_argument("--bench-server", type=int, metavar="PARTIDAS", help="mide el coste por tick de N partidas")
+    parser.add_argument("--bench-env", type=int, metavar="ENTORNOS", help="mide pasos por segundo del VecEnv")
+    parser.add_argument("--bench-startup", action="store_true", help="mide importación y tiempo hasta el primer cuadro")
+    parser.add_argument("--bench-leaderboard", type=int, metavar="PARTIDAS", help="mide consultas del leaderboard con N partidas guardadas")
+    parser.add_argument("--bench-sprites", type=int, metavar="ENEMIGOS", help="mide el dibujado de entidades con N enemigos")
+    parser.add_argument("--bench-hpa", type=int, metavar="LADO", help="compara HPA* con BFS plano en un mapa LADO x LADO")
+    parser.add_argument("--analyze", type=int, metavar="MAPAS", help="analiza N mapas generados (o los N primeros de --load)")
+    parser.add_argument("--load", metavar="ARCHIVO", help="JSONL con mapas a analizar ({\"seed\": n} o {\"grid\": [...]})")
+    parser.add_argument("--out", default="maze_stats.jsonl", help="archivo JSONL de resultados del análisis")
+    parser.add_argument("--workers", type=int, help="procesos para el análisis (por defecto, uno por CPU)")
+    parser.add_argument("--seed-start", type=int, default=0, help="primera semilla a analizar")
+    parser.add_argument("--ticks", type=int, default=200, help="ticks a simular en los benchmarks")
+    args = parser.parse_args()
+
+    if args.server:
+        import asyncio
+        try:
+            from laberinto.server import GameServer
+            asyncio.run(GameServer(args.host, args.port).serve())
+        except KeyboardInterrupt:
+            pass
+    elif args.bench_server:
+        from laberinto.server import bench_server
+        bench_server(args.bench_server, args.ticks)
+    elif args.bench_env:
+        from laberinto.env import bench_vecenv
+        bench_vecenv(args.bench_env, args.ticks)
+    elif args.bench_startup:
+        bench_startup()
+    elif args.bench_leaderboard:
+        from laberinto.bench import bench_leaderboard
+        bench_leaderboard(args.bench_leaderboard)
+    elif args.bench_hpa:
+        from laberinto.bench import bench_hpa
+        bench_hpa(args.bench_hpa)
+    elif args.bench_sprites:
+        bench_sprites(args.bench_sprites)
+    elif args.analyze or args.load:
+        from laberinto.analysis import analyze_mazes
+        analyze_mazes(args.analyze, args.out, args.workers, args.seed_start, args.load)
+    else:
+        # Intento rápido de ejecutar el juego y capturar errores de inicio
+        try:
+            g = Game()
+            g.run()
+        except Exception as e:
+            # Informativo por consola si ocurre un error al iniciar
+            print("Error al iniciar el juego:", e)
+            print("Asegúrate de tener pygame instalado: pip install pygame")
+
@@ -0,0 +1,55 @@
+# Pruebas del analizador de mapas con mapas cargados de otro tamaño que la ventana
+import random
+
+import pytest
+
+from laberinto.analysis import MazeStatsSummary, analyze_maze, count_dead_ends
+from laberinto.core import (GRID_COLS, GRID_ROWS, PLAYER_SPAWN_TYPES, TERRAIN_WALK_PLAYER, build_level,
+                            find_random_cell_of_type, generate_maze_with_features)
+
+
+def dead_ends_brute(grid):
+    rows, cols = len(grid), len(grid[0])
+    walk = TERRAIN_WALK_PLAYER
+    total = 0
+    for r in range(rows):
+        for c in range(cols):
+            if not walk[grid[r][c]]:
+                continue
+            around = [(r+dr, c+dc) for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1))]
+            if sum(1 for nr, nc in around if 0 <= nr < rows and 0 <= nc < cols and walk[grid[nr][nc]]) == 1:
+                total += 1
+    return total
+
+
+@pytest.mark.parametrize("rows,cols", [(11, 13), (41, 61), (GRID_ROWS, GRID_COLS)])
+def test_loaded_grid_uses_its_own_size(rows, cols):
+    grid = generate_maze_with_features(7, rows, cols)
+    result = analyze_maze({"grid": grid})
+    assert (result["rows"], result["cols"]) == (rows, cols)
+    assert count_dead_ends(grid, False) == dead_ends_brute(grid)
+    assert result["player"]["dead_ends"] == dead_ends_brute(grid)
+
+
+def test_random_cells_cover_whole_grid():
+    # Las celdas al azar salen de todo el mapa, no solo de la esquina de GRID_ROWS x GRID_COLS
+    grid = generate_maze_with_features(5, 41, 61)
+    rng = random.Random(0)
+    cells = [find_random_cell_of_type(grid, PLAYER_SPAWN_TYPES, rng) for _ in range(300)]
+    assert max(r for r, _ in cells) >= GRID_ROWS
+    assert max(c for _, c in cells) >= GRID_COLS
+
+
+def test_loaded_grid_without_valid_start_is_a_failed_task():
+    # Un mapa cargado nunca se reemplaza por uno generado al azar
+    grid = [[1]*7 for _ in range(7)]
+    for c in range(1, 6):
+        grid[3][c] = 0
+    with pytest.raises(ValueError):
+        build_level(1, random.Random(1), grid=grid)
+    result = analyze_maze({"grid": grid})
+    assert (result["rows"], result["cols"]) == (7, 7) and "error" in result
+    summary = MazeStatsSummary()
+    summary.add(result)
+    summary.add(analyze_maze({"seed": 3}))
+    assert summary.as_dict()["mazes"] == 1 and summary.as_dict()["failed"] == 1
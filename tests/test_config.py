@@ -0,0 +1,88 @@
+# Pruebas de la compilación de config.json (entradas inválidas no impiden importar)
+import json
+
+from laberinto import core
+from laberinto.core import (DEFAULT_CONFIG, DIFFICULTIES, TERRAIN_WALK_ENEMY, TERRAIN_WALK_PLAYER,
+                            Simulation, apply_config, compile_terrains, compile_trap_types,
+                            generate_maze_with_features)
+
+
+def test_invalid_trap_types_are_skipped(capsys):
+    types = compile_trap_types({
+        "Buena": {"effect": "slow", "radius": 1, "color": [1, 2, 3]},
+        "Errata": {"effect": "kill", "radio": 2},
+        "Efecto": {"effect": "explode"},
+        "Color": {"color": "rojo"},
+        "Otra": {"effect": "kill", "score": 5},
+    })
+    assert list(types) == ["Buena", "Otra"]
+    # Índices contiguos entre los tipos válidos (atlas de sprites y telemetría)
+    assert [t.index for t in types.values()] == [0, 1]
+    out = capsys.readouterr().out
+    assert "'Errata'" in out and "'Efecto'" in out and "'Color'" in out
+
+
+def test_no_valid_trap_types_falls_back_to_defaults():
+    assert list(compile_trap_types({"Mala": {"radio": 1}})) == list(DEFAULT_CONFIG["trap_types"])
+    assert list(compile_trap_types(["no", "es", "un", "objeto"])) == list(DEFAULT_CONFIG["trap_types"])
+
+
+def test_invalid_terrains_are_skipped(capsys):
+    terrains, walk_player, walk_enemy, colors, spawn_ids, _ = compile_terrains([
+        {"id": 0, "name": "Camino", "spawn_weight": 1.0},
+        {"name": "SinId"},
+        {"id": "2", "name": "IdTexto"},
+        {"id": 3, "color": [1, 2]},
+        {"id": 4, "name": "Agua", "walkable_for_player": False, "color": [0, 0, 200], "spawn_weight": "mucho"},
+        {"id": 5, "name": "Barro", "walkable_for_enemy": False, "color": [90, 60, 30], "spawn_weight": 0.5},
+    ])
+    assert sorted(terrains) == [0, 1, 5]
+    assert spawn_ids == [0, 5]
+    assert colors[5] == (90, 60, 30) and not walk_enemy[5]
+    assert capsys.readouterr().out.count("se omite") == 4
+
+
+def test_no_valid_terrains_falls_back_to_defaults():
+    terrains = compile_terrains([{"nombre": "Camino"}])[0]
+    assert sorted(terrains) == [t["id"] for t in DEFAULT_CONFIG["terrains"]]
+
+
+def test_default_difficulty_falls_back_to_first_profile(monkeypatch):
+    # Un config.json que reemplaza los perfiles sin "Normal" hereda default_difficulty "Normal"
+    config = json.loads(json.dumps(DEFAULT_CONFIG))
+    config.update({"difficulties": {"Tranquilo": {"num_enemies": 2, "enemy_speed": 0.5},
+                                    "Roto": {"num_enemies": "muchos"},
+                                    "Caos": {"num_enemies": 9, "enemy_speed": 2.0}}})
+    original = core.get_config()
+    monkeypatch.setattr(core, "_config_cache", config)
+    try:
+        apply_config(config)
+        assert list(DIFFICULTIES) == ["Tranquilo", "Caos"]
+        assert config["default_difficulty"] == "Tranquilo"
+        sim = Simulation(mode="escapa", defer_map=True)
+        assert (sim.difficulty, sim.num_enemies, sim.enemy_speed) == ("Tranquilo", 2, 0.5)
+    finally:
+        apply_config(original)
+
+
+def test_missing_path_and_wall_terrains_use_defaults(monkeypatch, capsys):
+    # Sin el id 1 los muros serían transitables; con id máximo 0 el muro ni existiría
+    original = core.get_config()
+    for terrain_defs in ([{"id": 0, "name": "Camino", "spawn_weight": 1.0},
+                          {"id": 2, "name": "Lianas", "walkable_for_player": False, "spawn_weight": 0.2}],
+                         [{"id": 0, "name": "Suelo", "color": [10, 10, 10], "spawn_weight": 1.0}],
+                         [{"id": 3, "name": "Tunel", "walkable_for_enemy": False, "spawn_weight": 1.0}]):
+        terrains = compile_terrains(terrain_defs)[0]
+        assert terrains[1].name == "Muro" and not terrains[1].walkable_for_player
+        assert 0 in terrains
+        config = json.loads(json.dumps(DEFAULT_CONFIG))
+        config["terrains"] = terrain_defs
+        monkeypatch.setattr(core, "_config_cache", config)
+        try:
+            apply_config(config)
+            grid = generate_maze_with_features(1)
+            assert any(v == 1 for row in grid for v in row)
+            assert not TERRAIN_WALK_PLAYER[1] and not TERRAIN_WALK_ENEMY[1]
+        finally:
+            apply_config(original)
+    assert "falta el terreno 1 (Muro)" in capsys.readouterr().out
@@ -0,0 +1,31 @@
+# Pruebas de la semilla del entorno de entrenamiento
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from laberinto.env import EscapaEnv, VecEnv
+
+
+def test_seed_does_not_touch_global_random():
+    random.seed(123)
+    expected = random.random()
+    random.seed(123)
+    VecEnv(4, maze_pool_size=2, seed=7)
+    assert random.random() == expected
+
+
+def test_same_seed_same_pool():
+    a = VecEnv(4, maze_pool_size=2, seed=7)
+    b = VecEnv(4, maze_pool_size=2, seed=7)
+    assert (a.pool_grids == b.pool_grids).all()
+    assert (a.pool_starts == b.pool_starts).all()
+
+
+def test_reset_with_seed_repeats_episode():
+    # reset(seed=n) rehace la reserva de mapas con esa semilla aunque el entorno se creara sin ella
+    first, _ = EscapaEnv(maze_pool_size=2).reset(seed=5)
+    again, _ = EscapaEnv(maze_pool_size=2).reset(seed=5)
+    for key in ("grid", "player", "exit", "enemies"):
+        assert (first[key] == again[key]).all()
@@ -0,0 +1,66 @@
+# Pruebas del bus de eventos (buffer circular) y de la telemetría en gzip JSONL
+import gzip
+import json
+
+from laberinto.core import (EV_ENEMY_TRAPPED, EV_GAME_START, EV_SCORE, EVENT_NAMES, EventBus,
+                            TelemetrySink)
+
+
+def test_read_returns_events_in_order():
+    bus = EventBus(capacity=8)
+    bus.publish(EV_GAME_START, 0.0, v=42)
+    bus.publish(EV_ENEMY_TRAPPED, 1.5, 3, 4, 7)
+    events, seq, dropped = bus.read(0)
+    assert events == [(EV_GAME_START, 1, 0.0, -1, -1, 42), (EV_ENEMY_TRAPPED, 1, 1.5, 3, 4, 7)]
+    assert (seq, dropped) == (2, 0)
+    # Sin eventos nuevos la lectura está vacía y la secuencia no cambia
+    assert bus.read(seq) == ([], 2, 0)
+
+
+def test_ring_overflow_drops_oldest():
+    bus = EventBus(capacity=8)
+    for v in range(20):
+        bus.publish(EV_SCORE, float(v), v=v)
+    events, seq, dropped = bus.read(0)
+    # Solo caben los últimos 8; los 12 anteriores se cuentan como descartados
+    assert [e[5] for e in events] == list(range(12, 20))
+    assert (seq, dropped) == (20, 12)
+    # Un lector al día no pierde nada aunque el buffer haya dado varias vueltas
+    bus.publish(EV_SCORE, 20.0, v=20)
+    assert bus.read(seq) == ([(EV_SCORE, 0, 20.0, -1, -1, 20)], 21, 0)
+    # Justo la capacidad de retraso todavía se lee entera
+    for v in range(8):
+        bus.publish(EV_SCORE, 0.0, v=v)
+    events, _, dropped = bus.read(21)
+    assert [e[5] for e in events] == list(range(8)) and dropped == 0
+
+
+def test_subscribers_only_get_their_code():
+    bus = EventBus(capacity=8)
+    got = []
+    bus.subscribe(EV_ENEMY_TRAPPED, lambda *args: got.append(args))
+    bus.publish(EV_SCORE, 0.0, v=1)
+    bus.publish(EV_ENEMY_TRAPPED, 2.0, 1, 2, 3)
+    assert got == [(EV_ENEMY_TRAPPED, 2.0, 1, 2, 3)]
+
+
+def test_telemetry_gzip_round_trip(tmp_path):
+    bus = EventBus(capacity=16)
+    # Lo publicado antes de crear el volcado no se escribe
+    bus.publish(EV_SCORE, 0.0, v=-1)
+    sink = TelemetrySink(bus, directory=str(tmp_path / "telemetry"), interval=60.0).start()
+    bus.publish(EV_GAME_START, 0.0, v=123)
+    bus.publish(EV_ENEMY_TRAPPED, 1.25, 5, 6, 2)
+    sink.flush()
+    # Desbordamiento entre dos volcados: se cuentan los perdidos
+    for v in range(20):
+        bus.publish(EV_SCORE, 2.0, v=v)
+    # stop() vuelca lo pendiente y cierra el archivo
+    sink.stop()
+    with gzip.open(sink.path, "rt", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert rows[:2] == [{"event": "game_start", "game": 1, "t": 0.0, "r": -1, "c": -1, "v": 123},
+                        {"event": EVENT_NAMES[EV_ENEMY_TRAPPED], "game": 1, "t": 1.25, "r": 5, "c": 6, "v": 2}]
+    assert [r["v"] for r in rows[2:]] == list(range(4, 20))
+    assert sink.written == len(rows) == 18
+    assert sink.dropped == 4
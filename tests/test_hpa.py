@@ -0,0 +1,110 @@
+# Pruebas de HierarchicalPathfinder contra el BFS plano (bfs_distance_field)
+import random
+
+import pytest
+
+from laberinto import core
+from laberinto.core import (TERRAIN_WALK_ENEMY, TERRAIN_WALK_PLAYER, bfs_distance_field,
+                            generate_maze_with_features)
+from laberinto.hpa import HierarchicalPathfinder
+
+
+def check_paths(grid, hpa, rng, queries=200):
+    # Cada camino debe existir si y solo si el BFS llega, ser continuo sobre celdas
+    # transitables y no ser más corto que el óptimo
+    rows, cols = len(grid), len(grid[0])
+    walk = TERRAIN_WALK_ENEMY if hpa.for_enemy else TERRAIN_WALK_PLAYER
+    cells = [(r, c) for r in range(rows) for c in range(cols) if walk[grid[r][c]]]
+    for _ in range(queries):
+        a, b = rng.choice(cells), rng.choice(cells)
+        d = bfs_distance_field(grid, a, hpa.for_enemy)[b[0]*cols + b[1]]
+        path = hpa.find_path(a, b)
+        if d < 0:
+            assert path is None, (a, b)
+            continue
+        assert path is not None, (a, b)
+        assert path[0] == a and path[-1] == b
+        for (r1, c1), (r2, c2) in zip(path, path[1:]):
+            assert abs(r1-r2) + abs(c1-c2) == 1, (a, b, (r1, c1), (r2, c2))
+            assert walk[grid[r2][c2]]
+        assert len(path) - 1 == hpa.distance(a, b) >= d
+
+
+# Mapas estrechos (una sola fila o columna de clusters) y no cuadrados
+@pytest.mark.parametrize("rows,cols", [(40, 16), (48, 10), (16, 40), (10, 48), (64, 64), (37, 21)])
+@pytest.mark.parametrize("for_enemy", [True, False])
+def test_find_path_matches_bfs(rows, cols, for_enemy):
+    grid = generate_maze_with_features(rows*cols, rows, cols)
+    check_paths(grid, HierarchicalPathfinder(grid, for_enemy), random.Random(rows*cols))
+
+
+@pytest.mark.parametrize("rows,cols", [(40, 16), (16, 40), (60, 60)])
+def test_set_terrain_matches_fresh_build(rows, cols):
+    # Tras muchos cambios incrementales el grafo es el mismo que construirlo de cero
+    rng = random.Random(9)
+    grid = generate_maze_with_features(9, rows, cols)
+    hpa = HierarchicalPathfinder(grid, True, cluster_size=8)
+    hpa.precompute()
+    for _ in range(300):
+        hpa.set_terrain(rng.randrange(rows), rng.randrange(cols), rng.choice([0, 1, 2, 3]))
+    fresh = HierarchicalPathfinder([row[:] for row in grid], True, cluster_size=8)
+    assert fresh.border_pairs == hpa.border_pairs
+    assert fresh.cluster_nodes == hpa.cluster_nodes
+    assert ({k: sorted(v) for k, v in fresh.inter.items() if v} ==
+            {k: sorted(v) for k, v in hpa.inter.items() if v})
+    check_paths(grid, hpa, rng)
+
+
+def test_landmarks_keep_costs():
+    # Con landmarks (cota ALT) el A* encuentra caminos del mismo coste que sin ellos
+    rng = random.Random(3)
+    grid = generate_maze_with_features(3, 50, 70)
+    plain = HierarchicalPathfinder(grid, True, cluster_size=8)
+    fast = HierarchicalPathfinder(grid, True, cluster_size=8)
+    fast.build_landmarks(4)
+    cells = [(r, c) for r in range(50) for c in range(70) if TERRAIN_WALK_ENEMY[grid[r][c]]]
+    for _ in range(100):
+        a, b = rng.choice(cells), rng.choice(cells)
+        assert plain.distance(a, b) == fast.distance(a, b)
+
+
+def test_landmarks_survive_set_terrain():
+    # Tras cambios de terreno los landmarks se corrigen (no se descartan) y el A* sigue
+    # encontrando caminos del mismo coste que sin landmarks
+    rng = random.Random(5)
+    rows, cols = 50, 70
+    grid = generate_maze_with_features(5, rows, cols)
+    fast = HierarchicalPathfinder(grid, True, cluster_size=8)
+    fast.build_landmarks(4)
+    for batch in range(6):
+        for _ in range(40):
+            # Sobre todo abre muros (acorta caminos); también pone algunos
+            fast.set_terrain(rng.randrange(rows), rng.randrange(cols), rng.choice([0, 0, 0, 1, 2, 3]))
+        assert len(fast.landmark_dist) == 4
+        plain = HierarchicalPathfinder([row[:] for row in grid], True, cluster_size=8)
+        cells = [(r, c) for r in range(rows) for c in range(cols) if TERRAIN_WALK_ENEMY[grid[r][c]]]
+        for _ in range(60):
+            a, b = rng.choice(cells), rng.choice(cells)
+            assert plain.distance(a, b) == fast.distance(a, b), (batch, a, b)
+
+
+def test_simulation_chases_with_hpa_on_large_maps(monkeypatch):
+    # Por encima de HPA_MIN_CELLS la simulación persigue con HPA* y respeta las reservas
+    monkeypatch.setattr(core, "HPA_MIN_CELLS", 0)
+    sim = core.Simulation(mode="escapa")
+    assert isinstance(sim.enemy_hpa, HierarchicalPathfinder)
+    goal = (sim.player.r, sim.player.c)
+    cols = len(sim.grid[0])
+    field = bfs_distance_field(sim.grid, goal)
+    start = sum(field[e.r*cols + e.c] for e in sim.enemies if field[e.r*cols + e.c] > 0)
+    for _ in range(10):
+        before = [(e.r, e.c) for e in sim.enemies]
+        sim.plan_chasers(sim.enemies)
+        cells = [(e.r, e.c) for e in sim.enemies if (e.r, e.c) != goal]
+        assert len(set(cells)) == len(cells)
+        for (r0, c0), e in zip(before, sim.enemies):
+            assert abs(e.r - r0) + abs(e.c - c0) <= 1
+            assert TERRAIN_WALK_ENEMY[sim.grid[e.r][e.c]]
+    # Los que tienen camino hasta el jugador se acercan
+    if start:
+        assert sum(max(field[e.r*cols + e.c], 0) for e in sim.enemies) < start
@@ -0,0 +1,75 @@
+# Pruebas de Leaderboard: puestos con bisect contra SQL, paginación y top del HUD
+import json
+import random
+
+from laberinto.core import HUD_TOP, Leaderboard
+
+
+def sql_rank(board, mode, score):
+    # Puesto según SQL: 1 + partidas del modo con puntuación estrictamente mayor
+    return 1 + board.db.execute("SELECT COUNT(*) FROM runs WHERE mode=? AND score > ?",
+                                (mode, score)).fetchone()[0]
+
+
+def test_rank_matches_sql(tmp_path):
+    rng = random.Random(1)
+    board = Leaderboard(str(tmp_path / "scores.db"), legacy_file=None)
+    for i in range(300):
+        board.record(f"p{i % 7}", rng.choice(["escapa", "cazador"]), rng.randrange(50))
+    # Primer puesto pedido: el índice se carga de la base de datos
+    probes = [-1, 0, 10, 25, 49, 50, 1000]
+    for mode in ("escapa", "cazador"):
+        for score in probes:
+            assert board.rank(mode, score) == sql_rank(board, mode, score)
+    # Inserciones con el índice ya cargado (bisect.insort), empates incluidos
+    for _ in range(200):
+        board.record("q", "escapa", rng.randrange(60))
+    for score in probes + [55, 59]:
+        assert board.rank("escapa", score) == sql_rank(board, "escapa", score)
+    assert board.count("escapa") == board.db.execute(
+        "SELECT COUNT(*) FROM runs WHERE mode='escapa'").fetchone()[0]
+    assert board.rank("vacio", 3) == 1
+    board.close()
+
+
+def test_pages_cover_the_full_ranking(tmp_path):
+    rng = random.Random(2)
+    board = Leaderboard(str(tmp_path / "scores.db"), legacy_file=None)
+    for i in range(53):
+        board.record(f"p{i}", "escapa", rng.randrange(10))
+    full = board.top("escapa", 1000)
+    pages, after = [], None
+    while True:
+        page = board.top("escapa", 8, after)
+        if not page:
+            break
+        pages += page
+        after = (page[-1]["score"], page[-1]["id"])
+    assert pages == full and len(full) == 53
+    assert [e["score"] for e in full] == sorted((e["score"] for e in full), reverse=True)
+    board.close()
+
+
+def test_hud_top_and_personal_best(tmp_path):
+    board = Leaderboard(str(tmp_path / "scores.db"), legacy_file=None)
+    for i, score in enumerate([5, 9, 1, 9, 7, 3, 8]):
+        board.record(f"p{i % 2}", "cazador", score, difficulty="Normal", seed=i)
+    assert board.top_cache["cazador"] == board.top("cazador", HUD_TOP)
+    # Empates: la partida anterior queda delante
+    assert [(e["score"], e["seed"]) for e in board.top_cache["cazador"][:2]] == [(9, 1), (9, 3)]
+    assert board.personal_best("p0", "cazador") == 8
+    assert board.personal_best("p1", "cazador") == 9
+    assert board.personal_best("p0", "escapa") is None
+    assert [h["score"] for h in board.history("p0")] == [8, 7, 1, 5]
+    board.close()
+
+
+def test_legacy_scores_are_migrated_once(tmp_path):
+    legacy = tmp_path / "scores.json"
+    legacy.write_text(json.dumps({"escapa": [{"name": "ANA", "score": 40}], "cazador": []}))
+    path = str(tmp_path / "scores.db")
+    Leaderboard(path, legacy_file=str(legacy)).close()
+    board = Leaderboard(path, legacy_file=str(legacy))
+    assert board.count("escapa") == 1
+    assert board.top_cache["escapa"][0]["name"] == "ANA"
+    board.close()
@@ -0,0 +1,64 @@
+# Pruebas de DistanceOracle (tabla exacta y landmarks ALT) contra el BFS plano
+import random
+
+import pytest
+
+from laberinto.core import (ORACLE_INF, TERRAIN_WALK_ENEMY, TERRAIN_WALK_PLAYER, DistanceOracle,
+                            bfs_distance_field, generate_maze_with_features)
+
+
+@pytest.mark.parametrize("exact_max_cells", [10**9, 0])
+@pytest.mark.parametrize("for_enemy", [True, False])
+def test_distances_match_bfs(exact_max_cells, for_enemy):
+    # Modo exacto (tabla) y modo ALT (A* guiado por landmarks) dan la distancia del BFS, y
+    # la cota inferior nunca la supera
+    rng = random.Random(11)
+    grid = generate_maze_with_features(11, 30, 40)
+    oracle = DistanceOracle(grid, for_enemy, exact_max_cells=exact_max_cells)
+    assert oracle.exact == (exact_max_cells > 0)
+    walk = TERRAIN_WALK_ENEMY if for_enemy else TERRAIN_WALK_PLAYER
+    cells = [(r, c) for r in range(30) for c in range(40) if walk[grid[r][c]]]
+    for _ in range(40):
+        a = rng.choice(cells)
+        field = bfs_distance_field(grid, a, for_enemy)
+        view = oracle.field(a)
+        for _ in range(10):
+            b = rng.choice(cells)
+            d = field[b[0]*40 + b[1]]
+            assert oracle.distance(a, b) == (None if d < 0 else d)
+            assert view[b[0]*40 + b[1]] == d
+            bound = oracle.lower_bound(a, b)
+            if d < 0:
+                assert bound == ORACLE_INF
+            else:
+                assert bound <= d
+
+
+def test_blocked_cells_have_no_distance():
+    grid = generate_maze_with_features(2, 20, 25)
+    oracle = DistanceOracle(grid, True)
+    wall = next((r, c) for r in range(20) for c in range(25) if not TERRAIN_WALK_ENEMY[grid[r][c]])
+    free = next((r, c) for r in range(20) for c in range(25) if TERRAIN_WALK_ENEMY[grid[r][c]])
+    assert oracle.distance(wall, free) is None
+    assert oracle.farthest_from(wall) is None
+
+
+def test_farthest_from_is_the_bfs_maximum():
+    grid = generate_maze_with_features(4, 20, 25)
+    oracle = DistanceOracle(grid, False)
+    start = next((r, c) for r in range(20) for c in range(25) if TERRAIN_WALK_PLAYER[grid[r][c]])
+    (fr, fc), d = oracle.farthest_from(start)
+    field = bfs_distance_field(grid, start, for_enemy=False)
+    assert d == max(field) == field[fr*25 + fc]
+
+
+def test_alt_bound_separates_components_without_landmarks():
+    # Tres zonas aisladas y un solo landmark: entre las dos sin landmark tampoco hay camino
+    grid = [[0, 0, 1, 0, 0, 1, 0, 0],
+            [0, 0, 1, 0, 0, 1, 0, 0]]
+    oracle = DistanceOracle(grid, True, exact_max_cells=0, num_landmarks=1)
+    assert not oracle.exact
+    for a, b in (((0, 0), (1, 3)), ((0, 3), (1, 7)), ((0, 0), (0, 7))):
+        assert oracle.lower_bound(a, b) == ORACLE_INF
+        assert oracle.distance(a, b) is None
+    assert oracle.distance((0, 3), (1, 4)) == 2
@@ -0,0 +1,76 @@
+# Pruebas de la percepción de los enemigos (VisibilityCache y cono de visión)
+import random
+
+import pytest
+
+from laberinto.core import (TERRAIN_BLOCKS_SIGHT, VISION_RANGE, Enemy, Simulation, VisibilityCache,
+                            bresenham_line, generate_maze_with_features)
+
+
+def brute_visible(grid, r, c, vision_range=VISION_RANGE):
+    # Celdas dentro del alcance cuya recta de Bresenham hasta (r,c) no cruza nada que tape
+    rows, cols = len(grid), len(grid[0])
+    seen = set()
+    for tr in range(rows):
+        for tc in range(cols):
+            if (tr-r)**2 + (tc-c)**2 > vision_range*vision_range:
+                continue
+            mid = bresenham_line(r, c, tr, tc)[1:-1]
+            if not any(TERRAIN_BLOCKS_SIGHT[grid[mr][mc]] for mr, mc in mid):
+                seen.add(tr*cols + tc)
+    return seen
+
+
+@pytest.mark.parametrize("rows,cols", [(20, 25), (31, 17)])
+def test_visible_from_matches_brute_force(rows, cols):
+    grid = generate_maze_with_features(rows, rows, cols)
+    vision = VisibilityCache(grid)
+    rng = random.Random(rows)
+    # Incluye esquinas y bordes (rayos que salen del mapa)
+    cells = [(0, 0), (rows-1, cols-1), (0, cols-1)] + [(rng.randrange(rows), rng.randrange(cols)) for _ in range(30)]
+    for r, c in cells:
+        assert vision.visible_from(r, c) == brute_visible(grid, r, c), (r, c)
+
+
+def test_cache_hits_and_lru_eviction():
+    grid = generate_maze_with_features(3, 20, 25)
+    vision = VisibilityCache(grid, max_entries=2)
+    a = vision.visible_from(1, 1)
+    assert vision.visible_from(1, 1) is a
+    assert (vision.hits, vision.misses) == (1, 1)
+    vision.visible_from(3, 3)
+    # (1,1) se usó antes que (3,3): al entrar (5,5) sale (1,1), el menos reciente
+    vision.visible_from(1, 1)
+    vision.visible_from(5, 5)
+    assert list(vision._cache) == [1*25 + 1, 5*25 + 5]
+    vision.visible_from(3, 3)
+    assert (vision.hits, vision.misses) == (2, 4)
+
+
+def test_new_map_gets_new_visibility():
+    # Cada mapa nuevo trae su propia caché: no se reutiliza la visibilidad del anterior
+    sim = Simulation(mode="escapa")
+    old = sim.vision
+    old.visible_from(sim.player.r, sim.player.c)
+    sim.reset_game_state()
+    assert sim.vision is not old and sim.vision.grid is sim.grid
+    assert not sim.vision._cache
+
+
+def test_vision_cone():
+    sim = Simulation(mode="escapa", defer_map=True)
+    e = Enemy(10, 10)
+    # Sin dirección (recién aparecido) ve en todas direcciones
+    e.facing = (0, 0)
+    assert sim.in_vision_cone(e, 4, 10)
+    # Mirando a la derecha: delante y a 45 grados sí; detrás y muy de lado no
+    e.facing = (0, 1)
+    assert sim.in_vision_cone(e, 10, 15)
+    assert not sim.in_vision_cone(e, 10, 5)
+    assert not sim.in_vision_cone(e, 4, 10)
+    assert sim.in_vision_cone(e, 10 - 3, 10 + 3)
+    assert not sim.in_vision_cone(e, 10 - 5, 10 + 2)
+    # Muy cerca lo nota aunque esté a su espalda (también en diagonal)
+    assert sim.in_vision_cone(e, 10, 9)
+    assert sim.in_vision_cone(e, 11, 9)
+    assert not sim.in_vision_cone(e, 10, 8)
@@ -0,0 +1,62 @@
+# Pruebas del planificador cooperativo de enemigos (plan_enemy_moves)
+import random
+
+from laberinto.core import (ENEMY_SPAWN_TYPES, bfs_distance_field, find_random_cell_of_type,
+                            generate_maze_with_features, plan_enemy_moves)
+
+
+def test_plans_on_grid_of_other_size():
+    # Con un mapa que no es de GRID_ROWS x GRID_COLS los vecinos salen del tamaño real
+    grid = generate_maze_with_features(1, 61, 61)
+    rng = random.Random(3)
+    goal = find_random_cell_of_type(grid, ENEMY_SPAWN_TYPES, rng)
+    dist = bfs_distance_field(grid, goal)
+    positions = [find_random_cell_of_type(grid, ENEMY_SPAWN_TYPES, rng) for _ in range(12)]
+    moves = plan_enemy_moves(grid, positions, range(len(positions)), goal)
+    cols = len(grid[0])
+    for i, (r, c) in enumerate(positions):
+        nr, nc = moves[i]
+        d = dist[r*cols + c]
+        if d > 0 and moves[i] != (r, c):
+            assert abs(nr - r) + abs(nc - c) == 1
+            assert dist[nr*cols + nc] == d - 1
+    # Al menos uno lejos del borde 20x25 avanzó hacia el objetivo
+    assert any(moves[i] != p and (p[0] >= 20 or p[1] >= 25) for i, p in enumerate(positions))
+
+
+def test_reservation_keeps_enemies_apart():
+    # Dos enemigos cuyo único paso útil es la misma celda: uno avanza y el otro espera
+    grid = [[1, 0, 1],
+            [0, 0, 1],
+            [1, 0, 1],
+            [1, 0, 1]]
+    moves = plan_enemy_moves(grid, [(1, 0), (0, 1)], [0, 1], (3, 1))
+    assert sorted(moves.values()) in ([(0, 1), (1, 1)], [(1, 0), (1, 1)])
+
+
+def test_enemies_may_share_the_player_cell():
+    # La celda del jugador no se reserva: los dos lo atrapan en el mismo tick
+    grid = [[0, 0, 0]]
+    moves = plan_enemy_moves(grid, [(0, 0), (0, 2)], [0, 1], (0, 1))
+    assert moves == {0: (0, 1), 1: (0, 1)}
+
+
+def test_waiting_enemy_keeps_its_cell():
+    # Un enemigo que no se mueve este tick sigue ocupando su celda
+    grid = [[0, 0, 0, 0]]
+    moves = plan_enemy_moves(grid, [(0, 0), (0, 1)], [0], (0, 3))
+    assert moves == {0: (0, 0)}
+
+
+def test_congestion_splits_routes():
+    # Anillo alrededor de un pilar: el primero va por abajo (su único camino corto) y el
+    # segundo, con dos rutas igual de cortas, toma la otra aunque la de abajo sea la
+    # primera en el orden de vecinos
+    grid = [[0, 0, 0],
+            [0, 1, 0],
+            [0, 0, 0]]
+    moves = plan_enemy_moves(grid, [(1, 0), (0, 0)], [0, 1], (2, 2))
+    assert moves[0] == (2, 0)
+    assert moves[1] == (0, 1)
+    # Sin el otro enemigo toma el primer vecino (abajo)
+    assert plan_enemy_moves(grid, [(0, 0)], [0], (2, 2)) == {0: (1, 0)}
@@ -0,0 +1,90 @@
+# Pruebas de las partidas en red sin abrir sockets (Match directamente)
+import asyncio
+
+from laberinto.core import LOGIC_HZ, TERRAIN_WALK_ENEMY, neighbors
+from laberinto.server import Connection, GameServer, Match
+
+
+def hunter_moves(match, ticks):
+    # Mantiene al cazador yendo y viniendo entre dos celdas y cuenta cuántas veces se mueve
+    hunter = match.enemies[0]
+    home = (hunter.r, hunter.c)
+    other = next(n for n in neighbors(*home) if TERRAIN_WALK_ENEMY[match.grid[n[0]][n[1]]])
+    moves = 0
+    for _ in range(ticks):
+        if not match.inputs["hunter"]:
+            target = other if (hunter.r, hunter.c) == home else home
+            match.push_input("hunter", {"dir": (target[0] - hunter.r, target[1] - hunter.c)})
+        before = (hunter.r, hunter.c)
+        match.step()
+        moves += (hunter.r, hunter.c) != before
+    return moves
+
+
+def test_hunter_respects_enemy_cooldown():
+    match = Match(0)
+    # Sin enemigos de IA que puedan terminar la partida
+    for e in match.enemies[1:]:
+        e.alive = False
+        e.respawn_time = None
+    seconds = 4
+    cooldown = match.enemies[0].move_cooldown / match.enemy_speed
+    moves = hunter_moves(match, LOGIC_HZ*seconds)
+    assert 0 < moves <= seconds/cooldown + 1
+
+
+def test_hunter_is_slowed_by_traps():
+    match = Match(0)
+    for e in match.enemies[1:]:
+        e.alive = False
+        e.respawn_time = None
+    normal = hunter_moves(match, LOGIC_HZ*6)
+    hunter = match.enemies[0]
+    hunter.slow_factor = 3.0
+    hunter.slow_until = match.sim_time + 100.0
+    slowed = hunter_moves(match, LOGIC_HZ*6)
+    assert slowed < normal
+
+
+class FakeTransport:
+    def get_write_buffer_size(self):
+        return 0
+
+
+class FakeWriter:
+    # Escritor mínimo para Connection (acumula lo enviado en memoria)
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.data = b""
+        self.closed = False
+
+    def write(self, data):
+        self.data += data
+
+    def is_closing(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+
+class RecordingServer(GameServer):
+    # Guarda la última partida terminada para inspeccionarla
+    def end_match(self, match_id):
+        self.ended = self.matches[match_id][0]
+        super().end_match(match_id)
+
+
+def test_non_object_messages_are_ignored():
+    # Líneas JSON que no son objetos no deben cerrar la conexión ni dar la partida por perdida
+    server = RecordingServer()
+    server.join(Connection(None, FakeWriter()))
+
+    async def client():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'[]\n1\n"x"\nno es json\n{"type": "input", "dir": [0, 1]}\n')
+        reader.feed_eof()
+        await server.handle_client(reader, FakeWriter())
+
+    asyncio.run(client())
+    assert list(server.ended.inputs["hunter"]) == [(0, 1, False, False)]
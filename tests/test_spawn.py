@@ -0,0 +1,49 @@
+# Pruebas de la aparición de enemigos en la simulación (sin pygame)
+from laberinto.core import (TERRAIN_WALK_ENEMY, TERRAIN_WALK_PLAYER,
+                            Simulation, neighbors)
+
+
+def tunnel_cells(sim):
+    # Celdas que pisa el jugador pero no los enemigos y que tocan una celda de enemigo
+    grid = sim.grid
+    for r, row in enumerate(grid):
+        for c, v in enumerate(row):
+            if TERRAIN_WALK_PLAYER[v] and not TERRAIN_WALK_ENEMY[v]:
+                near = [(nr, nc) for nr, nc in neighbors(r, c) if TERRAIN_WALK_ENEMY[grid[nr][nc]]]
+                if near:
+                    yield (r, c), near
+
+
+def test_player_on_tunnel_is_not_safe_next_to_it():
+    # Con el jugador en un túnel el oráculo de enemigos no lo alcanza; no por eso es seguro
+    checked = 0
+    for _ in range(10):
+        sim = Simulation(mode="escapa")
+        for (pr, pc), near in tunnel_cells(sim):
+            for er, ec in near:
+                assert not sim.spawn_is_safe(er, ec, pr, pc)
+            checked += 1
+    assert checked
+
+
+
+def test_initial_spawn_cells_are_distinct():
+    # La reserva de celdas empieza con el primer movimiento: al aparecer ya deben estar separados
+    for _ in range(20):
+        sim = Simulation(mode="escapa", defer_map=True)
+        sim.num_enemies = 40
+        sim.reset_game_state()
+        cells = [(e.r, e.c) for e in sim.enemies]
+        assert len(set(cells)) == len(cells)
+
+
+def test_respawn_avoids_living_enemies():
+    for _ in range(20):
+        sim = Simulation(mode="escapa", defer_map=True)
+        sim.num_enemies = 40
+        sim.reset_game_state()
+        dead = sim.enemies[0]
+        dead.alive = False
+        dead.respawn_time = 0.0
+        sim.enemy_respawn_check()
+        assert (dead.r, dead.c) not in {(e.r, e.c) for e in sim.enemies[1:]}
@@ -0,0 +1,56 @@
+# Pruebas de las trampas sobre la simulación (sin pygame)
+from laberinto.core import EV_ENEMY_SLOWED, LOGIC_DT, Simulation, TrapType
+
+
+def test_slow_trap_applies_once_per_enemy():
+    # Una red que no se consume ralentiza y puntúa una sola vez aunque el enemigo se quede
+    # en su radio muchos ticks
+    sim = Simulation(mode="escapa")
+    net = TrapType("Red", effect="slow", radius=1, duration=30.0, score=10, slow_time=2.0)
+    e = sim.enemies[0]
+    # Solo este enemigo cuenta (otro podría aparecer dentro del radio de la red)
+    for other in sim.enemies[1:]:
+        other.alive = False
+    sim.traps.place(e.r, e.c, sim.sim_time, net, sim.grid)
+    slowed = []
+    sim.events.subscribe(EV_ENEMY_SLOWED, lambda *ev: slowed.append(ev))
+    score = sim.player.score
+    for _ in range(40):
+        sim.check_collisions()
+        sim.sim_time += LOGIC_DT
+    assert len(slowed) == 1
+    assert sim.player.score - score == 10
+    # La ralentización termina slow_time segundos después de caer en la red
+    assert e.slow_until == 2.0
+    # Una trampa reciclada del pool vuelve a afectar al mismo enemigo
+    sim.traps.clear()
+    sim.traps.place(e.r, e.c, sim.sim_time, net, sim.grid)
+    sim.check_collisions()
+    assert len(slowed) == 2
+
+
+def test_kill_trap_is_consumed():
+    sim = Simulation(mode="escapa")
+    trap = TrapType("Basica", effect="kill", score=50)
+    e = sim.enemies[0]
+    sim.traps.place(e.r, e.c, sim.sim_time, trap, sim.grid)
+    score = sim.player.score
+    sim.check_collisions()
+    assert not e.alive
+    assert sim.player.score - score == 50
+    assert len(sim.traps) == 0
+
+
+def test_every_trap_on_a_cell_applies():
+    # Una red ya aplicada encima de una trampa básica no la tapa
+    sim = Simulation(mode="escapa")
+    net = TrapType("Red", effect="slow", radius=1, duration=30.0, score=10, slow_time=2.0)
+    kill = TrapType("Basica", effect="kill", score=50)
+    e = sim.enemies[0]
+    sim.traps.place(e.r, e.c, sim.sim_time, net, sim.grid)
+    sim.check_collisions()
+    assert e.alive and e.slow_until > sim.sim_time
+    sim.traps.place(e.r, e.c, sim.sim_time, kill, sim.grid)
+    sim.check_collisions()
+    assert not e.alive
+    assert len(sim.traps) == 1